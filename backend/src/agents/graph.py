@@ -118,7 +118,9 @@ async def run_analysis_pipeline(
     image_bytes: bytes,
     query: str = None,
     sensor_data: dict = None,
-    settings: Settings = None
+    settings: Settings = None,
+    vision_result: dict = None,
+    vision_options: dict = None
 ) -> dict:
     """
     Run the full analysis pipeline.
@@ -128,6 +130,8 @@ async def run_analysis_pipeline(
         query: Optional user query
         sensor_data: Optional IoT sensor readings
         settings: Application settings
+        vision_result: Precomputed vision output; skips YOLO in the vision node
+        vision_options: Extra vision options, e.g. ``{"tiled": True}``
         
     Returns:
         dict with vision, rag, recommendations, and summary
@@ -141,7 +145,9 @@ async def run_analysis_pipeline(
     initial_state = create_initial_state(
         image_bytes=image_bytes,
         query=query,
-        sensor_data=sensor_data
+        sensor_data=sensor_data,
+        vision_result=vision_result,
+        vision_options=vision_options
     )
     
     # Add settings to state for agents to use
@@ -159,7 +165,8 @@ async def run_analysis_pipeline(
             "vision": {
                 "detections": final_state.get("detections", []),
                 "summary": final_state.get("vision_summary", ""),
-                "has_disease": final_state.get("has_disease", False)
+                "has_disease": final_state.get("has_disease", False),
+                "inference": final_state.get("vision_inference")
             } if final_state.get("detections") else None,
             "rag": {
                 "query": final_state.get("rag_query", ""),
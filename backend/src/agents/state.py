@@ -20,11 +20,14 @@ class AgentState(TypedDict):
     image_bytes: Optional[bytes]
     query: Optional[str]
     sensor_data: Optional[dict]  # New: IoT Sensor Data
+    vision_result: Optional[dict]  # Precomputed vision output (batch analysis)
+    vision_options: Optional[dict]  # Extra analyze_image_with_yolo kwargs (e.g. tiled)
     
     # Vision Agent Output
     detections: list[dict]
     vision_summary: str
     has_disease: bool
+    vision_inference: Optional[dict]  # YOLO input size used and why
     
     # RAG Agent Output
     rag_query: str
@@ -45,7 +48,9 @@ class AgentState(TypedDict):
 def create_initial_state(
     image_bytes: Optional[bytes] = None,
     query: Optional[str] = None,
-    sensor_data: Optional[dict] = None
+    sensor_data: Optional[dict] = None,
+    vision_result: Optional[dict] = None,
+    vision_options: Optional[dict] = None
 ) -> AgentState:
     """Create initial state for the agent workflow."""
     return AgentState(
@@ -53,11 +58,14 @@ def create_initial_state(
         image_bytes=image_bytes,
         query=query,
         sensor_data=sensor_data,
+        vision_result=vision_result,
+        vision_options=vision_options,
         
         # Vision Agent Output
         detections=[],
         vision_summary="",
         has_disease=False,
+        vision_inference=None,
         
         # RAG Agent Output
         rag_query="",
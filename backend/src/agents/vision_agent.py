@@ -4,6 +4,7 @@ Uses YOLO for plant disease detection with Turkish localization.
 """
 from .state import AgentState
 from ..services.vision import analyze_image_with_yolo
+from ..services.inference_executor import InferenceQueueFull
 import logging
 
 logger = logging.getLogger(__name__)
@@ -65,7 +66,12 @@ async def vision_node(state: AgentState) -> AgentState:
     
     try:
         settings = state.get("_settings")
-        result = await analyze_image_with_yolo(image_bytes, settings)
+        # Batch analysis runs YOLO for all images up front and passes results in
+        result = state.get("vision_result")
+        if result is None:
+            result = await analyze_image_with_yolo(
+                image_bytes, settings, **(state.get("vision_options") or {})
+            )
         
         # Check if the service returned specific error regarding non-plant
         if result.get("error") == "Non-plant object detected":
@@ -115,8 +121,12 @@ async def vision_node(state: AgentState) -> AgentState:
         return {
             "detections": detections,
             "has_disease": has_disease,
-            "vision_summary": summary_text
+            "vision_summary": summary_text,
+            "vision_inference": result.get("inference")
         }
+    except InferenceQueueFull:
+        # Overload is surfaced to the API layer (503) instead of a degraded result
+        raise
     except Exception as e:
         logger.error(f"Vision agent failed: {e}", exc_info=True)
         return {
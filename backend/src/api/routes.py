@@ -1,11 +1,15 @@
 """
 Topraksız Tarım AI Agent - API Routes
 """
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Header
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
+import hmac
 import uuid
 import json
 from datetime import datetime
+from pathlib import Path
+from typing import Optional
 import logging
 import io
 from PIL import Image
@@ -13,10 +17,13 @@ from PIL import Image
 from .schemas import (
     AnalysisRequest, AnalysisResponse, AnalysisStatus,
     ChatRequest, ChatResponse, VisionAnalysis, RAGResult,
-    ActionRecommendation, Detection, SensorData
+    ActionRecommendation, Detection, SensorData, ModelVersionRequest
 )
 from ..config import get_settings, Settings
 from ..agents.graph import run_analysis_pipeline
+from ..services.vision import analyze_capture, analyze_images_with_yolo, available_crops, get_model_registry
+from ..services.change_detection import get_change_detector
+from ..services.inference_executor import InferenceQueueFull
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -27,11 +34,24 @@ async def analyze_image(
     file: UploadFile = File(...),
     query: str = Form(None),
     sensor_data: str = Form(None),
+    tiled: Optional[bool] = Form(None),
+    position_id: str = Form(None),
+    crop: str = Form(None),
     settings: Settings = Depends(get_settings)
 ):
     """
     Analyze an uploaded plant image.
     
+    Set ``crop`` to use that crop's detector (``crop_models``); models are
+    loaded on demand into an LRU pool. By default ``default_crop`` is used.
+    
+    Set ``tiled`` to force tiled inference on/off for high-resolution bench
+    panoramas; by default large images are tiled when tiling is enabled.
+    
+    Tag fixed-camera captures with ``position_id`` to enable change
+    detection: an unchanged frame reuses the previous analysis and a
+    partially changed one only re-runs YOLO on the changed regions.
+    
     This endpoint triggers the full multi-agent analysis pipeline:
     1. Vision Agent: YOLO-based disease detection
     2. RAG Agent: Knowledge retrieval
@@ -46,6 +66,8 @@ async def analyze_image(
     if len(contents) > settings.max_upload_size:
         raise HTTPException(status_code=400, detail="File too large")
     
+    _validate_crop(crop, settings)
+    
     # Generate analysis ID
     analysis_id = str(uuid.uuid4())
     
@@ -59,13 +81,30 @@ async def analyze_image(
             logger.warning(f"Failed to parse sensor data: {e}")
     
     try:
-        # Run the multi-agent pipeline
-        result = await run_analysis_pipeline(
-            image_bytes=contents,
-            query=query,
-            sensor_data=sensor_values,
-            settings=settings
-        )
+        result = None
+        vision_result = None
+        change = None
+        
+        # Change detection against the previous capture of this position
+        if position_id and settings.change_detection_enabled:
+            pipeline_key = json.dumps([query, sensor_values, crop], sort_keys=True, default=str)
+            capture = await analyze_capture(contents, position_id, settings, pipeline_key, crop)
+            change = capture.change
+            result = capture.pipeline_result
+            vision_result = capture.vision_result
+        
+        if result is None:
+            # Run the multi-agent pipeline
+            result = await run_analysis_pipeline(
+                image_bytes=contents,
+                query=query,
+                sensor_data=sensor_values,
+                settings=settings,
+                vision_result=vision_result,
+                vision_options=_vision_options(tiled=tiled, crop=crop)
+            )
+            if change is not None:
+                get_change_detector(settings).store_pipeline_result(position_id, result, pipeline_key)
         
         return AnalysisResponse(
             id=analysis_id,
@@ -74,14 +113,149 @@ async def analyze_image(
             vision=result.get("vision"),
             rag=result.get("rag"),
             recommendations=result.get("recommendations", []),
-            summary=result.get("summary", "Analiz tamamlandı.")
+            summary=result.get("summary", "Analiz tamamlandı."),
+            change_detection=change
         )
         
+    except InferenceQueueFull as e:
+        logger.warning(f"Analysis rejected: {e}")
+        raise HTTPException(status_code=503, detail="Inference queue is full, please retry shortly")
     except Exception as e:
         logger.error(f"Analysis failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
+def _validate_crop(crop: Optional[str], settings: Settings):
+    """Reject crops without a detector (400, lists the available ones)."""
+    if crop and crop not in available_crops(settings):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown crop '{crop}' (available: {', '.join(available_crops(settings))})"
+        )
+
+
+def _vision_options(**options) -> Optional[dict]:
+    """Extra vision kwargs for the pipeline, without unset values."""
+    options = {key: value for key, value in options.items() if value is not None}
+    return options or None
+
+
+def _parse_batch_sensor_data(sensor_data: Optional[str], count: int) -> list[Optional[dict]]:
+    """
+    Parse batch sensor data.
+    
+    Accepts either a JSON list aligned with the uploaded files, or a single
+    JSON object that applies to every image.
+    """
+    if not sensor_data:
+        return [None] * count
+    
+    try:
+        parsed = json.loads(sensor_data)
+    except Exception as e:
+        logger.warning(f"Failed to parse batch sensor data: {e}")
+        return [None] * count
+    
+    if isinstance(parsed, dict):
+        return [parsed] * count
+    if isinstance(parsed, list):
+        values = [v if isinstance(v, dict) else None for v in parsed[:count]]
+        return values + [None] * (count - len(values))
+    
+    logger.warning("Batch sensor data must be a JSON object or list")
+    return [None] * count
+
+
+@router.post("/analyze/batch", tags=["Analysis"])
+async def analyze_images_batch(
+    files: list[UploadFile] = File(...),
+    query: str = Form(None),
+    sensor_data: str = Form(None),
+    crop: str = Form(None),
+    settings: Settings = Depends(get_settings)
+):
+    """
+    Analyze several plant images in one request.
+    
+    YOLO runs once over the whole batch; the RAG and decision agents then
+    run per image. Results are streamed as NDJSON lines in completion
+    order, each tagged with the index of its file in the upload.
+    
+    `sensor_data` is either a JSON list (one object per file) or a single
+    JSON object shared by all files. `crop` selects the detector for the
+    whole batch, as on `/analyze`.
+    """
+    _validate_crop(crop, settings)
+    if len(files) > settings.batch_max_images:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many images (max {settings.batch_max_images})"
+        )
+    
+    contents_list = []
+    for file in files:
+        if not file.content_type or not file.content_type.startswith("image/"):
+            raise HTTPException(status_code=400, detail=f"File must be an image: {file.filename}")
+        contents = await file.read()
+        if len(contents) > settings.max_upload_size:
+            raise HTTPException(status_code=400, detail=f"File too large: {file.filename}")
+        contents_list.append(contents)
+    
+    sensor_values = _parse_batch_sensor_data(sensor_data, len(files))
+    
+    # One batched YOLO pass for every image
+    try:
+        vision_results = await analyze_images_with_yolo(contents_list, settings, crop=crop)
+    except InferenceQueueFull as e:
+        logger.warning(f"Batch analysis rejected: {e}")
+        raise HTTPException(status_code=503, detail="Inference queue is full, please retry shortly")
+    
+    semaphore = asyncio.Semaphore(max(1, settings.batch_pipeline_concurrency))
+    
+    async def run_one(index: int) -> dict:
+        item = {"index": index, "filename": files[index].filename}
+        vision_result = vision_results[index]
+        
+        if vision_result.get("error", "").startswith("Invalid image"):
+            return {**item, "status": AnalysisStatus.FAILED.value, "error": vision_result["error"]}
+        
+        async with semaphore:
+            try:
+                result = await run_analysis_pipeline(
+                    image_bytes=contents_list[index],
+                    query=query,
+                    sensor_data=sensor_values[index],
+                    settings=settings,
+                    vision_result=vision_result
+                )
+            except Exception as e:
+                logger.error(f"Batch analysis failed for image {index}: {str(e)}")
+                return {**item, "status": AnalysisStatus.FAILED.value, "error": str(e)}
+        
+        response = AnalysisResponse(
+            id=str(uuid.uuid4()),
+            status=AnalysisStatus.COMPLETED,
+            created_at=datetime.utcnow(),
+            vision=result.get("vision"),
+            rag=result.get("rag"),
+            recommendations=result.get("recommendations", []),
+            summary=result.get("summary", "Analiz tamamlandı.")
+        )
+        return {**item, "status": AnalysisStatus.COMPLETED.value, "result": response.model_dump(mode="json")}
+    
+    async def stream_results():
+        tasks = [asyncio.create_task(run_one(i)) for i in range(len(contents_list))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
 @router.post("/chat", response_model=ChatResponse, tags=["Chat"])
 async def chat(
     request: ChatRequest,
@@ -118,13 +292,92 @@ async def get_model_status(settings: Settings = Depends(get_settings)):
     """Get the status of loaded AI models."""
     from ..services.vision import check_yolo_model
     from ..services.embeddings import check_ollama_connection
+    from ..services.rag import retrieval_cache_status
     
     return {
         "yolo": await check_yolo_model(settings),
         "ollama": await check_ollama_connection(settings),
+        "retrieval_cache": retrieval_cache_status(settings),
     }
 
 
+def require_admin(
+    x_admin_key: Optional[str] = Header(None),
+    settings: Settings = Depends(get_settings)
+):
+    """Guard for admin endpoints (disabled until ``admin_api_key`` is set)."""
+    if not settings.admin_api_key:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled (set ADMIN_API_KEY)")
+    if not hmac.compare_digest(x_admin_key or "", settings.admin_api_key):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+
+@router.get("/models/versions", tags=["Models"])
+async def list_model_versions(settings: Settings = Depends(get_settings)):
+    """List registered vision model versions and the active one."""
+    return get_model_registry(settings).stats()
+
+
+@router.post("/models/versions", tags=["Models"], dependencies=[Depends(require_admin)])
+async def register_model_version(
+    request: ModelVersionRequest,
+    settings: Settings = Depends(get_settings)
+):
+    """
+    Register detector weights from the model directory as a new version.
+    
+    With ``activate`` the version is loaded in the background and swapped
+    in once ready; the current model keeps serving meanwhile.
+    """
+    model_dir = Path(settings.vision_model_dir).resolve()
+    model_path = (model_dir / request.path).resolve()
+    if model_dir not in model_path.parents:
+        raise HTTPException(status_code=400, detail=f"Model must be inside {settings.vision_model_dir}")
+    if not model_path.is_file():
+        raise HTTPException(status_code=400, detail=f"Model file not found: {request.path}")
+    
+    registry = get_model_registry(settings)
+    try:
+        entry = registry.register(str(model_path), request.version)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if request.activate:
+        registry.activate(entry.version)
+    return entry.to_dict()
+
+
+@router.post("/models/versions/{version}/activate", tags=["Models"], dependencies=[Depends(require_admin)])
+async def activate_model_version(
+    version: str,
+    wait: bool = False,
+    settings: Settings = Depends(get_settings)
+):
+    """
+    Switch the vision model to ``version``.
+    
+    Loading happens in the background (``wait=true`` blocks until the
+    load finished); failed loads are retried with backoff.
+    """
+    try:
+        entry = await asyncio.to_thread(get_model_registry(settings).activate, version, wait)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    return entry.to_dict()
+
+
+@router.post("/models/rollback", tags=["Models"], dependencies=[Depends(require_admin)])
+async def rollback_model_version(
+    wait: bool = False,
+    settings: Settings = Depends(get_settings)
+):
+    """Re-activate the vision model version that was active before the current one."""
+    try:
+        entry = await asyncio.to_thread(get_model_registry(settings).rollback, wait)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return entry.to_dict()
+
+
 @router.post("/knowledge/search", tags=["Knowledge"])
 async def search_knowledge(
     query: str,
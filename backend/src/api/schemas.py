@@ -14,6 +14,13 @@ class HealthResponse(BaseModel):
     services: dict[str, str]
 
 
+class ReadinessResponse(BaseModel):
+    """Readiness check response."""
+    status: str
+    ready: bool
+    warmup: dict[str, Any] = Field(default_factory=dict)
+
+
 class AnalysisStatus(str, Enum):
     """Analysis status enum."""
     PENDING = "pending"
@@ -22,11 +29,19 @@ class AnalysisStatus(str, Enum):
     FAILED = "failed"
 
 
+class DetectionRegion(BaseModel):
+    """Localized lesion region of a color-analysis detection."""
+    bbox: list[float] = Field(..., description="Bounding box [x1, y1, x2, y2]")
+    area_ratio: float = Field(..., ge=0, le=1, description="Region area as a share of the image")
+    confidence: float = Field(..., ge=0, le=1, description="Region confidence")
+
+
 class Detection(BaseModel):
     """YOLO detection result."""
     class_name: str = Field(..., description="Detected class name")
     confidence: float = Field(..., ge=0, le=1, description="Detection confidence")
     bbox: list[float] = Field(..., description="Bounding box [x1, y1, x2, y2]")
+    regions: Optional[list[DetectionRegion]] = Field(None, description="Lesion regions (color analysis)")
 
 
 class VisionAnalysis(BaseModel):
@@ -34,6 +49,7 @@ class VisionAnalysis(BaseModel):
     detections: list[Detection] = Field(default_factory=list)
     summary: str = Field(..., description="Summary of detected issues")
     has_disease: bool = Field(..., description="Whether disease was detected")
+    inference: Optional[dict[str, Any]] = Field(None, description="YOLO input size used and why")
 
 
 class RAGResult(BaseModel):
@@ -83,6 +99,9 @@ class AnalysisResponse(BaseModel):
     
     # Overall summary
     summary: str = Field(..., description="Overall analysis summary")
+    
+    # Change detection (captures tagged with a camera position)
+    change_detection: Optional[dict[str, Any]] = Field(None, description="Change vs. previous capture of the position")
 
 
 class ChatMessage(BaseModel):
@@ -102,3 +121,10 @@ class ChatResponse(BaseModel):
     """Chat response."""
     message: str = Field(..., description="Assistant response")
     sources: list[dict[str, Any]] = Field(default_factory=list)
+
+
+class ModelVersionRequest(BaseModel):
+    """Register detector weights as a new model version."""
+    path: str = Field(..., description="Weights file, relative to the model directory")
+    version: Optional[str] = Field(None, description="Version name (default: <file stem>@<mtime>)")
+    activate: bool = Field(False, description="Load and switch to the version in the background")
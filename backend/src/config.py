@@ -3,6 +3,15 @@ Topraksız Tarım AI Agent - Configuration
 """
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from pathlib import Path
+
+# backend/ — relative data paths resolve here, wherever the process starts
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def backend_path(path: str) -> str:
+    """``path`` made absolute against ``BACKEND_DIR`` (absolute paths unchanged)."""
+    return str(BACKEND_DIR / Path(path).expanduser())
 
 
 class Settings(BaseSettings):
@@ -21,16 +30,131 @@ class Settings(BaseSettings):
     # Qdrant Settings
     qdrant_host: str = "localhost"
     qdrant_port: int = 6333
+    qdrant_grpc_port: int = 6334
+    qdrant_prefer_grpc: bool = False  # gRPC transport for search/upsert (binary vectors instead of JSON)
     qdrant_collection: str = "agricultural_knowledge"
+    qdrant_timeout_seconds: float = 10.0  # Per call (search, upsert, version check)
+    qdrant_max_connections: int = 16  # HTTP connection pool of the shared client
+    
+    # Embedding Client Settings (Ollama multi-input /api/embed)
+    embed_batch_size: int = 64  # Max texts per request (halved on errors/slow batches, regrown when fast)
+    embed_max_concurrency: int = 4  # Batches in flight at once, process-wide
+    embed_max_retries: int = 3
+    embed_retry_backoff_seconds: float = 0.5  # Doubles per retry
+    embed_target_batch_seconds: float = 5.0
+    embed_timeout_seconds: float = 60.0
+    
+    # Embedding Cache Settings (content-addressed: embed model + normalized text)
+    embedding_cache_enabled: bool = True
+    embedding_cache_max_entries: int = 4096  # Memory tier (LRU)
+    embedding_cache_path: str = "./data/embedding_cache.sqlite3"  # Disk tier, relative to backend/ ("" = memory only)
+    
+    # Retrieval Cache Settings (search results keyed by query + knowledge-base version)
+    retrieval_cache_enabled: bool = True
+    retrieval_cache_max_entries: int = 1024
+    retrieval_cache_ttl_seconds: int = 3600
+    retrieval_version_check_seconds: float = 5.0  # Other nodes see an ingest at most this late
     
     # YOLO Settings
     yolo_model_path: str = "./models/tomato_disease_yolov8.pt"
     yolo_confidence_threshold: float = 0.5
+    yolo_iou_threshold: float = 0.7  # NMS IoU (ultralytics default)
+    
+    # Inference Backend Settings
+    vision_backend: str = "ultralytics"  # "ultralytics" (PyTorch) or "onnx" (ONNX Runtime CPU)
+    onnx_model_path: str = "./models/tomato_disease_yolov8.onnx"
+    onnx_intra_op_threads: int = 0  # 0 = ONNX Runtime default
+    vision_precision: str = "fp32"  # "fp32" or "int8" (build with `python -m src.scripts.quantize_int8`)
+    int8_model_path: str = "./models/tomato_disease_yolov8.int8.onnx"
+
+    # Model Registry Settings (hot swap via /models/versions)
+    vision_model_dir: str = "./models"  # Weights registered through the API must live here
+    vision_model_retry_seconds: float = 5.0  # First retry delay after a failed load (doubles per failure)
+    vision_model_retry_max_seconds: float = 300.0
+    vision_model_max_attempts: int = 5  # Background retries of a failed activation
+    vision_model_swap_warmup: bool = True  # Dummy inference before a new version is swapped in
+    vision_idle_unload_seconds: float = 0.0  # Release models unused this long (0 = keep resident)
+    vision_idle_reload_warmup: bool = False  # Dummy inference when an idle-unloaded model reloads
+    admin_api_key: str = ""  # Required in the X-Admin-Key header; admin endpoints are disabled while unset
+
+    # Per-crop Detectors (/analyze?crop=...; other crops use the registry model)
+    default_crop: str = "tomato"  # Crop served by the active registry model
+    crop_models: dict[str, str] = {}  # JSON, e.g. CROP_MODELS={"pepper": "./models/pepper_yolov8.pt"}
+    crop_pool_max_models: int = 2  # Crop models resident at once (least recently used evicted)
+    crop_pool_memory_budget_mb: float = 0.0  # Also evict above this estimated total (0 = count limit only)
+    
+    # Decode Settings
+    vision_decode_max_side: int = 1280  # Decode uploads to about this long side (0 = full resolution)
+    
+    # Tiled Inference Settings (high-resolution bench panoramas)
+    vision_tiling_enabled: bool = False  # Auto-tile images whose long side >= vision_tiling_min_side
+    vision_tiling_min_side: int = 2000
+    vision_tiling_decode_max_side: int = 4096  # Decode limit in tiled mode (0 = full resolution)
+    vision_tile_size: int = 640
+    vision_tile_overlap: float = 0.2
+    vision_max_tiles: int = 16
+    vision_tile_min_vegetation: float = 0.05  # Skip tiles with less plant-colored area
+    vision_tile_nms_iou: float = 0.5  # Cross-tile duplicate merge threshold
+
+    # Adaptive Inference Resolution (YOLO imgsz from image content and load)
+    adaptive_imgsz_enabled: bool = False
+    adaptive_imgsz_min: int = 320
+    adaptive_imgsz_max: int = 960
+    adaptive_closeup_coverage: float = 0.6  # Green share at/above which a photo is a close-up (smaller imgsz)
+    adaptive_wide_coverage: float = 0.2  # Green share below which a photo is a wide shot (larger imgsz)
+    adaptive_elongated_aspect: float = 2.0  # Long/short side ratio that gets a larger imgsz
+    adaptive_overload_queue_depth: int = 8  # Queued tasks that force adaptive_imgsz_min (half: one step down)
+
+    # Inference Cascade (cheap color screen first; clearly healthy images skip YOLO)
+    cascade_enabled: bool = False
+    cascade_healthy_min_green: float = 0.3  # Foliage share required for a healthy verdict
+    cascade_healthy_margin: float = 0.5  # Symptom colors must stay this share below their color-rule thresholds
+
+    # Change Detection Settings (fixed cameras, captures tagged with position_id)
+    change_detection_enabled: bool = True
+    change_max_positions: int = 256
+    change_thumbnail_side: int = 256
+    change_block_size: int = 16  # Thumbnail pixels per comparison cell
+    change_block_threshold: float = 12.0  # Mean abs RGB difference that marks a cell changed
+    change_full_rerun_ratio: float = 0.5  # Above this share of changed cells, re-run everything
+    change_reference_ttl_seconds: int = 7200
+    
+    # Color Analysis Settings
+    color_analysis_downsample: int = 4  # Analyze every N-th pixel per axis (1 = full resolution)
+    color_lut_enabled: bool = True  # RGB → class lookup table instead of per-pixel HSV math
+    color_lut_bits: int = 8  # Bits per channel (8 = exact 256³ table, 16 MiB; 5 = 32³)
+    color_region_max: int = 8  # Lesion regions per color detection (0 = whole-image bbox)
+    color_region_min_area: float = 0.0005  # Smallest region kept, as a share of the image
+    
+    # Inference Executor Settings (CPU-bound vision work runs off the event loop)
+    inference_workers: int = 2
+    inference_queue_limit: int = 32  # Waiting tasks beyond the running ones; extra work is rejected
+    vision_process_workers: int = 0  # >0: YOLO runs in this many model-holding processes
+    vision_worker_threads: int = 0  # Torch threads per worker process (0 = library default)
+    vision_worker_timeout_seconds: float = 120.0
+    micro_batch_enabled: bool = True  # Coalesce concurrent requests into one YOLO forward pass
+    micro_batch_max_size: int = 8
+    micro_batch_max_wait_ms: float = 10.0
+    
+    # Vision Cache Settings (perceptual-hash keyed)
+    vision_cache_enabled: bool = True
+    vision_cache_max_entries: int = 512
+    vision_cache_ttl_seconds: int = 3600
+    vision_cache_max_distance: int = 4  # Max Hamming distance (of 64 bits) for near-duplicates
+    
+    # Warm-up Settings (preload models at startup; /ready reports not-ready until done)
+    warmup_enabled: bool = False
+    warmup_image_path: str = "../data/sample-images/test-image.jpg"
+    warmup_timeout_seconds: float = 120.0
     
     # Upload Settings
     max_upload_size: int = 10 * 1024 * 1024  # 10MB
     allowed_extensions: list[str] = ["jpg", "jpeg", "png", "webp"]
     
+    # Batch Analysis Settings
+    batch_max_images: int = 16
+    batch_pipeline_concurrency: int = 4  # Parallel RAG/LLM pipelines per batch
+    
     class Config:
         env_file = "../.env"
         env_file_encoding = "utf-8"
@@ -5,11 +5,16 @@ from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
 from .config import get_settings
 from .api.routes import router as api_router
-from .api.schemas import HealthResponse
+from .api.schemas import HealthResponse, ReadinessResponse
+from .services.inference_executor import shutdown_inference_executor
+from .services.rag import close_qdrant_client
+from .services.vision import close_vision_backend, run_idle_unloader
+from .services.warmup import get_warmup_status, mark_ready, run_warmup
 
 # Configure logging
 logging.basicConfig(
@@ -29,11 +34,31 @@ async def lifespan(app: FastAPI):
     logger.info(f"  Ollama: {settings.ollama_host}")
     logger.info(f"  Qdrant: {settings.qdrant_host}:{settings.qdrant_port}")
     logger.info(f"  YOLO Model: {settings.yolo_model_path}")
+    logger.info(f"  Inference workers: {settings.inference_workers} (queue limit {settings.inference_queue_limit})")
+    
+    # Warm-up runs in the background; /ready reports 503 until it finishes
+    warmup_task = None
+    if settings.warmup_enabled:
+        warmup_task = asyncio.create_task(run_warmup(settings))
+    else:
+        mark_ready()
+    
+    # Edge nodes: release models nobody used for a while
+    idle_task = None
+    if settings.vision_idle_unload_seconds > 0:
+        idle_task = asyncio.create_task(run_idle_unloader(settings))
     
     yield
     
     # Shutdown
     logger.info("🌾 Topraksız Tarım AI Agent shutting down...")
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    if idle_task is not None:
+        idle_task.cancel()
+    shutdown_inference_executor()
+    close_vision_backend()
+    await close_qdrant_client()
 
 
 # Create FastAPI app
@@ -80,6 +105,24 @@ async def health_check():
     )
 
 
+@app.get("/ready", response_model=ReadinessResponse, tags=["Health"])
+async def readiness_check():
+    """
+    Readiness endpoint for load balancers.
+    
+    Returns 503 until startup warm-up (model preload) has finished.
+    """
+    status = get_warmup_status()
+    response = ReadinessResponse(
+        status="ready" if status.ready else "warming_up",
+        ready=status.ready,
+        warmup=status.to_dict()
+    )
+    if not status.ready:
+        return JSONResponse(status_code=503, content=response.model_dump())
+    return response
+
+
 @app.get("/", tags=["Root"])
 async def root():
     """Root endpoint with API information."""
@@ -88,4 +131,5 @@ async def root():
         "version": "1.0.0",
         "docs": "/docs",
         "health": "/health",
+        "ready": "/ready",
     }
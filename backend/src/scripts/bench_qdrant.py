@@ -0,0 +1,236 @@
+"""
+Topraksız Tarım AI Agent - Qdrant Transport Benchmark
+
+Compares Qdrant's REST (6333) and gRPC (6334) transports for our payload
+sizes against a running Qdrant, to decide on ``QDRANT_PREFER_GRPC``:
+
+- ``ingest``: upsert of chunk-like points (768-float vector + ~1000-char
+  payload, as written by ``add_document``) in batches → points/s
+- ``search``: ``query_points`` top-k searches, sequential and concurrent
+  → p50/p95 latency and queries/s
+
+Each transport gets its own temporary collection, which is deleted
+afterwards. Vectors are random (seeded), so runs are reproducible without
+Ollama.
+
+Usage:
+    cd backend
+    docker-compose up -d qdrant
+    python -m src.scripts.bench_qdrant
+    python -m src.scripts.bench_qdrant --points 20000 --batch-size 256 --concurrency 16 --output benchmarks/qdrant.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Ensure backend/ is on sys.path when running as script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from src.config import get_settings
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("bench_qdrant")
+
+TRANSPORTS = ("rest", "grpc")
+VECTOR_SIZE = 768  # nomic-embed-text
+CHUNK_TEXT = (
+    "Erken yanıklık domates bitkilerinde yaygın bir fungal hastalıktır. "
+    "Alt yapraklarda halka şeklinde kahverengi lekeler görülür. "
+) * 8  # ~1000 characters, the default chunk_size
+
+
+def latency_summary(samples_ms: list[float], wall_seconds: float) -> dict:
+    samples = np.array(samples_ms)
+    return {
+        "calls": len(samples_ms),
+        "p50_ms": round(float(np.percentile(samples, 50)), 2),
+        "p95_ms": round(float(np.percentile(samples, 95)), 2),
+        "mean_ms": round(float(samples.mean()), 2),
+        "per_second": round(len(samples_ms) / wall_seconds, 1) if wall_seconds > 0 else None,
+    }
+
+
+def make_points(rng: np.random.Generator, count: int) -> list[PointStruct]:
+    vectors = rng.standard_normal((count, VECTOR_SIZE), dtype=np.float32)
+    return [
+        PointStruct(
+            id=str(uuid.uuid4()),
+            vector=vector.tolist(),
+            payload={
+                "title": "Benchmark Belgesi",
+                "content": CHUNK_TEXT,
+                "source": "bench_qdrant",
+                "doc_id": "bench",
+                "chunk_index": i,
+                "total_chunks": count,
+                "metadata": {},
+            }
+        )
+        for i, vector in enumerate(vectors)
+    ]
+
+
+async def bench_ingest(client: AsyncQdrantClient, collection: str, points: list[PointStruct], batch_size: int) -> dict:
+    batch_ms = []
+    start = time.perf_counter()
+    for offset in range(0, len(points), batch_size):
+        batch_start = time.perf_counter()
+        await client.upsert(collection_name=collection, points=points[offset:offset + batch_size], wait=True)
+        batch_ms.append((time.perf_counter() - batch_start) * 1000)
+    wall = time.perf_counter() - start
+    return {
+        **latency_summary(batch_ms, wall),
+        "batch_size": batch_size,
+        "points_per_second": round(len(points) / wall, 1),
+    }
+
+
+async def bench_search(
+    client: AsyncQdrantClient,
+    collection: str,
+    queries: np.ndarray,
+    top_k: int,
+    concurrency: int
+) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+
+    async def one(query: np.ndarray):
+        async with semaphore:
+            start = time.perf_counter()
+            await client.query_points(collection_name=collection, query=query.tolist(), limit=top_k)
+            samples.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(query) for query in queries))
+    return {**latency_summary(samples, time.perf_counter() - start), "concurrency": concurrency, "top_k": top_k}
+
+
+async def bench_transport(transport: str, settings, args) -> dict:
+    client = AsyncQdrantClient(
+        host=settings.qdrant_host,
+        port=settings.qdrant_port,
+        grpc_port=settings.qdrant_grpc_port,
+        prefer_grpc=transport == "grpc",
+        timeout=60
+    )
+    collection = f"{settings.qdrant_collection}_bench_{transport}"
+    rng = np.random.default_rng(args.seed)
+    points = make_points(rng, args.points)
+    queries = rng.standard_normal((args.queries, VECTOR_SIZE), dtype=np.float32)
+
+    try:
+        await client.recreate_collection(
+            collection_name=collection,
+            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE)
+        )
+        logger.info(f"[{transport}] ingesting {args.points} points...")
+        ingest = await bench_ingest(client, collection, points, args.batch_size)
+
+        # Untimed warm-up so connection setup is not measured
+        await bench_search(client, collection, queries[:10], args.top_k, 1)
+        logger.info(f"[{transport}] searching {args.queries} queries...")
+        sequential = await bench_search(client, collection, queries, args.top_k, 1)
+        concurrent = await bench_search(client, collection, queries, args.top_k, args.concurrency)
+    finally:
+        try:
+            await client.delete_collection(collection_name=collection)
+        finally:
+            await client.close()
+
+    return {"ingest": ingest, "search_sequential": sequential, "search_concurrent": concurrent}
+
+
+def print_results(results: dict):
+    logger.info("=" * 60)
+    rows = (
+        ("ingest", "points_per_second", "points/s"),
+        ("ingest", "p50_ms", "ms/batch p50"),
+        ("search_sequential", "p50_ms", "ms p50"),
+        ("search_sequential", "p95_ms", "ms p95"),
+        ("search_concurrent", "per_second", "queries/s"),
+        ("search_concurrent", "p95_ms", "ms p95"),
+    )
+    logger.info(f"  {'':<32} {'rest':>10} {'grpc':>10}")
+    for case, metric, unit in rows:
+        values = [results.get(t, {}).get(case, {}).get(metric) for t in TRANSPORTS]
+        cells = [f"{v:>10}" if v is not None else f"{'-':>10}" for v in values]
+        logger.info(f"  {case + ' ' + unit:<32} {' '.join(cells)}")
+    logger.info("=" * 60)
+
+
+def main():
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(
+        description="🌾 AgroCortex Qdrant REST vs gRPC benchmark"
+    )
+    parser.add_argument(
+        "--transports",
+        default=",".join(TRANSPORTS),
+        help=f"Comma-separated transports to run (default: {','.join(TRANSPORTS)})"
+    )
+    parser.add_argument("--points", type=int, default=5000, help="Points to ingest (default: 5000)")
+    parser.add_argument("--batch-size", type=int, default=128, help="Points per upsert (default: 128)")
+    parser.add_argument("--queries", type=int, default=500, help="Searches per run (default: 500)")
+    parser.add_argument("--top-k", type=int, default=5, help="Results per search (default: 5)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Searches in flight in the concurrent run (default: 8)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the results as JSON")
+
+    args = parser.parse_args()
+
+    transports = [t.strip() for t in args.transports.split(",") if t.strip()]
+    unknown = set(transports) - set(TRANSPORTS)
+    if unknown:
+        parser.error(f"Unknown transport(s): {', '.join(sorted(unknown))}")
+
+    logger.info(
+        f"Qdrant {settings.qdrant_host} (REST {settings.qdrant_port}, gRPC {settings.qdrant_grpc_port}): "
+        f"{args.points} points × {VECTOR_SIZE} floats, {len(CHUNK_TEXT)}-char payloads"
+    )
+    results = {}
+    for transport in transports:
+        try:
+            results[transport] = asyncio.run(bench_transport(transport, settings, args))
+        except Exception as e:
+            logger.error(f"[{transport}] benchmark failed: {e}")
+    if not results:
+        sys.exit(1)
+
+    print_results(results)
+
+    if args.output:
+        report = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "qdrant_host": settings.qdrant_host,
+                "points": args.points,
+                "batch_size": args.batch_size,
+                "queries": args.queries,
+                "vector_size": VECTOR_SIZE,
+                "payload_chars": len(CHUNK_TEXT),
+            },
+            "results": results,
+        }
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+        logger.info(f"✅ Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+"""
+Topraksız Tarım AI Agent - Vision Microbenchmarks
+
+Times the vision hot path stage by stage over a matrix of image sizes and
+formats, and reports p50/p95 latency, throughput and peak RSS per case:
+
+- ``decode``:   ``decode_image`` at the serving ``vision_decode_max_side``
+- ``is_plant``: fused color pass + plant validation (serving downsample/LUT)
+- ``colors``:   ``analyze_colors_for_disease`` on precomputed color stats
+- ``yolo``:     one ``predict`` call on the configured vision backend
+- ``vision_node``: the full agent node (decode → YOLO → colors → summary)
+
+Stages that only see decoded pixels run once per size; ``decode`` and
+``vision_node`` run per size and format. Images are synthetic leaves with
+lesions, so runs are reproducible without a dataset. When no weights are
+found, YOLO runs on a randomly initialised ``yolov8n.yaml`` stand-in with
+the same architecture (latency is representative, detections are not).
+
+Results are written as JSON; pass a previous result as ``--baseline`` to
+flag cases whose p50/p95 got slower than ``--threshold``.
+
+Usage:
+    cd backend
+    python -m src.scripts.bench_vision --output benchmarks/baseline.json
+    python -m src.scripts.bench_vision --baseline benchmarks/baseline.json
+    python -m src.scripts.bench_vision --sizes 640x480,4032x3024 --formats jpeg --benchmarks decode,yolo
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+# Ensure backend/ is on sys.path when running as script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from PIL import Image
+import cv2
+import numpy as np
+
+from src.config import get_settings
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("bench_vision")
+
+BENCHMARKS = ("decode", "is_plant", "colors", "yolo", "vision_node")
+DEFAULT_SIZES = "640x480,1280x960,1920x1080,4032x3024"
+DEFAULT_FORMATS = "jpeg,png,webp"
+# Latency metrics compared against a baseline
+COMPARED_METRICS = ("p50_ms", "p95_ms")
+
+
+def parse_size(value: str) -> tuple[int, int]:
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def synthetic_leaf(width: int, height: int, seed: int = 0) -> Image.Image:
+    """
+    Deterministic greenhouse-like photo: textured green foliage on a soil
+    background, with brown and yellow lesions scattered over the leaves.
+    """
+    rng = np.random.default_rng(seed)
+    canvas = np.empty((height, width, 3), dtype=np.uint8)
+    canvas[:] = (92, 70, 48)  # Soil / substrate
+
+    scale = max(width, height) / 1000
+    for _ in range(12):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        axes = (int(rng.integers(120, 260) * scale), int(rng.integers(60, 140) * scale))
+        green = (int(rng.integers(40, 80)), int(rng.integers(120, 170)), int(rng.integers(30, 60)))
+        cv2.ellipse(canvas, center, axes, float(rng.integers(0, 180)), 0, 360, green, -1)
+    for _ in range(40):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        color = (120, 80, 30) if rng.random() < 0.7 else (200, 190, 60)
+        cv2.circle(canvas, center, max(2, int(rng.integers(4, 14) * scale)), color, -1)
+
+    # Sensor-like noise at low resolution keeps encoders from over-compressing
+    noise = rng.integers(-12, 13, (max(1, height // 4), max(1, width // 4), 3), dtype=np.int16)
+    noise = cv2.resize(noise.astype(np.float32), (width, height), interpolation=cv2.INTER_NEAREST)
+    return Image.fromarray(np.clip(canvas + noise, 0, 255).astype(np.uint8))
+
+
+def encode(image: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    options = {"jpeg": {"quality": 90}, "webp": {"quality": 90}}.get(fmt, {})
+    image.save(buffer, format=fmt.upper(), **options)
+    return buffer.getvalue()
+
+
+def _rss_mb() -> float:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        import resource
+        # ru_maxrss is already a peak (kilobytes on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class PeakRSS:
+    """Samples process RSS in a background thread while the block runs."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, _rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_mb = _rss_mb()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, _rss_mb())
+
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int) -> dict:
+    """Latency percentiles, throughput and peak RSS of ``fn`` over ``iterations`` calls."""
+    for _ in range(warmup):
+        fn()
+
+    latencies = []
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            call_start = time.perf_counter()
+            fn()
+            latencies.append((time.perf_counter() - call_start) * 1000)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "mean_ms": round(float(np.mean(latencies)), 3),
+        "throughput_per_s": round(iterations / elapsed, 2),
+        "peak_rss_mb": round(rss.peak_mb, 1),
+    }
+
+
+def prepare_vision_backend(settings) -> dict:
+    """
+    Load the configured backend, or a random-init ``yolov8n.yaml`` stand-in
+    when its weights are missing (the service would try to download them).
+    """
+    from src.services import vision
+    from src.services.vision_backends import UltralyticsBackend
+
+    model_path = vision.active_model_path(settings)
+    if Path(model_path).exists():
+        backend = vision.get_vision_backend(settings)
+        return {**backend.describe(), "stand_in": False}
+
+    from ultralytics import YOLO
+
+    logger.warning(f"{model_path} not found: benchmarking a random-init yolov8n.yaml stand-in")
+    backend = UltralyticsBackend(YOLO("yolov8n.yaml"), "yolov8n.yaml")
+    # Served by get_vision_backend from now on
+    vision.get_model_registry(settings).register_backend("stand-in", backend)
+    return {**backend.describe(), "stand_in": True}
+
+
+def run_benchmarks(
+    settings,
+    sizes: list[tuple[int, int]],
+    formats: list[str],
+    benchmarks: list[str],
+    iterations: int,
+    warmup: int
+) -> dict:
+    """Run the selected stages over the size/format matrix; keyed ``stage/WxH/format``."""
+    from src.agents.vision_agent import vision_node
+    from src.services.vision import (
+        analyze_colors_for_disease, compute_color_stats, decode_image,
+        get_color_lut, get_vision_backend, is_plant
+    )
+
+    lut = get_color_lut(settings)
+    results = {}
+    loop = asyncio.new_event_loop()
+
+    def record(case: str, fn: Callable[[], object]):
+        logger.info(f"▶ {case}")
+        results[case] = measure(fn, iterations, warmup)
+        logger.info(
+            f"  p50 {results[case]['p50_ms']:.2f} ms, p95 {results[case]['p95_ms']:.2f} ms, "
+            f"{results[case]['throughput_per_s']:.1f}/s, peak RSS {results[case]['peak_rss_mb']:.0f} MB"
+        )
+
+    try:
+        for width, height in sizes:
+            size = f"{width}x{height}"
+            source = synthetic_leaf(width, height)
+            encoded = {fmt: encode(source, fmt) for fmt in formats}
+            image = decode_image(encoded[formats[0]], settings.vision_decode_max_side).image
+            stats = compute_color_stats(image, settings.color_analysis_downsample, lut)
+
+            for fmt in formats:
+                data = encoded[fmt]
+                if "decode" in benchmarks:
+                    record(
+                        f"decode/{size}/{fmt}",
+                        # Draft-mode decodes are lazy: force the pixels
+                        lambda: decode_image(data, settings.vision_decode_max_side).image.load()
+                    )
+
+            if "is_plant" in benchmarks:
+                record(
+                    f"is_plant/{size}/-",
+                    lambda: is_plant(image, compute_color_stats(image, settings.color_analysis_downsample, lut))
+                )
+            if "colors" in benchmarks:
+                record(
+                    f"colors/{size}/-",
+                    lambda: analyze_colors_for_disease(
+                        image, stats, settings.color_region_max, settings.color_region_min_area
+                    )
+                )
+            if "yolo" in benchmarks:
+                backend = get_vision_backend(settings)
+                record(
+                    f"yolo/{size}/-",
+                    lambda: backend.predict([image], conf=settings.yolo_confidence_threshold)
+                )
+
+            for fmt in formats:
+                data = encoded[fmt]
+                if "vision_node" in benchmarks:
+                    record(
+                        f"vision_node/{size}/{fmt}",
+                        lambda: loop.run_until_complete(vision_node({"image_bytes": data, "_settings": settings}))
+                    )
+    finally:
+        loop.close()
+
+    return results
+
+
+def compare_results(current: dict, baseline: dict, threshold: float, min_delta_ms: float) -> dict:
+    """
+    Compare two result files case by case.
+
+    A metric regresses when it is more than ``threshold`` (relative) and
+    ``min_delta_ms`` (absolute, to ignore timer noise on tiny cases)
+    slower than the baseline; improvements are reported symmetrically.
+    """
+    regressions, improvements = [], []
+    for case, metrics in current["results"].items():
+        reference = baseline["results"].get(case)
+        if reference is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = reference.get(metric), metrics.get(metric)
+            if not old or new is None or abs(new - old) < min_delta_ms:
+                continue
+            change = (new - old) / old
+            entry = {"case": case, "metric": metric, "baseline": old, "current": new, "change": round(change, 4)}
+            if change > threshold:
+                regressions.append(entry)
+            elif change < -threshold:
+                improvements.append(entry)
+
+    return {
+        "threshold": threshold,
+        "min_delta_ms": min_delta_ms,
+        "compared_cases": len(set(current["results"]) & set(baseline["results"])),
+        "missing_in_baseline": sorted(set(current["results"]) - set(baseline["results"])),
+        "regressions": regressions,
+        "improvements": improvements,
+    }
+
+
+def print_comparison(comparison: dict):
+    logger.info("=" * 60)
+    logger.info(
+        f"  Compared {comparison['compared_cases']} case(s) "
+        f"(threshold {comparison['threshold']:.0%}, min delta {comparison['min_delta_ms']} ms)"
+    )
+    for label, entries in (("REGRESSION", comparison["regressions"]), ("improved", comparison["improvements"])):
+        for entry in entries:
+            logger.info(
+                f"  {label:<10} {entry['case']:<32} {entry['metric']}: "
+                f"{entry['baseline']:.2f} → {entry['current']:.2f} ms ({entry['change']:+.1%})"
+            )
+    if comparison["missing_in_baseline"]:
+        logger.info(f"  Not in baseline: {', '.join(comparison['missing_in_baseline'])}")
+    logger.info("=" * 60)
+
+
+def main():
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(
+        description="🌾 AgroCortex vision microbenchmarks"
+    )
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help=f"Comma-separated WxH image sizes (default: {DEFAULT_SIZES})"
+    )
+    parser.add_argument(
+        "--formats",
+        default=DEFAULT_FORMATS,
+        help=f"Comma-separated encodings (default: {DEFAULT_FORMATS})"
+    )
+    parser.add_argument(
+        "--benchmarks",
+        default=",".join(BENCHMARKS),
+        help=f"Comma-separated stages to run (default: all of {', '.join(BENCHMARKS)})"
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=20,
+        help="Timed calls per case (default: 20)"
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=2,
+        help="Untimed calls per case before measuring (default: 2)"
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Result JSON path (default: benchmarks/vision-<timestamp>.json)"
+    )
+    parser.add_argument(
+        "--baseline",
+        default=None,
+        help="Previous result JSON to compare against"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="Relative slowdown flagged as a regression (default: 0.15)"
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=0.5,
+        help="Ignore latency changes smaller than this (default: 0.5)"
+    )
+
+    args = parser.parse_args()
+
+    benchmarks = [name.strip() for name in args.benchmarks.split(",") if name.strip()]
+    unknown = set(benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmark(s): {', '.join(sorted(unknown))}")
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    formats = [fmt.strip().lower() for fmt in args.formats.split(",") if fmt.strip()]
+
+    # Measure the work itself: repeated images would otherwise hit the cache
+    settings.vision_cache_enabled = False
+    for name in ("src", "ultralytics"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    model = prepare_vision_backend(settings) if {"yolo", "vision_node"} & set(benchmarks) else None
+    results = run_benchmarks(settings, sizes, formats, benchmarks, args.iterations, args.warmup)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "model": model,
+            "settings": {
+                "vision_decode_max_side": settings.vision_decode_max_side,
+                "color_analysis_downsample": settings.color_analysis_downsample,
+                "color_lut_enabled": settings.color_lut_enabled,
+                "micro_batch_enabled": settings.micro_batch_enabled,
+                "micro_batch_max_wait_ms": settings.micro_batch_max_wait_ms,
+                "vision_process_workers": settings.vision_process_workers,
+            },
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+        },
+        "results": results,
+    }
+
+    output = Path(args.output or f"benchmarks/vision-{datetime.now():%Y%m%d-%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    logger.info(f"✅ Results written to {output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        comparison = compare_results(report, baseline, args.threshold, args.min_delta_ms)
+        print_comparison(comparison)
+        if comparison["regressions"]:
+            logger.error(f"❌ {len(comparison['regressions'])} regression(s) against {args.baseline}")
+            sys.exit(1)
+        logger.info(f"✅ No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Topraksız Tarım AI Agent - Inference Cascade Report
+
+Measures how often the cheap-first cascade agrees with full inference on a
+labeled image folder, so its thresholds can be tuned before enabling
+``CASCADE_ENABLED`` in production.
+
+Every image is analyzed twice: with the color screen only (the cascade's
+decision) and with the full pipeline (YOLO + color supplement, cascade off).
+Images the screen calls healthy skip YOLO in production, so each of them is
+checked against the full result and, when present, against the folder label.
+Non-plant rejections are reported separately: they never reach YOLO, with
+or without the cascade, so they are not skips and save nothing.
+
+Folder layout (one sub-folder per label; images directly in the root are
+unlabeled):
+    images/
+        healthy/   *.jpg
+        diseased/  *.jpg   (any other name counts as diseased)
+        non_plant/ *.jpg
+
+Usage:
+    cd backend
+    python -m src.scripts.cascade_report --images ../data/labeled
+    python -m src.scripts.cascade_report --images ../data/labeled --min-green 0.4 --margin 0.6 --output report.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+# Ensure backend/ is on sys.path when running as script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from src.config import get_settings
+from src.services.cascade import SCREEN_HEALTHY, SCREEN_NON_PLANT, CascadeScreen
+from src.services.vision import (
+    COLOR_DISEASE_RULES,
+    analyze_image_with_yolo,
+    compute_color_stats,
+    decode_image,
+    get_color_lut,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("cascade_report")
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+# Outcomes (folder labels and full-inference results)
+HEALTHY = "healthy"
+DISEASED = "diseased"
+NON_PLANT = "non_plant"
+
+
+def label_for(path: Path, root: Path) -> Optional[str]:
+    """Folder label of an image (None for images directly in ``root``)."""
+    if path.parent == root:
+        return None
+    name = path.relative_to(root).parts[0].lower().replace("-", "_")
+    return name if name in (HEALTHY, NON_PLANT) else DISEASED
+
+
+def full_outcome(result: dict) -> str:
+    if result.get("error") == "Non-plant object detected":
+        return NON_PLANT
+    return DISEASED if result.get("detections") else HEALTHY
+
+
+def screen_image(image_bytes: bytes, screen: CascadeScreen, settings) -> tuple[str, float, float]:
+    """Cascade verdict, margin and screen time (decode + color pass) in ms."""
+    start = time.perf_counter()
+    image = decode_image(image_bytes, settings.vision_decode_max_side).image
+    stats = compute_color_stats(image, settings.color_analysis_downsample, get_color_lut(settings))
+    if not stats.is_plant:
+        verdict, margin = SCREEN_NON_PLANT, 1.0
+    else:
+        decision = screen.screen(stats.ratios)
+        verdict, margin = decision.verdict, decision.margin
+    return verdict, margin, (time.perf_counter() - start) * 1000
+
+
+async def evaluate(images: list[Path], root: Path, screen: CascadeScreen, settings) -> list[dict]:
+    rows = []
+    for path in images:
+        image_bytes = path.read_bytes()
+        try:
+            verdict, margin, screen_ms = screen_image(image_bytes, screen, settings)
+            start = time.perf_counter()
+            result = await analyze_image_with_yolo(image_bytes, settings)
+            full_ms = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            logger.warning(f"Skipping {path}: {e}")
+            continue
+
+        rows.append({
+            "image": str(path.relative_to(root)),
+            "label": label_for(path, root),
+            "screen": verdict,
+            "margin": round(margin, 3),
+            "full": full_outcome(result),
+            "analysis_source": result.get("analysis_source"),
+            "screen_ms": round(screen_ms, 1),
+            "full_ms": round(full_ms, 1),
+        })
+    return rows
+
+
+def summarize(rows: list[dict]) -> dict:
+    """Skip rate, agreement of skipped images with full inference and labels, time saved."""
+    plants = [row for row in rows if row["screen"] != SCREEN_NON_PLANT]
+    skipped = [row for row in plants if row["screen"] == SCREEN_HEALTHY]
+    agree = [row for row in skipped if row["full"] == row["screen"]]
+    labeled = [row for row in skipped if row["label"] is not None]
+    labeled_healthy = [row for row in rows if row["label"] == HEALTHY]
+
+    return {
+        "images": len(rows),
+        "rejected_non_plant": len(rows) - len(plants),
+        "skipped": len(skipped),
+        # Share of plant images whose detector run the screen skipped
+        "skip_rate": round(len(skipped) / len(plants), 3) if plants else 0.0,
+        "verdicts": {
+            verdict: sum(row["screen"] == verdict for row in rows)
+            for verdict in sorted({row["screen"] for row in rows})
+        },
+        # Skipped images whose full inference reached the same verdict
+        "agreement_with_full": round(len(agree) / len(skipped), 3) if skipped else None,
+        "missed_by_cascade": [row["image"] for row in skipped if row["full"] != HEALTHY],
+        # Against folder labels (labeled images only)
+        "skipped_label_accuracy": (
+            round(sum(row["label"] == row["screen"] for row in labeled) / len(labeled), 3) if labeled else None
+        ),
+        "healthy_label_recall": (
+            round(sum(row["screen"] == SCREEN_HEALTHY for row in labeled_healthy) / len(labeled_healthy), 3)
+            if labeled_healthy else None
+        ),
+        "full_ms_total": round(sum(row["full_ms"] for row in rows), 1),
+        # Full pipeline time replaced by the screen on skipped images
+        "estimated_saved_ms": round(sum(row["full_ms"] - row["screen_ms"] for row in skipped), 1),
+    }
+
+
+def main():
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(
+        description="🌾 AgroCortex inference cascade agreement report"
+    )
+    parser.add_argument(
+        "--images",
+        required=True,
+        help="Labeled image folder (sub-folders healthy/, non_plant/, anything else = diseased)"
+    )
+    parser.add_argument(
+        "--min-green",
+        type=float,
+        default=settings.cascade_healthy_min_green,
+        help=f"Foliage share required for a healthy verdict (default: {settings.cascade_healthy_min_green})"
+    )
+    parser.add_argument(
+        "--margin",
+        type=float,
+        default=settings.cascade_healthy_margin,
+        help=f"Required distance below the symptom thresholds (default: {settings.cascade_healthy_margin})"
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Write per-image rows and the summary as JSON"
+    )
+
+    args = parser.parse_args()
+
+    root = Path(args.images)
+    images = sorted(p for p in root.rglob("*") if p.suffix.lower() in IMAGE_EXTENSIONS)
+    if not images:
+        parser.error(f"No images found in {root}")
+
+    # Full inference is the reference: no cascade, no cached results
+    settings.cascade_enabled = False
+    settings.vision_cache_enabled = False
+    for name in ("src", "ultralytics"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    screen = CascadeScreen(
+        symptom_thresholds={rule[0]: rule[1] for rule in COLOR_DISEASE_RULES},
+        healthy_min_green=args.min_green,
+        healthy_margin=args.margin
+    )
+
+    logger.info(f"Evaluating {len(images)} image(s) from {root}")
+    rows = asyncio.run(evaluate(images, root, screen, settings))
+    summary = summarize(rows)
+
+    if any(row["analysis_source"] == "color_analysis_only" for row in rows):
+        logger.warning("YOLO could not run for some images; full results are color-only there")
+
+    logger.info("=" * 60)
+    for key, value in summary.items():
+        if key != "missed_by_cascade":
+            logger.info(f"  {key:<24} {value}")
+    for image in summary["missed_by_cascade"]:
+        logger.info(f"  ⚠️  screened healthy, full inference disagrees: {image}")
+    logger.info("=" * 60)
+
+    if args.output:
+        report = {
+            "settings": {"healthy_min_green": args.min_green, "healthy_margin": args.margin},
+            "summary": summary,
+            "images": rows,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        logger.info(f"✅ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Topraksız Tarım AI Agent - Color Analysis Report
+
+Runs the fused color-analysis kernel over one or more images at several
+downsampling factors and reports how the sampled ratios (green, earth,
+brown, yellow, dark, red-brown, white) drift from the full-resolution
+reference, together with the time spent per factor. With ``--lut-bits``
+it also compares the RGB lookup table against the exact HSV kernel.
+
+Usage:
+    cd backend
+    python -m src.scripts.color_report
+    python -m src.scripts.color_report path/to/leaf.jpg --factors 1 2 4 8
+    python -m src.scripts.color_report ../data/sample-images --json report.json
+    python -m src.scripts.color_report --lut-bits 8 6 5
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+# Ensure backend/ is on sys.path when running as script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from PIL import Image
+
+from src.services.vision import COLOR_CLASSES, ColorLUT, downsample_report, lut_accuracy_report
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("color_report")
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+
+def collect_images(paths: list[str]) -> list[Path]:
+    """Expand files and directories into a sorted list of image paths."""
+    images = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            images.extend(p for p in sorted(path.iterdir()) if p.suffix.lower() in IMAGE_SUFFIXES)
+        elif path.exists():
+            images.append(path)
+        else:
+            logger.warning(f"Not found: {path}")
+    return images
+
+
+def print_report(image_path: Path, rows: list[dict]):
+    """Print a per-factor table for one image."""
+    with Image.open(image_path) as img:
+        size = img.size
+
+    print("=" * 100)
+    print(f"📷 {image_path.name} ({size[0]}x{size[1]})")
+    print("=" * 100)
+    header = f"{'factor':>6} {'pixels':>10} {'ms':>9} " + " ".join(f"{name:>10}" for name in COLOR_CLASSES) + f" {'max Δ':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        ratios = " ".join(f"{row['ratios'][name]:>10.4f}" for name in COLOR_CLASSES)
+        print(
+            f"{row['downsample']:>6} {row['sample_pixels']:>10} {row['time_ms']:>9.2f} "
+            f"{ratios} {row['max_abs_deviation']:>8.4f}"
+        )
+
+
+def print_lut_report(rows: list[dict]):
+    """Print the lookup-table vs exact-kernel comparison for one image."""
+    print(f"\n{'LUT bits':>8} {'exact ms':>9} {'LUT ms':>9} {'speedup':>8} {'min agree':>10} {'max Δ':>8}")
+    for row in rows:
+        speedup = row["exact_ms"] / row["lut_ms"] if row["lut_ms"] else 0.0
+        print(
+            f"{row['lut_bits']:>8} {row['exact_ms']:>9.2f} {row['lut_ms']:>9.2f} {speedup:>7.1f}x "
+            f"{row['min_pixel_agreement']:>10.4%} {row['max_abs_deviation']:>8.4f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="🌾 AgroCortex color analysis downsampling report"
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        default=["../data/sample-images"],
+        help="Image files or directories (default: ../data/sample-images)"
+    )
+    parser.add_argument(
+        "--factors",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8, 16],
+        help="Downsampling factors to compare (default: 1 2 4 8 16)"
+    )
+    parser.add_argument(
+        "--lut-bits",
+        type=int,
+        nargs="*",
+        default=[],
+        help="Also compare RGB lookup tables with these bits per channel (e.g. 8 6 5)"
+    )
+    parser.add_argument(
+        "--lut-downsample",
+        type=int,
+        default=4,
+        help="Downsampling factor used for the lookup-table comparison (default: 4)"
+    )
+    parser.add_argument(
+        "--json",
+        default=None,
+        help="Optional path to write the full report as JSON"
+    )
+
+    args = parser.parse_args()
+
+    images = collect_images(args.paths)
+    if not images:
+        logger.error("No images found.")
+        sys.exit(1)
+
+    luts = [ColorLUT(bits=bits) for bits in args.lut_bits]
+
+    full_report = {}
+    for image_path in images:
+        with Image.open(image_path) as img:
+            image = img.convert("RGB")
+        rows = downsample_report(image, tuple(args.factors))
+        full_report[str(image_path)] = rows
+        print_report(image_path, rows)
+
+        if luts:
+            lut_rows = [lut_accuracy_report(image, lut, args.lut_downsample) for lut in luts]
+            full_report[str(image_path)] = {"downsample": rows, "lut": lut_rows}
+            print_lut_report(lut_rows)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(full_report, indent=2))
+        print(f"\n💾 Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Topraksız Tarım AI Agent - ONNX Export
+
+Converts the YOLO disease detector (``tomato_disease_yolov8.pt``) to ONNX
+for the ONNX Runtime CPU backend (``VISION_BACKEND=onnx``) and, with
+``--verify``, checks that both backends agree on a folder of images.
+
+Usage:
+    cd backend
+    python -m src.scripts.export_onnx
+    python -m src.scripts.export_onnx --weights ../models/tomato_disease_yolov8.pt --imgsz 640
+    python -m src.scripts.export_onnx --static --verify ../data/sample-images
+"""
+import argparse
+import logging
+import shutil
+import sys
+import time
+from pathlib import Path
+
+# Ensure backend/ is on sys.path when running as script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from PIL import Image
+
+from src.config import get_settings
+from src.services.vision import load_yolo_model
+from src.services.vision_backends import OnnxBackend, UltralyticsBackend, box_iou, onnx_path_for
+
+import numpy as np
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("export_onnx")
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+
+def export_onnx(weights: str, output: str, imgsz: int, dynamic: bool, opset: int = None) -> str:
+    """
+    Export ``weights`` to ONNX and move the artifact to ``output``.
+
+    Raises ``FileNotFoundError`` when ``weights`` is missing: unlike the API,
+    the export must not fall back to the stock COCO model, which would end
+    up under the disease model's name.
+    """
+    if not Path(weights).is_file():
+        raise FileNotFoundError(f"Weights not found: {weights}")
+    model = load_yolo_model(weights)
+
+    logger.info(f"Exporting {weights} → ONNX (imgsz={imgsz}, dynamic={dynamic})")
+    start = time.perf_counter()
+    exported = model.export(format="onnx", imgsz=imgsz, dynamic=dynamic, opset=opset, simplify=False)
+    logger.info(f"Export finished in {time.perf_counter() - start:.1f}s: {exported}")
+
+    if Path(exported).resolve() != Path(output).resolve():
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(exported, output)
+    return output
+
+
+def match_rate(reference: list[dict], candidate: list[dict], iou_threshold: float = 0.5) -> float:
+    """Share of reference detections matched by a same-class candidate box."""
+    if not reference:
+        return 1.0 if not candidate else 0.0
+
+    matched = 0
+    used = set()
+    for ref in reference:
+        boxes = [(j, c) for j, c in enumerate(candidate) if c["class_name"] == ref["class_name"] and j not in used]
+        if not boxes:
+            continue
+        ious = box_iou(np.array(ref["bbox"]), np.array([c["bbox"] for _, c in boxes]))
+        best = int(ious.argmax())
+        if ious[best] >= iou_threshold:
+            matched += 1
+            used.add(boxes[best][0])
+    return matched / len(reference)
+
+
+def verify(weights: str, onnx_path: str, image_dir: str, imgsz: int, conf: float):
+    """Run both backends over ``image_dir`` and report agreement and latency."""
+    images = [p for p in sorted(Path(image_dir).iterdir()) if p.suffix.lower() in IMAGE_SUFFIXES]
+    if not images:
+        logger.warning(f"No images to verify in {image_dir}")
+        return
+
+    torch_backend = UltralyticsBackend(load_yolo_model(weights), weights)
+    onnx_backend = OnnxBackend(onnx_path)
+
+    rates, torch_ms, onnx_ms = [], [], []
+    for path in images:
+        with Image.open(path) as img:
+            image = img.convert("RGB")
+
+        start = time.perf_counter()
+        reference = torch_backend.predict([image], conf=conf, imgsz=imgsz)[0]
+        torch_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        candidate = onnx_backend.predict([image], conf=conf, imgsz=imgsz)[0]
+        onnx_ms.append((time.perf_counter() - start) * 1000)
+
+        rate = match_rate(reference, candidate)
+        rates.append(rate)
+        logger.info(f"  {path.name}: torch={len(reference)} onnx={len(candidate)} agreement={rate:.0%}")
+
+    logger.info("=" * 60)
+    logger.info(f"  Images:              {len(images)}")
+    logger.info(f"  Detection agreement: {np.mean(rates):.1%}")
+    logger.info(f"  Ultralytics latency: {np.median(torch_ms):.1f} ms (median)")
+    logger.info(f"  ONNX latency:        {np.median(onnx_ms):.1f} ms (median)")
+    logger.info("=" * 60)
+
+
+def main():
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(
+        description="🌾 AgroCortex YOLO → ONNX export tool"
+    )
+    parser.add_argument(
+        "--weights",
+        default=settings.yolo_model_path,
+        help=f"PyTorch weights to export (default: {settings.yolo_model_path})"
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Output .onnx path (default: next to the weights)"
+    )
+    parser.add_argument(
+        "--imgsz",
+        type=int,
+        default=640,
+        help="Export input size (default: 640)"
+    )
+    parser.add_argument(
+        "--static",
+        action="store_true",
+        help="Export fixed batch/size instead of dynamic axes"
+    )
+    parser.add_argument(
+        "--opset",
+        type=int,
+        default=None,
+        help="ONNX opset (default: exporter's choice)"
+    )
+    parser.add_argument(
+        "--verify",
+        default=None,
+        metavar="IMAGE_DIR",
+        help="Compare ultralytics vs ONNX detections on a folder of images"
+    )
+    parser.add_argument(
+        "--conf",
+        type=float,
+        default=settings.yolo_confidence_threshold,
+        help="Confidence threshold used for --verify"
+    )
+
+    args = parser.parse_args()
+    output = args.output or onnx_path_for(args.weights)
+
+    try:
+        export_onnx(args.weights, output, args.imgsz, dynamic=not args.static, opset=args.opset)
+    except FileNotFoundError as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+    logger.info(f"✅ ONNX model written to {output}")
+    logger.info("   Use it with VISION_BACKEND=onnx ONNX_MODEL_PATH=" + output)
+
+    if args.verify:
+        verify(args.weights, output, args.verify, args.imgsz, args.conf)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Topraksız Tarım AI Agent - INT8 Quantization
+
+Builds a statically quantized INT8 ONNX version of the YOLO disease
+detector for CPU-only edge boxes and reports fp32 vs int8 latency,
+memory and detection agreement on a holdout set.
+
+Activations are calibrated on a folder of our images (default:
+``data/sample-images``). The detection head stays in fp32 by default,
+since quantizing the box regression costs the most accuracy for the
+least speed.
+
+Serve the result with ``VISION_PRECISION=int8``.
+
+Usage:
+    cd backend
+    python -m src.scripts.quantize_int8
+    python -m src.scripts.quantize_int8 --calibration ../data/calibration --holdout ../data/holdout
+    python -m src.scripts.quantize_int8 --quantize-head --report int8_report.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ensure backend/ is on sys.path when running as script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+from PIL import Image
+import numpy as np
+
+from src.config import get_settings
+from src.scripts.export_onnx import IMAGE_SUFFIXES, export_onnx, match_rate
+from src.services.vision_backends import OnnxBackend, letterbox
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("quantize_int8")
+
+
+def list_images(folder: str, limit: int = 0) -> list[Path]:
+    """Sorted image files in ``folder`` (at most ``limit`` when > 0)."""
+    images = [p for p in sorted(Path(folder).iterdir()) if p.suffix.lower() in IMAGE_SUFFIXES]
+    return images[:limit] if limit > 0 else images
+
+
+def load_rgb(path: Path) -> Image.Image:
+    with Image.open(path) as img:
+        return img.convert("RGB")
+
+
+def _calibration_reader(images: list[Path], input_name: str, imgsz: int):
+    """ONNX Runtime calibration reader feeding letterboxed images one by one."""
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class LetterboxReader(CalibrationDataReader):
+        def __init__(self):
+            self._paths = iter(images)
+
+        def get_next(self):
+            path = next(self._paths, None)
+            if path is None:
+                return None
+            chw, _, _ = letterbox(load_rgb(path), imgsz)
+            return {input_name: chw[None]}
+
+    return LetterboxReader()
+
+
+def _head_nodes(model_path: str) -> list[str]:
+    """
+    Nodes of the last top-level module (the YOLOv8 Detect head) and everything after it.
+
+    Head convolutions are found through their ``model.<N>.*`` weights, which
+    both the TorchScript and the dynamo exporters keep; the decode steps
+    that follow (DFL, concat, sigmoid) are collected by walking downstream.
+    """
+    import onnx
+
+    graph = onnx.load(model_path).graph
+    modules = {}
+    for initializer in graph.initializer:
+        parts = initializer.name.split(".")
+        if len(parts) > 2 and parts[0] == "model" and parts[1].isdigit():
+            modules.setdefault(int(parts[1]), set()).add(initializer.name)
+    if not modules:
+        return []
+
+    head_weights = modules[max(modules)]
+    tainted, nodes = set(), []
+    for node in graph.node:  # Nodes are stored in topological order
+        if any(name in head_weights or name in tainted for name in node.input):
+            nodes.append(node.name)
+            tainted.update(node.output)
+    return nodes
+
+
+def quantize(fp32_path: str, int8_path: str, calibration: list[Path], imgsz: int, keep_head_fp32: bool = True):
+    """Statically quantize ``fp32_path`` (QDQ, per-channel int8 weights, uint8 activations)."""
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    input_name = ort.InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    excluded = _head_nodes(fp32_path) if keep_head_fp32 else []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prepared = os.path.join(tmp, "prepared.onnx")
+        try:
+            quant_pre_process(fp32_path, prepared)
+        except Exception as e:
+            logger.warning(f"Pre-processing skipped ({e}); quantizing the raw export")
+            prepared = fp32_path
+
+        logger.info(
+            f"Calibrating on {len(calibration)} image(s), "
+            f"{len(excluded)} head node(s) kept in fp32"
+        )
+        start = time.perf_counter()
+        quantize_static(
+            prepared,
+            int8_path,
+            _calibration_reader(calibration, input_name, imgsz),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method=CalibrationMethod.MinMax,
+            nodes_to_exclude=excluded
+        )
+    logger.info(f"Quantization finished in {time.perf_counter() - start:.1f}s: {int8_path}")
+
+
+def _rss_mb() -> float:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        return float("nan")
+
+
+def _profile(model_path: str, precision: str, images: list[Image.Image], imgsz: int, conf: float, threads: int) -> dict:
+    """Load ``model_path`` and time single-image inference over ``images``."""
+    rss_before = _rss_mb()
+    backend = OnnxBackend(model_path, intra_op_threads=threads, precision=precision)
+    backend.predict(images[:1], conf=conf, imgsz=imgsz)  # First run allocates arenas
+    rss_after = _rss_mb()
+
+    detections, latencies = [], []
+    for image in images:
+        start = time.perf_counter()
+        detections.append(backend.predict([image], conf=conf, imgsz=imgsz)[0])
+        latencies.append((time.perf_counter() - start) * 1000)
+    backend.close()
+
+    return {
+        "model_path": model_path,
+        "file_mb": round(Path(model_path).stat().st_size / 2 ** 20, 2),
+        "rss_increase_mb": round(rss_after - rss_before, 1),
+        "latency_ms": {
+            "median": round(float(np.median(latencies)), 2),
+            "p95": round(float(np.percentile(latencies, 95)), 2),
+        },
+        "detections": detections,
+    }
+
+
+def build_report(
+    fp32_path: str,
+    int8_path: str,
+    holdout: list[Path],
+    imgsz: int,
+    conf: float,
+    threads: int,
+    overlaps_calibration: bool
+) -> dict:
+    """fp32 vs int8 latency, memory and detection agreement on ``holdout``."""
+    images = [load_rgb(path) for path in holdout]
+    fp32 = _profile(fp32_path, "fp32", images, imgsz, conf, threads)
+    int8 = _profile(int8_path, "int8", images, imgsz, conf, threads)
+
+    agreement = [match_rate(ref, cand) for ref, cand in zip(fp32.pop("detections"), int8.pop("detections"))]
+    return {
+        "holdout_images": len(images),
+        "holdout_overlaps_calibration": overlaps_calibration,
+        "imgsz": imgsz,
+        "conf": conf,
+        "fp32": fp32,
+        "int8": int8,
+        "speedup": round(fp32["latency_ms"]["median"] / max(int8["latency_ms"]["median"], 1e-6), 2),
+        "detection_agreement": round(float(np.mean(agreement)), 4),
+        "per_image_agreement": {path.name: round(rate, 4) for path, rate in zip(holdout, agreement)},
+    }
+
+
+def print_report(report: dict):
+    fp32, int8 = report["fp32"], report["int8"]
+    logger.info("=" * 60)
+    logger.info(f"  Holdout images:      {report['holdout_images']}"
+                + (" (same as calibration!)" if report["holdout_overlaps_calibration"] else ""))
+    logger.info(f"  {'':<20} {'fp32':>10} {'int8':>10}")
+    logger.info(f"  {'Model size (MB)':<20} {fp32['file_mb']:>10.2f} {int8['file_mb']:>10.2f}")
+    logger.info(f"  {'RSS increase (MB)':<20} {fp32['rss_increase_mb']:>10.1f} {int8['rss_increase_mb']:>10.1f}")
+    logger.info(f"  {'Median latency (ms)':<20} {fp32['latency_ms']['median']:>10.2f} {int8['latency_ms']['median']:>10.2f}")
+    logger.info(f"  {'p95 latency (ms)':<20} {fp32['latency_ms']['p95']:>10.2f} {int8['latency_ms']['p95']:>10.2f}")
+    logger.info(f"  Speedup:             {report['speedup']:.2f}x")
+    logger.info(f"  Detection agreement: {report['detection_agreement']:.1%}")
+    logger.info("=" * 60)
+
+
+def main():
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(
+        description="🌾 AgroCortex INT8 static quantization tool"
+    )
+    parser.add_argument(
+        "--weights",
+        default=settings.yolo_model_path,
+        help=f"PyTorch weights, exported to ONNX when needed (default: {settings.yolo_model_path})"
+    )
+    parser.add_argument(
+        "--fp32",
+        default=settings.onnx_model_path,
+        help=f"fp32 ONNX model (default: {settings.onnx_model_path})"
+    )
+    parser.add_argument(
+        "--output",
+        default=settings.int8_model_path,
+        help=f"INT8 output path (default: {settings.int8_model_path})"
+    )
+    parser.add_argument(
+        "--calibration",
+        default="../data/sample-images",
+        help="Calibration image folder (default: ../data/sample-images)"
+    )
+    parser.add_argument(
+        "--calibration-limit",
+        type=int,
+        default=200,
+        help="Use at most this many calibration images (default: 200)"
+    )
+    parser.add_argument(
+        "--holdout",
+        default=None,
+        help="Holdout image folder for the report (default: the calibration folder)"
+    )
+    parser.add_argument(
+        "--imgsz",
+        type=int,
+        default=640,
+        help="Model input size (default: 640)"
+    )
+    parser.add_argument(
+        "--quantize-head",
+        action="store_true",
+        help="Also quantize the detection head (faster, less accurate)"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=settings.onnx_intra_op_threads,
+        help="ONNX Runtime intra-op threads for the report (0 = default)"
+    )
+    parser.add_argument(
+        "--conf",
+        type=float,
+        default=settings.yolo_confidence_threshold,
+        help="Confidence threshold used for the report"
+    )
+    parser.add_argument(
+        "--report",
+        default=None,
+        help="Report JSON path (default: next to the INT8 model)"
+    )
+
+    args = parser.parse_args()
+
+    calibration = list_images(args.calibration, args.calibration_limit)
+    if not calibration:
+        logger.error(f"No calibration images in {args.calibration}")
+        sys.exit(1)
+
+    if not Path(args.fp32).exists():
+        logger.info(f"{args.fp32} not found, exporting {args.weights} first")
+        try:
+            export_onnx(args.weights, args.fp32, args.imgsz, dynamic=True)
+        except FileNotFoundError as e:
+            logger.error(f"❌ {e}")
+            sys.exit(1)
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    quantize(args.fp32, args.output, calibration, args.imgsz, keep_head_fp32=not args.quantize_head)
+
+    holdout_dir = args.holdout or args.calibration
+    holdout = list_images(holdout_dir)
+    overlaps = Path(holdout_dir).resolve() == Path(args.calibration).resolve()
+    if overlaps:
+        logger.warning("No --holdout given: reporting on the calibration images")
+
+    report = build_report(args.fp32, args.output, holdout, args.imgsz, args.conf, args.threads, overlaps)
+    print_report(report)
+
+    report_path = args.report or str(Path(args.output).with_suffix(".report.json"))
+    Path(report_path).write_text(json.dumps(report, indent=2))
+    logger.info(f"✅ INT8 model written to {args.output}")
+    logger.info(f"   Report: {report_path}")
+    logger.info("   Serve it with VISION_PRECISION=int8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Topraksız Tarım AI Agent - Cheap-first Inference Cascade
+A color screen decides whether an image needs the detector at all.
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Screen verdicts
+SCREEN_HEALTHY = "healthy"      # Clearly healthy foliage: YOLO skipped
+SCREEN_NON_PLANT = "non_plant"  # Rejected by plant validation: never reaches YOLO, not a skip
+SCREEN_ESCALATE = "escalate"    # Ambiguous: full YOLO inference
+
+# Weight of the newest sample in the YOLO latency average (time-saved estimate)
+YOLO_LATENCY_SMOOTHING = 0.2
+
+
+@dataclass
+class ScreenDecision:
+    """Outcome of the color screen for one image."""
+    verdict: str
+    margin: float  # How far inside the verdict's region the image lies (0-1)
+    reasons: list[str] = field(default_factory=list)
+    saved_ms: float = 0.0  # Estimated YOLO time skipped
+
+    @property
+    def skips_yolo(self) -> bool:
+        """True only for plants the screen cleared; rejected inputs are not skips."""
+        return self.verdict == SCREEN_HEALTHY
+
+    def to_dict(self) -> dict:
+        return {
+            "verdict": self.verdict,
+            "yolo_skipped": self.skips_yolo,
+            "margin": round(self.margin, 3),
+            "reasons": list(self.reasons),
+            "saved_ms": round(self.saved_ms, 1),
+        }
+
+
+class CascadeScreen:
+    """
+    Cheap-first screen on the fused color statistics.
+
+    The ratios come from the color pass that plant validation already runs,
+    so the screen itself costs nothing extra. An image is *clearly healthy*
+    when at least ``healthy_min_green`` of it is foliage and every symptom
+    color (the ``COLOR_DISEASE_RULES`` classes) stays at least
+    ``healthy_margin`` below its rule threshold, i.e. at most
+    ``(1 - healthy_margin) * threshold``. Such images skip YOLO; everything
+    else escalates. Non-plant images never reach the detector anyway (plant
+    validation rejects them first): they are counted as rejections, apart
+    from the screened plants, and add nothing to the skip rate or the time
+    saved.
+
+    The time saved is estimated from a running average of the per-image
+    YOLO latency of escalated images.
+    """
+
+    def __init__(
+        self,
+        symptom_thresholds: dict[str, float],
+        healthy_min_green: float = 0.3,
+        healthy_margin: float = 0.5
+    ):
+        self.symptom_thresholds = dict(symptom_thresholds)
+        self.healthy_min_green = healthy_min_green
+        self.healthy_margin = min(1.0, max(0.0, healthy_margin))
+        self._lock = threading.Lock()
+        self._verdicts: Counter[str] = Counter()
+        self._yolo_ms: Optional[float] = None
+        self._saved_ms = 0.0
+
+    def screen(self, ratios: dict[str, float]) -> ScreenDecision:
+        """Verdict for one image from its color ``ratios``."""
+        green = ratios.get("green", 0.0)
+        if green < self.healthy_min_green:
+            return ScreenDecision(SCREEN_ESCALATE, 0.0, [f"green {green:.1%} < {self.healthy_min_green:.0%}"])
+
+        # Smallest relative distance of any symptom color below its threshold
+        margin, closest = 1.0, None
+        for color, threshold in self.symptom_thresholds.items():
+            distance = 1.0 - ratios.get(color, 0.0) / threshold
+            if distance < margin:
+                margin, closest = distance, color
+
+        if margin < self.healthy_margin:
+            return ScreenDecision(
+                SCREEN_ESCALATE,
+                max(0.0, margin),
+                [f"{closest} {ratios.get(closest, 0.0):.2%} near threshold {self.symptom_thresholds[closest]:.0%}"]
+            )
+        return ScreenDecision(SCREEN_HEALTHY, margin, [f"green {green:.1%}", "no symptom colors"])
+
+    def record(self, decision: ScreenDecision):
+        """Count a decision and fill in its estimated time saved."""
+        with self._lock:
+            self._verdicts[decision.verdict] += 1
+            if decision.skips_yolo and self._yolo_ms is not None:
+                decision.saved_ms = self._yolo_ms
+                self._saved_ms += self._yolo_ms
+
+    def observe_yolo(self, elapsed_ms: float, images: int):
+        """Feed the latency of a YOLO pass over ``images`` escalated images."""
+        if images <= 0:
+            return
+        per_image = elapsed_ms / images
+        with self._lock:
+            if self._yolo_ms is None:
+                self._yolo_ms = per_image
+            else:
+                self._yolo_ms += YOLO_LATENCY_SMOOTHING * (per_image - self._yolo_ms)
+
+    def stats(self) -> dict:
+        with self._lock:
+            rejected = self._verdicts[SCREEN_NON_PLANT]
+            screened = sum(self._verdicts.values()) - rejected
+            skipped = self._verdicts[SCREEN_HEALTHY]
+            return {
+                "enabled": True,
+                "healthy_min_green": self.healthy_min_green,
+                "healthy_margin": self.healthy_margin,
+                "screened": screened,  # Plant images (skip or escalate)
+                "rejected_non_plant": rejected,
+                "verdicts": dict(self._verdicts),
+                "skip_rate": round(skipped / screened, 3) if screened else 0.0,
+                "yolo_ms_per_image": round(self._yolo_ms, 1) if self._yolo_ms is not None else None,
+                "saved_ms_total": round(self._saved_ms, 1),
+            }
@@ -0,0 +1,226 @@
+"""
+Topraksız Tarım AI Agent - Change Detection
+Per-position reference frames for fixed cameras: block-wise frame difference
+decides whether a capture can reuse the previous analysis.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import copy
+import logging
+import threading
+import time
+from typing import Optional
+
+from PIL import Image
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Capture outcomes
+CHANGE_NEW = "new"              # No usable reference: full analysis
+CHANGE_UNCHANGED = "unchanged"  # Reuse previous result
+CHANGE_PARTIAL = "partial"      # Re-run changed regions only
+CHANGE_CHANGED = "changed"      # Too much changed: full analysis
+
+
+def make_thumbnail(image: Image.Image, side: int, block: int) -> np.ndarray:
+    """
+    RGB thumbnail whose sides are whole multiples of ``block``.
+
+    The long side is about ``side`` pixels; the aspect ratio is kept up to
+    block rounding, so frames of the same camera always align.
+    """
+    width, height = image.size
+    ratio = side / max(width, height)
+    grid_w = max(1, round(width * ratio / block))
+    grid_h = max(1, round(height * ratio / block))
+    thumbnail = image.resize((grid_w * block, grid_h * block), Image.BILINEAR)
+    return np.asarray(thumbnail, dtype=np.int16)
+
+
+def block_difference(reference: np.ndarray, current: np.ndarray, block: int) -> np.ndarray:
+    """Mean absolute RGB difference per ``block`` x ``block`` cell (grid_h, grid_w)."""
+    height, width = reference.shape[:2]
+    diff = np.abs(current - reference).astype(np.float32)
+    return diff.reshape(height // block, block, width // block, block, 3).mean(axis=(1, 3, 4))
+
+
+def changed_regions(changed: np.ndarray, image_size: tuple[int, int], min_side: int = 0) -> list[tuple[int, int, int, int]]:
+    """
+    Group changed grid cells into boxes in image pixels.
+
+    Cells are dilated by one so each box carries some surrounding context,
+    then every connected group becomes one ``(x1, y1, x2, y2)`` box, grown
+    to at least ``min_side`` pixels per side where the image allows.
+    """
+    grid_h, grid_w = changed.shape
+    grown = cv2.dilate(changed.astype(np.uint8), np.ones((3, 3), dtype=np.uint8))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(grown, connectivity=8)
+
+    width, height = image_size
+    cell_w, cell_h = width / grid_w, height / grid_h
+    boxes = []
+    for label in range(1, count):
+        x, y, w, h = (int(v) for v in stats[label, :4])
+        x1, y1 = int(x * cell_w), int(y * cell_h)
+        x2, y2 = min(width, int(np.ceil((x + w) * cell_w))), min(height, int(np.ceil((y + h) * cell_h)))
+        x1, x2 = _grow_span(x1, x2, min_side, width)
+        y1, y2 = _grow_span(y1, y2, min_side, height)
+        boxes.append((x1, y1, x2, y2))
+    return boxes
+
+
+def _grow_span(start: int, end: int, min_length: int, limit: int) -> tuple[int, int]:
+    """Widen ``[start, end)`` around its center to ``min_length`` within ``[0, limit)``."""
+    length = min(min_length, limit)
+    if end - start >= length:
+        return start, end
+    center = (start + end) // 2
+    start = max(0, min(center - length // 2, limit - length))
+    return start, start + length
+
+
+@dataclass
+class PositionReference:
+    """Last analyzed frame of one camera position."""
+    thumbnail: np.ndarray
+    image_size: tuple[int, int]   # Original capture size
+    vision_result: dict           # Vision output in original pixels
+    pipeline_result: Optional[dict] = None  # Full pipeline output for reuse
+    pipeline_key: Optional[str] = None      # Query/sensor inputs that produced it
+    updated_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class ChangeReport:
+    """Outcome of comparing a capture with its position reference."""
+    status: str
+    changed_ratio: float = 1.0
+    changed_cells: Optional[np.ndarray] = field(default=None, repr=False)
+    reference: Optional[PositionReference] = field(default=None, repr=False)
+
+    def to_dict(self, position_id: str) -> dict:
+        return {
+            "position_id": position_id,
+            "status": self.status,
+            "changed_ratio": round(self.changed_ratio, 4),
+        }
+
+
+class ChangeDetector:
+    """
+    LRU store of per-position references with block-wise change detection.
+
+    A cell counts as changed when its mean absolute RGB difference exceeds
+    ``block_threshold``. No changed cell means the previous result can be
+    reused; more than ``full_rerun_ratio`` changed cells (or a missing,
+    expired or differently sized reference) means a full analysis.
+    """
+
+    def __init__(
+        self,
+        max_positions: int = 256,
+        thumbnail_side: int = 256,
+        block_size: int = 16,
+        block_threshold: float = 12.0,
+        full_rerun_ratio: float = 0.5,
+        ttl_seconds: float = 7200
+    ):
+        self.max_positions = max_positions
+        self.thumbnail_side = thumbnail_side
+        self.block_size = block_size
+        self.block_threshold = block_threshold
+        self.full_rerun_ratio = full_rerun_ratio
+        self.ttl_seconds = ttl_seconds
+        self._references: OrderedDict[str, PositionReference] = OrderedDict()
+        self._lock = threading.Lock()
+        self._outcomes = {CHANGE_NEW: 0, CHANGE_UNCHANGED: 0, CHANGE_PARTIAL: 0, CHANGE_CHANGED: 0}
+
+    def thumbnail(self, image: Image.Image) -> np.ndarray:
+        return make_thumbnail(image, self.thumbnail_side, self.block_size)
+
+    def compare(self, position_id: str, thumbnail: np.ndarray, image_size: tuple[int, int]) -> ChangeReport:
+        """Classify a capture against the stored reference of its position."""
+        with self._lock:
+            reference = self._references.get(position_id)
+            if reference is not None and self.ttl_seconds > 0:
+                if time.monotonic() - reference.updated_at > self.ttl_seconds:
+                    del self._references[position_id]
+                    reference = None
+            if reference is not None:
+                self._references.move_to_end(position_id)
+
+        if (
+            reference is None
+            or reference.image_size != image_size
+            or reference.thumbnail.shape != thumbnail.shape
+        ):
+            report = ChangeReport(CHANGE_NEW)
+        else:
+            changed = block_difference(reference.thumbnail, thumbnail, self.block_size) > self.block_threshold
+            ratio = float(changed.mean())
+            if ratio == 0:
+                status = CHANGE_UNCHANGED
+            elif ratio > self.full_rerun_ratio:
+                status = CHANGE_CHANGED
+            else:
+                status = CHANGE_PARTIAL
+            report = ChangeReport(status, ratio, changed, reference)
+
+        with self._lock:
+            self._outcomes[report.status] += 1
+        logger.info(f"Position {position_id}: {report.status} ({report.changed_ratio:.1%} cells changed)")
+        return report
+
+    def update(
+        self,
+        position_id: str,
+        thumbnail: np.ndarray,
+        image_size: tuple[int, int],
+        vision_result: dict
+    ):
+        """Store a new reference frame; the previous pipeline result is dropped."""
+        reference = PositionReference(thumbnail, image_size, copy.deepcopy(vision_result))
+        with self._lock:
+            self._references[position_id] = reference
+            self._references.move_to_end(position_id)
+            while len(self._references) > self.max_positions:
+                self._references.popitem(last=False)
+
+    def store_pipeline_result(self, position_id: str, result: dict, pipeline_key: Optional[str] = None):
+        """Attach the full pipeline output (and the inputs it used) to the current reference."""
+        with self._lock:
+            reference = self._references.get(position_id)
+            if reference is not None:
+                reference.pipeline_result = copy.deepcopy(result)
+                reference.pipeline_key = pipeline_key
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "positions": len(self._references),
+                "max_positions": self.max_positions,
+                "block_threshold": self.block_threshold,
+                "outcomes": dict(self._outcomes),
+            }
+
+
+# Global detector instance (lazy created)
+_change_detector: Optional[ChangeDetector] = None
+
+
+def get_change_detector(settings) -> ChangeDetector:
+    """Get or create the process-wide change detector."""
+    global _change_detector
+
+    if _change_detector is None:
+        _change_detector = ChangeDetector(
+            max_positions=settings.change_max_positions,
+            thumbnail_side=settings.change_thumbnail_side,
+            block_size=settings.change_block_size,
+            block_threshold=settings.change_block_threshold,
+            full_rerun_ratio=settings.change_full_rerun_ratio,
+            ttl_seconds=settings.change_reference_ttl_seconds
+        )
+    return _change_detector
@@ -0,0 +1,197 @@
+"""
+Topraksız Tarım AI Agent - Embedding Cache
+Content-addressed embedding vectors in a memory LRU tier backed by SQLite,
+so repeated queries and re-ingested chunks are embedded only once.
+"""
+from collections import OrderedDict
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form for cache keys: NFC, collapsed whitespace, trimmed (case is kept)."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def embedding_key(model: str, text: str) -> str:
+    """Cache key of ``text`` embedded by ``model``."""
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache keyed by ``embedding_key``.
+
+    Vectors are float32 arrays in both tiers (a quarter of a float64
+    array, an eighth of a Python float list); callers convert at the API
+    boundary and must not modify them. The memory tier is an LRU of
+    ``max_entries`` vectors. With ``db_path`` every stored vector is also
+    written to SQLite as the same float32 bytes, which survives restarts;
+    disk hits are promoted to memory. Vectors are keyed by model, so
+    switching ``ollama_embed_model`` never serves stale ones.
+    """
+
+    def __init__(self, max_entries: int = 4096, db_path: Optional[str] = None):
+        self.max_entries = max(1, max_entries)
+        self.db_path = db_path
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.deduplicated = 0  # Identical texts within one request, embedded once
+        self.stores = 0
+        self.evictions = 0
+
+        if db_path:
+            try:
+                Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "key TEXT PRIMARY KEY, model TEXT, dim INTEGER, vector BLOB, created_at REAL)"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache database unavailable ({db_path}): {e}. Memory tier only.")
+                self._db = None
+
+    def get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        """Cached vectors for ``keys`` (missing keys are absent from the result)."""
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+            self.memory_hits += len(found)
+
+            missing = [key for key in keys if key not in found]
+            if missing and self._db is not None:
+                from_disk = self._read(missing)
+                self.disk_hits += len(from_disk)
+                for key, vector in from_disk.items():
+                    self._remember(key, vector)
+                found.update(from_disk)
+
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, model: str, vectors: dict[str, np.ndarray]):
+        """Store freshly computed vectors in both tiers."""
+        if not vectors:
+            return
+        vectors = {key: np.asarray(vector, dtype=np.float32) for key, vector in vectors.items()}
+        with self._lock:
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+            self.stores += len(vectors)
+            if self._db is not None:
+                now = time.time()
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+                        [
+                            (key, model, len(vector), vector.tobytes(), now)
+                            for key, vector in vectors.items()
+                        ]
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning(f"Embedding cache write failed: {e}")
+
+    def record_duplicates(self, count: int):
+        with self._lock:
+            self.deduplicated += count
+
+    def _read(self, keys: list[str]) -> dict[str, np.ndarray]:
+        found = {}
+        try:
+            # SQLite limits bound parameters per statement
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+        return found
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_entries(self) -> Optional[int]:
+        if self._db is None:
+            return None
+        try:
+            return self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        except sqlite3.Error:
+            return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "enabled": True,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "db_path": self.db_path if self._db is not None else None,
+                "disk_entries": self._disk_entries(),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "deduplicated": self.deduplicated,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+# Global cache instance (lazy created)
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache(settings) -> Optional[EmbeddingCache]:
+    """Get the process-wide embedding cache, or None when caching is disabled."""
+    global _embedding_cache
+
+    if not settings.embedding_cache_enabled:
+        return None
+
+    if _embedding_cache is None:
+        from ..config import backend_path
+
+        _embedding_cache = EmbeddingCache(
+            max_entries=settings.embedding_cache_max_entries,
+            db_path=backend_path(settings.embedding_cache_path) if settings.embedding_cache_path else None
+        )
+    return _embedding_cache
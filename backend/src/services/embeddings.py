@@ -2,10 +2,16 @@
 Topraksız Tarım AI Agent - Embeddings Service
 Ollama-based text embeddings for RAG.
 """
+import asyncio
 import httpx
 import logging
+import time
 from typing import Optional
 
+import numpy as np
+
+from .embedding_cache import embedding_key, get_embedding_cache
+
 logger = logging.getLogger(__name__)
 
 # Cache for embeddings client
@@ -20,16 +26,162 @@ async def get_client() -> httpx.AsyncClient:
     return _client
 
 
+class AdaptiveBatchSize:
+    """
+    Texts per ``/api/embed`` request, adapted to how Ollama copes.
+
+    Failed or slow batches (over ``target_seconds``) halve the size; batches
+    finishing in under half the target double it again, up to ``maximum``.
+    """
+
+    def __init__(self, maximum: int = 64, target_seconds: float = 5.0):
+        self.maximum = max(1, maximum)
+        self.target_seconds = target_seconds
+        self.size = self.maximum
+        self.batches = 0
+        self.texts = 0
+        self.retries = 0
+        self.failures = 0  # Batches given up after all retries
+
+    def record_success(self, count: int, elapsed: float):
+        self.batches += 1
+        self.texts += count
+        if elapsed > self.target_seconds:
+            self.size = max(1, self.size // 2)
+        elif elapsed < self.target_seconds / 2 and count >= self.size:
+            self.size = min(self.maximum, self.size * 2)
+
+    def record_retry(self):
+        self.retries += 1
+        self.size = max(1, self.size // 2)
+
+    def stats(self) -> dict:
+        return {
+            "batch_size": self.size,
+            "max_batch_size": self.maximum,
+            "batches": self.batches,
+            "texts": self.texts,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
+
+
+# Process-wide batch sizing and in-flight limit (lazy created)
+_batch_size: Optional[AdaptiveBatchSize] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_batch_size(settings) -> AdaptiveBatchSize:
+    global _batch_size
+    if _batch_size is None:
+        _batch_size = AdaptiveBatchSize(settings.embed_batch_size, settings.embed_target_batch_seconds)
+    return _batch_size
+
+
+def _get_semaphore(settings) -> asyncio.Semaphore:
+    """Limit of concurrent ``/api/embed`` requests, shared by every caller on this loop."""
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore = asyncio.Semaphore(max(1, settings.embed_max_concurrency))
+        _semaphore_loop = loop
+    return _semaphore
+
+
+async def _embed_batch(texts: list[str], settings, attempt: int = 0) -> list[Optional[list[float]]]:
+    """
+    One ``/api/embed`` request for ``texts`` with retry and backoff.
+
+    A failed batch is retried after ``embed_retry_backoff_seconds`` (doubling);
+    when the adapted batch size has dropped below its length it is split in
+    halves. After ``embed_max_retries`` the texts get None.
+    """
+    client = await get_client()
+    sizer = get_batch_size(settings)
+    try:
+        async with _get_semaphore(settings):
+            start = time.perf_counter()
+            response = await client.post(
+                f"{settings.ollama_host}/api/embed",
+                json={
+                    "model": settings.ollama_embed_model,
+                    "input": texts
+                },
+                timeout=settings.embed_timeout_seconds
+            )
+            response.raise_for_status()
+            vectors = response.json().get("embeddings") or []
+            elapsed = time.perf_counter() - start
+        if len(vectors) != len(texts):
+            raise ValueError(f"expected {len(texts)} embeddings, got {len(vectors)}")
+        sizer.record_success(len(texts), elapsed)
+        return [vector or None for vector in vectors]
+        
+    except Exception as e:
+        if attempt >= settings.embed_max_retries:
+            sizer.failures += 1
+            logger.error(f"Embedding batch of {len(texts)} failed after {attempt + 1} attempt(s): {e}")
+            return [None] * len(texts)
+        
+        sizer.record_retry()
+        delay = settings.embed_retry_backoff_seconds * 2 ** attempt
+        logger.warning(f"Embedding batch of {len(texts)} failed ({e}), retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+        
+        if len(texts) > sizer.size:
+            half = len(texts) // 2
+            first, second = await asyncio.gather(
+                _embed_batch(texts[:half], settings, attempt + 1),
+                _embed_batch(texts[half:], settings, attempt + 1)
+            )
+            return first + second
+        return await _embed_batch(texts, settings, attempt + 1)
+
+
+async def _request_embeddings(texts: list[str], settings) -> list[Optional[list[float]]]:
+    """
+    Embed ``texts`` with Ollama's multi-input ``/api/embed``; None where it failed.
+    
+    Texts are cut into batches of the current adaptive size and up to
+    ``embed_max_concurrency`` batches are in flight at once; results keep
+    the input order.
+    """
+    results: list[Optional[list[float]]] = [None] * len(texts)
+    sizer = get_batch_size(settings)
+    next_index = 0
+    
+    async def worker():
+        nonlocal next_index
+        while next_index < len(texts):
+            # Take the next slice at the size adapted so far
+            start = next_index
+            next_index = min(len(texts), start + sizer.size)
+            end = next_index
+            results[start:end] = await _embed_batch(texts[start:end], settings)
+    
+    workers = min(max(1, settings.embed_max_concurrency), -(-len(texts) // sizer.size))
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return results
+
+
 async def get_embeddings(
     texts: list[str],
-    settings = None
+    settings = None,
+    use_cache: bool = True
 ) -> list[list[float]]:
     """
     Generate embeddings using Ollama.
     
+    Identical texts (after whitespace/Unicode normalization) are embedded
+    once per call, and vectors already in the embedding cache (memory LRU,
+    then SQLite) are not requested again. Failed texts get a zero vector,
+    which is never cached.
+    
     Args:
         texts: List of texts to embed
         settings: Application settings
+        use_cache: False always asks Ollama (e.g. warm-up)
         
     Returns:
         List of embedding vectors
@@ -39,28 +191,31 @@ async def get_embeddings(
     if settings is None:
         settings = get_settings()
     
-    client = await get_client()
-    embeddings = []
+    model = settings.ollama_embed_model
+    keys = [embedding_key(model, text) for text in texts]
+    unique: dict[str, str] = {}  # In-batch deduplication: first text per key
+    for key, text in zip(keys, texts):
+        unique.setdefault(key, text)
     
-    for text in texts:
-        try:
-            response = await client.post(
-                f"{settings.ollama_host}/api/embeddings",
-                json={
-                    "model": settings.ollama_embed_model,
-                    "prompt": text
-                }
-            )
-            response.raise_for_status()
-            data = response.json()
-            embeddings.append(data.get("embedding", []))
-            
-        except Exception as e:
-            logger.error(f"Embedding failed for text: {str(e)}")
-            # Return zero vector on failure
-            embeddings.append([0.0] * 768)  # Default dimension
+    cache = get_embedding_cache(settings) if use_cache else None
+    found = {}
+    if cache is not None:
+        cache.record_duplicates(len(keys) - len(unique))
+        found = await asyncio.to_thread(cache.get_many, list(unique))
+    
+    missing = [key for key in unique if key not in found]
+    if missing:
+        vectors = await _request_embeddings([unique[key] for key in missing], settings)
+        computed = {
+            key: np.asarray(vector, dtype=np.float32)
+            for key, vector in zip(missing, vectors) if vector is not None
+        }
+        if cache is not None:
+            await asyncio.to_thread(cache.put_many, model, computed)
+        found.update(computed)
     
-    return embeddings
+    # Zero vector (default dimension) for texts that failed
+    return [found[key].tolist() if key in found else [0.0] * 768 for key in keys]
 
 
 async def get_single_embedding(
@@ -72,6 +227,14 @@ async def get_single_embedding(
     return embeddings[0] if embeddings else []
 
 
+def _embedding_stats(settings) -> dict:
+    cache = get_embedding_cache(settings)
+    return {
+        "client": {**get_batch_size(settings).stats(), "max_concurrency": settings.embed_max_concurrency},
+        "cache": cache.stats() if cache else {"enabled": False},
+    }
+
+
 async def check_ollama_connection(settings) -> dict:
     """Check if Ollama is accessible."""
     try:
@@ -87,11 +250,13 @@ async def check_ollama_connection(settings) -> dict:
             "host": settings.ollama_host,
             "models": models,
             "llm_available": settings.ollama_model in str(models),
-            "embed_available": settings.ollama_embed_model in str(models)
+            "embed_available": settings.ollama_embed_model in str(models),
+            "embeddings": _embedding_stats(settings)
         }
     except Exception as e:
         return {
             "status": "error",
             "host": settings.ollama_host,
-            "error": str(e)
+            "error": str(e),
+            "embeddings": _embedding_stats(settings)
         }
@@ -0,0 +1,185 @@
+"""
+Topraksız Tarım AI Agent - Inference Executor
+Bounded thread pool that keeps CPU-bound vision work off the asyncio event loop.
+"""
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import functools
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Number of recent wait times kept for percentile metrics
+_WAIT_WINDOW = 1000
+
+
+class InferenceQueueFull(RuntimeError):
+    """Raised when the inference queue is at capacity and new work is rejected."""
+
+
+class InferenceExecutor:
+    """
+    Thread pool with admission control and queue metrics.
+
+    At most ``max_workers`` tasks run concurrently and at most
+    ``max_queue`` more may wait; anything beyond that is rejected
+    immediately with ``InferenceQueueFull`` instead of piling up latency.
+    numpy, PIL and torch release the GIL in their heavy loops, so
+    threads give real parallelism for this workload.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 32):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="vision-inference"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._wait_times: deque[float] = deque(maxlen=_WAIT_WINDOW)
+        self._max_wait = 0.0
+        self._busy_time = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Tasks admitted but not yet running."""
+        return self._queued
+
+    @property
+    def active(self) -> int:
+        """Tasks currently running on a worker thread."""
+        return self._active
+
+    def _admit(self):
+        with self._lock:
+            if self._queued + self._active >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise InferenceQueueFull(
+                    f"Inference queue full ({self._queued} queued, {self._active} running)"
+                )
+            self._queued += 1
+            self._submitted += 1
+
+    def _execute(self, enqueued_at: float, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        started = time.perf_counter()
+        wait = started - enqueued_at
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+            self._wait_times.append(wait)
+            self._max_wait = max(self._max_wait, wait)
+
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._busy_time += time.perf_counter() - started
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    def _release_if_cancelled(self, future: Future):
+        # A future is only cancelled before it starts, i.e. before _execute
+        # has released its queue slot (caller cancelled, or pool shut down)
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result."""
+        self._admit()
+        task = functools.partial(self._execute, time.perf_counter(), fn, args, kwargs)
+        try:
+            future = self._pool.submit(task)
+        except RuntimeError:
+            # Pool already shut down: release the admission slot
+            with self._lock:
+                self._queued -= 1
+            raise
+        future.add_done_callback(self._release_if_cancelled)
+        # Cancelling the awaiting task cancels the pool future while it is still queued
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits = sorted(self._wait_times)
+            finished = self._completed + self._failed
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(p * len(waits)))] * 1000
+
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self._queued,
+            "active": self._active,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "wait_ms": {
+                "p50": round(percentile(0.50), 3),
+                "p95": round(percentile(0.95), 3),
+                "max": round(self._max_wait * 1000, 3),
+                "window": len(waits),
+            },
+            "avg_task_ms": round(self._busy_time / finished * 1000, 3) if finished else 0.0,
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# Global executor instance (lazy created)
+_executor: Optional[InferenceExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_inference_executor(settings=None) -> InferenceExecutor:
+    """Get or create the process-wide inference executor."""
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from ..config import get_settings
+
+                if settings is None:
+                    settings = get_settings()
+                _executor = InferenceExecutor(
+                    max_workers=settings.inference_workers,
+                    max_queue=settings.inference_queue_limit
+                )
+                logger.info(
+                    f"Inference executor started: {_executor.max_workers} worker(s), "
+                    f"queue limit {_executor.max_queue}"
+                )
+    return _executor
+
+
+def shutdown_inference_executor():
+    """Stop the executor (application shutdown)."""
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
@@ -0,0 +1,134 @@
+"""
+Topraksız Tarım AI Agent - Micro-Batcher
+Coalesces concurrent single-image requests into batched model calls.
+"""
+from collections import Counter, deque
+from dataclasses import dataclass, field
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Number of recent queue waits kept for percentile metrics
+_WAIT_WINDOW = 1000
+
+
+@dataclass
+class _PendingBatch:
+    """Items collected for one batch key on one event loop."""
+    key: Hashable
+    items: list[tuple[Any, asyncio.Future, float]] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching in front of a batched model call.
+
+    ``submit`` enqueues one item and awaits its own result. Items with the
+    same ``key`` (e.g. inference size) are flushed together as soon as
+    ``max_batch_size`` items are waiting or the oldest one has waited
+    ``max_wait_ms``, whichever comes first. ``run_batch(items, key)`` must
+    return one result per item in order; if it raises, every caller in
+    that batch receives the exception.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[list, Hashable], Awaitable[list]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0
+    ):
+        self._run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._pending: dict[tuple, _PendingBatch] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._batch_sizes: Counter[int] = Counter()
+        self._flush_reasons: Counter[str] = Counter()
+        self._wait_times: deque[float] = deque(maxlen=_WAIT_WINDOW)
+        self._items = 0
+        self._failed_batches = 0
+
+    async def submit(self, item: Any, key: Hashable = None) -> Any:
+        """Add ``item`` to the next batch for ``key`` and await its result."""
+        loop = asyncio.get_running_loop()
+        # Keyed by loop too, so futures are always resolved on their own loop
+        pending_key = (id(loop), key)
+
+        batch = self._pending.get(pending_key)
+        if batch is None:
+            batch = self._pending[pending_key] = _PendingBatch(key)
+            batch.timer = loop.call_later(self.max_wait, self._flush, pending_key, "timeout")
+
+        future = loop.create_future()
+        batch.items.append((item, future, time.perf_counter()))
+        if len(batch.items) >= self.max_batch_size:
+            self._flush(pending_key, "full")
+
+        return await future
+
+    def _flush(self, pending_key: tuple, reason: str):
+        batch = self._pending.pop(pending_key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+
+        now = time.perf_counter()
+        self._batch_sizes[len(batch.items)] += 1
+        self._flush_reasons[reason] += 1
+        self._items += len(batch.items)
+        self._wait_times.extend(now - enqueued for _, _, enqueued in batch.items)
+
+        task = asyncio.get_running_loop().create_task(self._execute(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, batch: _PendingBatch):
+        items = [item for item, _, _ in batch.items]
+        try:
+            results = await self._run_batch(items, batch.key)
+            if len(results) != len(items):
+                raise RuntimeError(f"Batch returned {len(results)} results for {len(items)} items")
+        except BaseException as e:
+            self._failed_batches += 1
+            for _, future, _ in batch.items:
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        for (_, future, _), result in zip(batch.items, results):
+            # Callers may have been cancelled while the batch ran
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        waits = sorted(self._wait_times)
+        batches = sum(self._batch_sizes.values())
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(p * len(waits)))] * 1000
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "batches": batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / batches, 2) if batches else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+            "flush_reasons": dict(self._flush_reasons),
+            "failed_batches": self._failed_batches,
+            "pending": sum(len(b.items) for b in self._pending.values()),
+            "queue_wait_ms": {
+                "p50": round(percentile(0.50), 3),
+                "p95": round(percentile(0.95), 3),
+                "window": len(waits),
+            },
+        }
@@ -0,0 +1,231 @@
+"""
+Topraksız Tarım AI Agent - Crop Model Pool
+Lazily loaded per-crop detectors with LRU residency under a model-count
+and memory budget.
+"""
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+import logging
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+from .model_registry import IDLE_EVENT_HISTORY, idle_event
+from .vision_backends import BackendLeases, VisionBackend
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolEntry:
+    """Residency and usage counters of one crop model."""
+    key: str
+    model_path: str
+    backend: Optional[VisionBackend] = None
+    memory_mb: float = 0.0        # Estimated footprint of the resident model
+    hits: int = 0                 # Requests served by a resident model
+    loads: int = 0
+    evictions: int = 0
+    last_load_ms: Optional[float] = None
+    total_load_ms: float = 0.0
+    last_used: float = 0.0
+    idle_unloads: int = 0
+    reloads: int = 0              # Loads after an idle unload
+    unloaded_idle: bool = False
+
+    def to_dict(self) -> dict:
+        return {
+            "model_path": self.model_path,
+            "resident": self.backend is not None,
+            "memory_mb": round(self.memory_mb, 1),
+            "hits": self.hits,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "last_load_ms": round(self.last_load_ms, 1) if self.last_load_ms is not None else None,
+            "avg_load_ms": round(self.total_load_ms / self.loads, 1) if self.loads else None,
+            "idle_unloads": self.idle_unloads,
+            "reloads": self.reloads,
+        }
+
+
+class VisionModelPool:
+    """
+    LRU pool of per-crop inference backends.
+
+    ``get`` returns the resident backend of a crop or loads it, then
+    evicts least recently used models until at most ``max_models`` are
+    resident and their estimated memory fits ``memory_budget_mb`` (0 = no
+    budget). The model just requested is never evicted. Memory is the
+    backend's own estimate (``VisionBackend.memory_mb``), not process RSS,
+    so concurrent loads, lazy imports and warm-up inferences are not
+    charged to a model. Requests hold a model through ``lease``; an
+    evicted model is closed when the last request running on it finishes.
+
+    ``unload_idle`` releases models unused for a while; they reload on
+    their next request, warmed by ``reload_warmup`` when given.
+    """
+
+    def __init__(
+        self,
+        load_backend: Callable[[str], VisionBackend],
+        max_models: int = 2,
+        memory_budget_mb: float = 0.0,
+        reload_warmup: Optional[Callable[[VisionBackend], None]] = None
+    ):
+        self._load_backend = load_backend
+        self._reload_warmup = reload_warmup
+        self.max_models = max(1, max_models)
+        self.memory_budget_mb = max(0.0, memory_budget_mb)
+        self._leases = BackendLeases()
+        self._entries: OrderedDict[str, PoolEntry] = OrderedDict()  # LRU order: oldest first
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self.idle_events: deque[dict] = deque(maxlen=IDLE_EVENT_HISTORY)
+
+    def get(self, key: str, model_path: str) -> VisionBackend:
+        """Backend for ``key``, loading ``model_path`` on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.backend is not None and entry.model_path == model_path:
+                entry.hits += 1
+                entry.last_used = time.monotonic()
+                self._entries.move_to_end(key)
+                return entry.backend
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # One load per key; other keys keep serving meanwhile
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry.backend is not None and entry.model_path == model_path:
+                    entry.hits += 1
+                    entry.last_used = time.monotonic()
+                    self._entries.move_to_end(key)
+                    return entry.backend
+            return self._load(key, model_path)
+
+    @contextmanager
+    def lease(self, key: str, model_path: str) -> Iterator[VisionBackend]:
+        """``get``, keeping the backend open until the block exits (even if evicted meanwhile)."""
+        while True:
+            backend = self.get(key, model_path)
+            with self._lock:
+                # Evicted between the load and here: load it again
+                entry = self._entries.get(key)
+                if entry is not None and entry.backend is backend:
+                    self._leases.acquire(backend)
+                    break
+        try:
+            yield backend
+        finally:
+            self._leases.release(backend)
+
+    def peek(self, key: str, model_path: str) -> Optional[VisionBackend]:
+        """Resident backend for ``key`` without loading it or counting a hit."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.model_path == model_path:
+                return entry.backend
+            return None
+
+    def _load(self, key: str, model_path: str) -> VisionBackend:
+        with self._lock:
+            previous = self._entries.get(key)
+            reload = previous is not None and previous.unloaded_idle and previous.model_path == model_path
+
+        start = time.perf_counter()
+        backend = self._load_backend(model_path)
+        memory_mb = backend.memory_mb()
+        if reload and self._reload_warmup is not None:
+            self._reload_warmup(backend)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.model_path != model_path:
+                previous = entry
+                entry = PoolEntry(key, model_path)
+                if previous is not None and previous.backend is not None:
+                    self._release(previous)
+                self._entries[key] = entry
+            entry.backend = backend
+            entry.memory_mb = memory_mb
+            entry.loads += 1
+            entry.last_load_ms = load_ms
+            entry.total_load_ms += load_ms
+            entry.last_used = time.monotonic()
+            if reload:
+                entry.reloads += 1
+                self.idle_events.append(idle_event("reload", key, load_ms=round(load_ms, 1)))
+            entry.unloaded_idle = False
+            self._entries.move_to_end(key)
+            evicted = self._evict(keep=key)
+
+        logger.info(
+            f"Crop model '{key}' loaded in {load_ms:.0f} ms (~{memory_mb:.0f} MB)"
+            + (f", evicted {', '.join(evicted)}" if evicted else "")
+        )
+        return backend
+
+    def _resident(self) -> list[PoolEntry]:
+        return [entry for entry in self._entries.values() if entry.backend is not None]
+
+    def _evict(self, keep: str) -> list[str]:
+        """Drop LRU models over the count / memory budget (caller holds the lock)."""
+        evicted = []
+        while True:
+            resident = self._resident()
+            over_count = len(resident) > self.max_models
+            over_memory = self.memory_budget_mb > 0 and sum(e.memory_mb for e in resident) > self.memory_budget_mb
+            victims = [e for e in resident if e.key != keep]
+            if not (over_count or over_memory) or not victims:
+                return evicted
+            victim = victims[0]  # Oldest first
+            self._release(victim)
+            victim.evictions += 1
+            evicted.append(victim.key)
+
+    def _release(self, entry: PoolEntry):
+        backend, entry.backend = entry.backend, None
+        entry.memory_mb = 0.0
+        self._leases.retire(backend)
+
+    def unload_idle(self, idle_seconds: float) -> list[str]:
+        """Release resident models unused for ``idle_seconds``; returns their keys."""
+        now = time.monotonic()
+        unloaded = []
+        with self._lock:
+            for entry in self._resident():
+                idle = now - entry.last_used
+                if idle < idle_seconds:
+                    continue
+                self._release(entry)
+                entry.idle_unloads += 1
+                entry.unloaded_idle = True
+                self.idle_events.append(idle_event("unload", entry.key, idle_seconds=round(idle, 1)))
+                unloaded.append(entry.key)
+        if unloaded:
+            logger.info(f"Crop model(s) unloaded while idle: {', '.join(unloaded)}")
+        return unloaded
+
+    def stats(self) -> dict:
+        with self._lock:
+            resident = self._resident()
+            return {
+                "max_models": self.max_models,
+                "memory_budget_mb": self.memory_budget_mb,
+                "resident": [entry.key for entry in resident],
+                "resident_mb": round(sum(entry.memory_mb for entry in resident), 1),
+                "leases": self._leases.stats(),
+                "models": {key: entry.to_dict() for key, entry in self._entries.items()},
+                "idle_events": list(self.idle_events),
+            }
+
+    def close(self):
+        """Release every resident model (application shutdown)."""
+        with self._lock:
+            resident = self._resident()
+            for entry in resident:
+                backend, entry.backend = entry.backend, None
+                backend.close()
@@ -0,0 +1,404 @@
+"""
+Topraksız Tarım AI Agent - Vision Model Registry
+Versioned detector weights with background loading, atomic hot swap,
+rollback and retry-with-backoff after load failures.
+"""
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from .vision_backends import BackendLeases, VisionBackend
+
+logger = logging.getLogger(__name__)
+
+# Version states
+MODEL_REGISTERED = "registered"  # Known, never loaded
+MODEL_LOADING = "loading"
+MODEL_ACTIVE = "active"          # Serving requests
+MODEL_FAILED = "failed"          # Last load failed (see error / next retry)
+MODEL_RETIRED = "retired"        # Served before; can be re-activated
+MODEL_UNLOADED = "unloaded"      # Active but released while idle; next request reloads it
+
+# Idle unload/reload events kept for /models/status
+IDLE_EVENT_HISTORY = 16
+
+
+@dataclass
+class ModelVersion:
+    """One registered set of detector weights."""
+    version: str
+    model_path: str
+    status: str = MODEL_REGISTERED
+    registered_at: float = 0.0
+    activated_at: Optional[float] = None
+    load_ms: Optional[float] = None
+    attempts: int = 0                # Consecutive failed loads
+    error: Optional[str] = None
+    next_retry_at: float = 0.0       # time.monotonic() of the next allowed retry
+
+    def to_dict(self) -> dict:
+        retry_in = self.next_retry_at - time.monotonic() if self.status == MODEL_FAILED else 0.0
+        return {
+            "version": self.version,
+            "model_path": self.model_path,
+            "status": self.status,
+            "registered_at": _isoformat(self.registered_at),
+            "activated_at": _isoformat(self.activated_at),
+            "load_ms": round(self.load_ms, 1) if self.load_ms is not None else None,
+            "attempts": self.attempts,
+            "error": self.error,
+            "retry_in_seconds": round(max(0.0, retry_in), 1),
+        }
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat(timespec="seconds") if timestamp else None
+
+
+def idle_event(event: str, model: str, **details) -> dict:
+    return {"event": event, "model": model, "at": _isoformat(time.time()), **details}
+
+
+def default_version_name(model_path: str) -> str:
+    """``<stem>@<mtime>`` so a replaced weights file gets a new version."""
+    path = Path(model_path)
+    try:
+        stamp = datetime.fromtimestamp(path.stat().st_mtime).strftime("%Y%m%d-%H%M%S")
+    except OSError:
+        stamp = "missing"
+    return f"{path.stem}@{stamp}"
+
+
+class ModelRegistry:
+    """
+    Registry of detector versions with exactly one active backend.
+
+    ``activate`` loads a version in a background thread while the current
+    backend keeps serving, optionally warms it (one dummy inference, so the
+    first request after the swap is not slow), then swaps it in under the
+    lock. Requests hold the backend through ``lease``; the previous one is
+    closed when its last in-flight request finishes. ``rollback``
+    re-activates the version that was active before.
+
+    A failed load never disables YOLO for good: the version is retried
+    after ``retry_base_seconds``, doubling up to ``retry_max_seconds``.
+    Background activations retry on their own (at most ``max_attempts``);
+    the initial version is retried lazily by the next request after the
+    backoff has passed. Until then ``get_backend`` raises and callers
+    fall back to color analysis.
+
+    ``unload_if_idle`` releases the active backend once it has not been
+    used for a while (memory-constrained nodes); the version stays active
+    and the next ``get_backend`` reloads it, warmed by ``reload_warmup``
+    when given.
+    """
+
+    def __init__(
+        self,
+        load_backend: Callable[[str], VisionBackend],
+        warmup: Optional[Callable[[VisionBackend], None]] = None,
+        retry_base_seconds: float = 5.0,
+        retry_max_seconds: float = 300.0,
+        max_attempts: int = 5,
+        reload_warmup: Optional[Callable[[VisionBackend], None]] = None
+    ):
+        self._load_backend = load_backend
+        self._warmup = warmup
+        self._reload_warmup = reload_warmup
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.max_attempts = max(1, max_attempts)
+        self._leases = BackendLeases()
+        self._versions: dict[str, ModelVersion] = {}
+        self._active: Optional[str] = None
+        self._backend: Optional[VisionBackend] = None
+        self._history: list[str] = []  # Activation order, for rollback
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()  # Serializes synchronous first loads
+        self._loading: set[str] = set()
+        self.swaps = 0
+        self.last_error: Optional[str] = None
+        self._last_used = time.monotonic()
+        self.idle_unloads = 0
+        self.idle_reloads = 0
+        self.last_reload_ms: Optional[float] = None
+        self.idle_events: deque[dict] = deque(maxlen=IDLE_EVENT_HISTORY)
+
+    # ── Queries ──
+
+    @property
+    def active_version(self) -> Optional[str]:
+        return self._active
+
+    @property
+    def backend(self) -> Optional[VisionBackend]:
+        """Currently loaded backend, without loading anything."""
+        return self._backend
+
+    def get(self, version: str) -> ModelVersion:
+        with self._lock:
+            if version not in self._versions:
+                raise KeyError(f"Unknown model version: {version}")
+            return self._versions[version]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active": self._active,
+                "previous": self._previous_version(),
+                "loaded": self._backend is not None,
+                "swaps": self.swaps,
+                "last_error": self.last_error,
+                "leases": self._leases.stats(),
+                "idle": {
+                    "idle_seconds": round(time.monotonic() - self._last_used, 1),
+                    "unloads": self.idle_unloads,
+                    "reloads": self.idle_reloads,
+                    "last_reload_ms": round(self.last_reload_ms, 1) if self.last_reload_ms is not None else None,
+                    "events": list(self.idle_events),
+                },
+                "versions": [entry.to_dict() for entry in self._versions.values()],
+            }
+
+    def _previous_version(self) -> Optional[str]:
+        for version in reversed(self._history[:-1]):
+            if version != self._active:
+                return version
+        return None
+
+    # ── Registration and activation ──
+
+    def register(self, model_path: str, version: Optional[str] = None) -> ModelVersion:
+        """Add a version (idempotent for the same name and path)."""
+        version = version or default_version_name(model_path)
+        with self._lock:
+            existing = self._versions.get(version)
+            if existing is not None:
+                if existing.model_path != model_path:
+                    raise ValueError(f"Version {version} is already registered for {existing.model_path}")
+                return existing
+            entry = ModelVersion(version, model_path, registered_at=time.time())
+            self._versions[version] = entry
+        logger.info(f"Model version registered: {version} ({model_path})")
+        return entry
+
+    def register_backend(self, version: str, backend: VisionBackend) -> ModelVersion:
+        """Activate an already loaded backend (benchmarks, tests)."""
+        entry = self.register(backend.model_path, version)
+        self._swap(entry, backend, 0.0)
+        return entry
+
+    def set_initial(self, version: str):
+        """Make ``version`` the active one without loading it (first request loads)."""
+        with self._lock:
+            entry = self.get(version)
+            if self._active is None:
+                self._active = version
+                self._history.append(version)
+                entry.status = MODEL_REGISTERED
+
+    def activate(self, version: str, wait: bool = False) -> ModelVersion:
+        """
+        Load ``version`` in the background and swap it in when ready.
+
+        The current backend keeps serving until the swap. With ``wait`` the
+        call blocks until the load finished (successfully or not).
+        """
+        with self._lock:
+            entry = self.get(version)
+            if version == self._active and self._backend is not None:
+                return entry
+            if version in self._loading:
+                thread = None
+            else:
+                self._loading.add(version)
+                entry.status = MODEL_LOADING
+                thread = threading.Thread(
+                    target=self._activate_with_retry,
+                    args=(entry,),
+                    name=f"model-load-{version}",
+                    daemon=True
+                )
+
+        if thread is not None:
+            thread.start()
+            if wait:
+                thread.join()
+        elif wait:
+            while version in self._loading:
+                time.sleep(0.05)
+        return entry
+
+    def rollback(self, wait: bool = False) -> ModelVersion:
+        """Re-activate the version that was active before the current one."""
+        with self._lock:
+            previous = self._previous_version()
+        if previous is None:
+            raise ValueError("No previous model version to roll back to")
+        logger.info(f"Rolling back model {self._active} → {previous}")
+        return self.activate(previous, wait=wait)
+
+    def _activate_with_retry(self, entry: ModelVersion):
+        try:
+            while True:
+                if self._load_and_swap(entry, warm=True):
+                    return
+                if entry.attempts >= self.max_attempts:
+                    logger.error(f"Model {entry.version} gave up after {entry.attempts} attempt(s)")
+                    return
+                time.sleep(max(0.0, entry.next_retry_at - time.monotonic()))
+                with self._lock:
+                    entry.status = MODEL_LOADING
+        finally:
+            with self._lock:
+                self._loading.discard(entry.version)
+
+    def _load_and_swap(self, entry: ModelVersion, warm: bool = False) -> bool:
+        """Load (and warm) ``entry`` outside the lock, then swap it in. False on failure."""
+        start = time.perf_counter()
+        try:
+            backend = self._load_backend(entry.model_path)
+            if warm and self._warmup is not None:
+                self._warmup(backend)
+        except Exception as e:
+            self._record_failure(entry, e)
+            return False
+        self._swap(entry, backend, (time.perf_counter() - start) * 1000)
+        return True
+
+    def _record_failure(self, entry: ModelVersion, error: Exception):
+        with self._lock:
+            entry.attempts += 1
+            delay = min(self.retry_base_seconds * 2 ** (entry.attempts - 1), self.retry_max_seconds)
+            entry.status = MODEL_FAILED
+            entry.error = str(error)
+            entry.next_retry_at = time.monotonic() + delay
+            self.last_error = f"{entry.version}: {error}"
+        logger.error(f"Model {entry.version} failed to load (attempt {entry.attempts}, retry in {delay:.0f}s): {error}")
+
+    def _swap(self, entry: ModelVersion, backend: VisionBackend, load_ms: float):
+        with self._lock:
+            old_backend, old_version = self._backend, self._active
+            self._backend, self._active = backend, entry.version
+            entry.status = MODEL_ACTIVE
+            entry.activated_at = time.time()
+            entry.load_ms = load_ms
+            entry.attempts = 0
+            entry.error = None
+            if old_version is not None and old_version != entry.version:
+                self._versions[old_version].status = MODEL_RETIRED
+                self.swaps += 1
+            if not self._history or self._history[-1] != entry.version:
+                self._history.append(entry.version)
+        logger.info(f"Model {entry.version} active (loaded in {load_ms:.0f} ms)")
+
+        if old_backend is not None and old_backend is not backend:
+            # Closed once in-flight requests on it have finished
+            self._leases.retire(old_backend)
+
+    # ── Serving ──
+
+    def get_backend(self) -> VisionBackend:
+        """
+        Backend of the active version; loads it on first use.
+
+        Raises when no version is active or the active version failed and
+        its retry backoff has not passed yet.
+        """
+        self._last_used = time.monotonic()  # Before the read, so an idle unload cannot race it
+        backend = self._backend
+        if backend is not None:
+            return backend
+
+        with self._load_lock:
+            with self._lock:
+                if self._backend is not None:
+                    return self._backend
+                if self._active is None:
+                    raise RuntimeError("No active vision model version")
+                entry = self._versions[self._active]
+                wait = entry.next_retry_at - time.monotonic()
+                if entry.status == MODEL_FAILED and wait > 0:
+                    raise RuntimeError(f"Model {entry.version} failed to load (retry in {wait:.0f}s): {entry.error}")
+                reload = entry.status == MODEL_UNLOADED
+                entry.status = MODEL_LOADING
+
+            if reload:
+                self._reload(entry)
+            elif not self._load_and_swap(entry):
+                raise RuntimeError(f"Model {entry.version} failed to load: {entry.error}")
+            return self._backend
+
+    @contextmanager
+    def lease(self) -> Iterator[VisionBackend]:
+        """
+        Backend of the active version, kept open until the block exits.
+
+        A swap or idle unload during the block retires the backend only
+        after the block is done with it.
+        """
+        while True:
+            backend = self.get_backend()
+            with self._lock:
+                # Swapped out between the load and here: take the new one
+                if self._backend is backend:
+                    self._leases.acquire(backend)
+                    break
+        try:
+            yield backend
+        finally:
+            self._leases.release(backend)
+
+    def _reload(self, entry: ModelVersion):
+        """Reload an idle-unloaded version (warmed when configured)."""
+        start = time.perf_counter()
+        try:
+            backend = self._load_backend(entry.model_path)
+            if self._reload_warmup is not None:
+                self._reload_warmup(backend)
+        except Exception as e:
+            self._record_failure(entry, e)
+            raise RuntimeError(f"Model {entry.version} failed to reload: {entry.error}")
+        load_ms = (time.perf_counter() - start) * 1000
+        self._swap(entry, backend, load_ms)
+        with self._lock:
+            self.idle_reloads += 1
+            self.last_reload_ms = load_ms
+            self.idle_events.append(idle_event("reload", entry.version, load_ms=round(load_ms, 1)))
+
+    def unload_if_idle(self, idle_seconds: float) -> Optional[str]:
+        """
+        Release the active backend when unused for ``idle_seconds``.
+
+        Returns the unloaded version (None when nothing was unloaded). The
+        backend is closed once in-flight requests on it have finished, like
+        a swapped-out one, and its memory handed back to the OS.
+        """
+        with self._lock:
+            idle = time.monotonic() - self._last_used
+            if self._backend is None or self._loading or idle < idle_seconds:
+                return None
+            backend, self._backend = self._backend, None
+            entry = self._versions[self._active]
+            entry.status = MODEL_UNLOADED
+            self.idle_unloads += 1
+            self.idle_events.append(idle_event("unload", entry.version, idle_seconds=round(idle, 1)))
+
+        logger.info(f"Model {entry.version} unloaded after {idle:.0f}s idle")
+        self._leases.retire(backend)
+        return entry.version
+
+    def close(self):
+        """Release the active backend (application shutdown)."""
+        with self._lock:
+            backend, self._backend = self._backend, None
+            if self._active is not None and self._versions[self._active].status == MODEL_ACTIVE:
+                self._versions[self._active].status = MODEL_REGISTERED
+        if backend is not None:
+            backend.close()
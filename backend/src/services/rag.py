@@ -2,20 +2,35 @@
 Topraksız Tarım AI Agent - RAG Service
 Vector search and answer generation with fallback knowledge.
 """
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, FieldCondition, Filter, MatchValue, VectorParams, PointStruct
+import asyncio
 import httpx
 import logging
+import time
 from typing import Optional
 import uuid
 
 from .embeddings import get_single_embedding
+from .retrieval_cache import get_retrieval_cache, retrieval_key
 
 logger = logging.getLogger(__name__)
 
 # Global Qdrant client
-_qdrant_client: Optional[QdrantClient] = None
+_qdrant_client: Optional[AsyncQdrantClient] = None
 _qdrant_available: bool = False
+_qdrant_lock: Optional[asyncio.Lock] = None
+_qdrant_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+_qdrant_retry_at: float = 0.0
+
+# Delay before reconnecting after Qdrant was unreachable
+QDRANT_RETRY_SECONDS = 30.0
+
+# Knowledge-base version: one point in a side collection, rewritten by every
+# ingest so the retrieval caches of all nodes invalidate
+VERSION_POINT_ID = "00000000-0000-0000-0000-000000000001"
+_collection_version: Optional[str] = None
+_version_checked_at: float = 0.0
 
 # Fallback knowledge when Qdrant is not available
 FALLBACK_KNOWLEDGE = {
@@ -79,27 +94,58 @@ Koruyucu Önlemler:
 }
 
 
-def get_qdrant_client(settings) -> Optional[QdrantClient]:
-    """Get or create Qdrant client with connection check."""
-    global _qdrant_client, _qdrant_available
+def _get_init_lock() -> asyncio.Lock:
+    """Lock serializing client creation on the running event loop."""
+    global _qdrant_lock, _qdrant_lock_loop
+    loop = asyncio.get_running_loop()
+    if _qdrant_lock is None or _qdrant_lock_loop is not loop:
+        _qdrant_lock = asyncio.Lock()
+        _qdrant_lock_loop = loop
+    return _qdrant_lock
+
+
+async def get_qdrant_client(settings) -> Optional[AsyncQdrantClient]:
+    """
+    Get or create the shared async Qdrant client with connection check.
     
-    if _qdrant_client is None:
-        try:
-            _qdrant_client = QdrantClient(
-                host=settings.qdrant_host,
-                port=settings.qdrant_port,
-                timeout=10.0
+    Creation runs under a lock, so concurrent first requests share one
+    client. With ``qdrant_prefer_grpc`` data calls use the gRPC port (the
+    connection limit applies to REST only). After a failed connection the
+    next attempt waits ``QDRANT_RETRY_SECONDS``; until then callers use
+    fallback knowledge.
+    """
+    global _qdrant_client, _qdrant_available, _qdrant_retry_at
+    
+    if _qdrant_available:
+        return _qdrant_client
+    
+    async with _get_init_lock():
+        if _qdrant_available:
+            return _qdrant_client
+        if time.monotonic() < _qdrant_retry_at:
+            return None
+        
+        client = AsyncQdrantClient(
+            host=settings.qdrant_host,
+            port=settings.qdrant_port,
+            grpc_port=settings.qdrant_grpc_port,
+            prefer_grpc=settings.qdrant_prefer_grpc,
+            timeout=settings.qdrant_timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=settings.qdrant_max_connections,
+                max_keepalive_connections=settings.qdrant_max_connections
             )
+        )
+        try:
             # Test connection
-            collections = _qdrant_client.get_collections()
-            _qdrant_available = True
-            logger.info("Qdrant connection established")
+            collections = await asyncio.wait_for(client.get_collections(), settings.qdrant_timeout_seconds)
+            logger.info(f"Qdrant connection established ({'gRPC' if settings.qdrant_prefer_grpc else 'REST'})")
             
             # Ensure collection exists — check by listing, not by get
             existing = [c.name for c in collections.collections]
             if settings.qdrant_collection not in existing:
                 logger.info(f"Creating collection: {settings.qdrant_collection}")
-                _qdrant_client.create_collection(
+                await client.create_collection(
                     collection_name=settings.qdrant_collection,
                     vectors_config=VectorParams(size=768, distance=Distance.COSINE)
                 )
@@ -108,9 +154,90 @@ def get_qdrant_client(settings) -> Optional[QdrantClient]:
                 
         except Exception as e:
             logger.warning(f"Qdrant not available: {e}. Using fallback knowledge.")
-            _qdrant_available = False
+            _qdrant_retry_at = time.monotonic() + QDRANT_RETRY_SECONDS
+            await client.close()
+            return None
+        
+        _qdrant_client, _qdrant_available = client, True
+    
+    return _qdrant_client
+
+
+async def close_qdrant_client():
+    """Close the shared Qdrant client (application shutdown)."""
+    global _qdrant_client, _qdrant_available
+    
+    client, _qdrant_client, _qdrant_available = _qdrant_client, None, False
+    if client is not None:
+        await client.close()
+
+
+def _meta_collection(settings) -> str:
+    return f"{settings.qdrant_collection}_meta"
+
+
+async def get_collection_version(client: AsyncQdrantClient, settings) -> Optional[str]:
+    """
+    Current knowledge-base version, re-read from Qdrant at most every
+    ``retrieval_version_check_seconds`` (None when it cannot be read).
+    """
+    global _collection_version, _version_checked_at
     
-    return _qdrant_client if _qdrant_available else None
+    now = time.monotonic()
+    if _collection_version is not None and now - _version_checked_at < settings.retrieval_version_check_seconds:
+        return _collection_version
+    
+    meta = _meta_collection(settings)
+    try:
+        collections = await asyncio.wait_for(client.get_collections(), settings.qdrant_timeout_seconds)
+        if meta not in [c.name for c in collections.collections]:
+            version = "initial"  # Nothing ingested through add_document yet
+        else:
+            points = await asyncio.wait_for(
+                client.retrieve(collection_name=meta, ids=[VERSION_POINT_ID]),
+                settings.qdrant_timeout_seconds
+            )
+            version = str(points[0].payload.get("version")) if points else "initial"
+    except Exception as e:
+        logger.warning(f"Could not read knowledge-base version: {e}")
+        return None
+    
+    _collection_version, _version_checked_at = version, now
+    return version
+
+
+async def bump_collection_version(client: AsyncQdrantClient, settings) -> str:
+    """Store a new knowledge-base version (after an ingest)."""
+    global _collection_version, _version_checked_at
+    
+    version = uuid.uuid4().hex  # Random, so concurrent ingests on two nodes never collide
+    meta = _meta_collection(settings)
+    try:
+        collections = await client.get_collections()
+        if meta not in [c.name for c in collections.collections]:
+            await client.create_collection(
+                collection_name=meta,
+                vectors_config=VectorParams(size=1, distance=Distance.DOT)
+            )
+        await client.upsert(
+            collection_name=meta,
+            points=[PointStruct(id=VERSION_POINT_ID, vector=[0.0], payload={"version": version, "updated_at": time.time()})]
+        )
+    except Exception as e:
+        logger.warning(f"Could not store knowledge-base version: {e}")
+    
+    # This node invalidates immediately, others within the version check interval
+    _collection_version, _version_checked_at = version, time.monotonic()
+    logger.info(f"Knowledge-base version bumped to {version}")
+    return version
+
+
+def retrieval_cache_status(settings) -> dict:
+    """Retrieval cache counters plus the knowledge-base version they are keyed by."""
+    cache = get_retrieval_cache(settings)
+    if cache is None:
+        return {"enabled": False}
+    return {**cache.stats(), "collection_version": _collection_version}
 
 
 def get_fallback_knowledge(query: str, detections: list = None) -> list[dict]:
@@ -167,16 +294,22 @@ async def search_knowledge_base(
     query: str,
     top_k: int = 5,
     settings = None,
-    detections: list = None
+    detections: list = None,
+    filters: Optional[dict] = None
 ) -> list[dict]:
     """
     Search the agricultural knowledge base with Qdrant fallback.
     
+    Qdrant results are cached per (query, top_k, filters, knowledge-base
+    version); an ingest bumps the version, so cached results never
+    outlive the corpus they came from.
+    
     Args:
         query: Search query
         top_k: Number of results
         settings: Application settings
         detections: Vision detections for context
+        filters: Exact-match payload conditions, e.g. ``{"source": "guide.pdf"}``
         
     Returns:
         List of relevant documents
@@ -187,19 +320,37 @@ async def search_knowledge_base(
         settings = get_settings()
     
     # Try Qdrant first
-    client = get_qdrant_client(settings)
+    client = await get_qdrant_client(settings)
     
-    if client and _qdrant_available:
+    if client:
+        cache = get_retrieval_cache(settings)
+        cache_key = None
+        if cache is not None:
+            version = await get_collection_version(client, settings)
+            if version is not None:
+                cache_key = retrieval_key(version, query, top_k, filters)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"Retrieval cache hit for '{query[:60]}'")
+                    return cached
+        
         try:
             # Get query embedding
             query_embedding = await get_single_embedding(query, settings)
             
             if query_embedding and not all(v == 0 for v in query_embedding):
                 try:
-                    results = client.query_points(
-                        collection_name=settings.qdrant_collection,
-                        query=query_embedding,
-                        limit=top_k
+                    results = await asyncio.wait_for(
+                        client.query_points(
+                            collection_name=settings.qdrant_collection,
+                            query=query_embedding,
+                            query_filter=Filter(must=[
+                                FieldCondition(key=key, match=MatchValue(value=value))
+                                for key, value in filters.items()
+                            ]) if filters else None,
+                            limit=top_k
+                        ),
+                        settings.qdrant_timeout_seconds
                     )
                     
                     if results.points:
@@ -213,6 +364,8 @@ async def search_knowledge_base(
                                 "content": payload.get("content", ""),
                                 "source": "qdrant"
                             })
+                        if cache_key is not None:
+                            cache.put(cache_key, documents)
                         return documents
                 except Exception as e:
                     logger.error(f"Error querying Qdrant: {e}")
@@ -315,7 +468,8 @@ async def add_document(
     metadata: dict = None,
     settings = None,
     chunk_size: int = 1000,
-    chunk_overlap: int = 200
+    chunk_overlap: int = 200,
+    bump_version: bool = True
 ) -> str:
     """
     Add a document to the knowledge base with automatic chunking.
@@ -332,6 +486,7 @@ async def add_document(
         settings: Application settings
         chunk_size: Max characters per chunk (default 1000)
         chunk_overlap: Character overlap between chunks (default 200)
+        bump_version: Invalidate cached searches afterwards (bulk loads bump once at the end)
         
     Returns:
         doc_id: The parent document ID (all chunks share this)
@@ -342,7 +497,7 @@ async def add_document(
     if settings is None:
         settings = get_settings()
     
-    client = get_qdrant_client(settings)
+    client = await get_qdrant_client(settings)
     if not client:
         raise Exception("Qdrant is not available")
     
@@ -393,10 +548,12 @@ async def add_document(
             )
         
         # ── Batch upsert to Qdrant ──
-        client.upsert(
+        await client.upsert(
             collection_name=settings.qdrant_collection,
             points=points
         )
+        if bump_version:
+            await bump_collection_version(client, settings)
         
         logger.info(f"Added document '{title}' ({len(chunks)} chunks) with doc_id: {doc_id}")
         return doc_id
@@ -421,9 +578,17 @@ async def add_documents_bulk(
         - source (str): Source identifier
         - metadata (dict): Additional metadata
     
+    The knowledge-base version is bumped once after the batch, not per
+    document, so cached searches are invalidated a single time.
+    
     Returns:
         List of doc_ids for each ingested document.
     """
+    from ..config import get_settings
+    
+    if settings is None:
+        settings = get_settings()
+    
     doc_ids = []
     for i, doc in enumerate(documents, 1):
         try:
@@ -434,12 +599,18 @@ async def add_documents_bulk(
                 metadata=doc.get("metadata"),
                 settings=settings,
                 chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap
+                chunk_overlap=chunk_overlap,
+                bump_version=False
             )
             doc_ids.append(doc_id)
         except Exception as e:
             logger.error(f"Failed to ingest document {i} ('{doc.get('title', '?')}'): {e}")
             doc_ids.append(None)
     
+    if any(doc_ids):
+        client = await get_qdrant_client(settings)
+        if client is not None:
+            await bump_collection_version(client, settings)
+    
     logger.info(f"Bulk ingestion complete: {len([d for d in doc_ids if d])}/{len(documents)} succeeded")
     return doc_ids
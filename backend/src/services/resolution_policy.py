@@ -0,0 +1,173 @@
+"""
+Topraksız Tarım AI Agent - Adaptive Inference Resolution
+Picks the YOLO input size per image from its content and the current
+inference load.
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+import logging
+import threading
+from typing import Optional
+
+from .vision_backends import DEFAULT_IMGSZ
+
+logger = logging.getLogger(__name__)
+
+# YOLOv8 strides: input sizes must be multiples of this
+IMGSZ_STRIDE = 32
+
+# Load levels
+LOAD_NORMAL = "normal"
+LOAD_ELEVATED = "elevated"    # Step down one size
+LOAD_OVERLOAD = "overload"    # Drop to the minimum size
+
+
+def round_imgsz(value: float) -> int:
+    """Nearest multiple of the model stride (at least one stride)."""
+    return max(IMGSZ_STRIDE, int(round(value / IMGSZ_STRIDE)) * IMGSZ_STRIDE)
+
+
+@dataclass
+class ResolutionChoice:
+    """Input size picked for one image and why."""
+    imgsz: int
+    load: str = LOAD_NORMAL
+    queue_depth: int = 0
+    reasons: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "imgsz": self.imgsz,
+            "policy": "adaptive",
+            "load": self.load,
+            "queue_depth": self.queue_depth,
+            "reasons": list(self.reasons),
+        }
+
+
+class ResolutionPolicy:
+    """
+    Content- and load-aware choice of ``imgsz``.
+
+    Content: a close-up (plant pixels above ``closeup_coverage``) shows
+    large lesions and runs one step below ``base_imgsz``; a wide bench
+    shot (below ``wide_coverage``) shows small ones and runs one step
+    above. Elongated frames (long/short side >= ``elongated_aspect``)
+    get one more step, since letterboxing shrinks their short side. The
+    size never exceeds the image's own long side.
+
+    Load: from half of ``overload_queue_depth`` waiting executor tasks
+    the size steps down once more; at ``overload_queue_depth`` it drops
+    to ``min_imgsz``. Results are clamped to ``[min_imgsz, max_imgsz]``
+    and rounded to the model stride.
+    """
+
+    def __init__(
+        self,
+        base_imgsz: int = DEFAULT_IMGSZ,
+        min_imgsz: int = 320,
+        max_imgsz: int = 960,
+        step: float = 1.25,
+        closeup_coverage: float = 0.6,
+        wide_coverage: float = 0.2,
+        elongated_aspect: float = 2.0,
+        overload_queue_depth: int = 8
+    ):
+        self.base_imgsz = base_imgsz
+        self.min_imgsz = round_imgsz(min_imgsz)
+        self.max_imgsz = max(self.min_imgsz, round_imgsz(max_imgsz))
+        self.step = max(1.0, step)
+        self.closeup_coverage = closeup_coverage
+        self.wide_coverage = wide_coverage
+        self.elongated_aspect = elongated_aspect
+        self.overload_queue_depth = max(1, overload_queue_depth)
+        self._lock = threading.Lock()
+        self._sizes: Counter[int] = Counter()
+        self._loads: Counter[str] = Counter()
+
+    def load_level(self, queue_depth: int) -> str:
+        if queue_depth >= self.overload_queue_depth:
+            return LOAD_OVERLOAD
+        if queue_depth >= max(1, self.overload_queue_depth // 2):
+            return LOAD_ELEVATED
+        return LOAD_NORMAL
+
+    def choose(self, image_size: tuple[int, int], plant_coverage: float, queue_depth: int = 0) -> ResolutionChoice:
+        """Pick ``imgsz`` for an image of ``image_size`` (working pixels)."""
+        reasons = []
+        imgsz = float(self.base_imgsz)
+
+        if plant_coverage >= self.closeup_coverage:
+            imgsz /= self.step
+            reasons.append("close-up")
+        elif plant_coverage < self.wide_coverage:
+            imgsz *= self.step
+            reasons.append("wide shot")
+
+        long_side, short_side = max(image_size), max(1, min(image_size))
+        if long_side / short_side >= self.elongated_aspect:
+            imgsz *= self.step
+            reasons.append("elongated")
+
+        # Upscaling past the source resolution adds compute, not detail
+        source_cap = -(-long_side // IMGSZ_STRIDE) * IMGSZ_STRIDE
+        if imgsz > source_cap:
+            imgsz = source_cap
+            reasons.append("source resolution")
+
+        load = self.load_level(queue_depth)
+        if load == LOAD_OVERLOAD:
+            imgsz = self.min_imgsz
+            reasons.append("overload")
+        elif load == LOAD_ELEVATED:
+            imgsz /= self.step
+            reasons.append("elevated load")
+
+        choice = ResolutionChoice(
+            imgsz=min(self.max_imgsz, max(self.min_imgsz, round_imgsz(imgsz))),
+            load=load,
+            queue_depth=queue_depth,
+            reasons=reasons
+        )
+        with self._lock:
+            self._sizes[choice.imgsz] += 1
+            self._loads[load] += 1
+        return choice
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "base_imgsz": self.base_imgsz,
+                "min_imgsz": self.min_imgsz,
+                "max_imgsz": self.max_imgsz,
+                "overload_queue_depth": self.overload_queue_depth,
+                "imgsz_histogram": {str(size): count for size, count in sorted(self._sizes.items())},
+                "load_levels": dict(self._loads),
+            }
+
+
+# Global policy instance (lazy created)
+_resolution_policy: Optional[ResolutionPolicy] = None
+
+
+def get_resolution_policy(settings) -> Optional[ResolutionPolicy]:
+    """Get or create the resolution policy (None when adaptive imgsz is disabled)."""
+    global _resolution_policy
+
+    if not settings.adaptive_imgsz_enabled:
+        return None
+
+    if _resolution_policy is None:
+        _resolution_policy = ResolutionPolicy(
+            min_imgsz=settings.adaptive_imgsz_min,
+            max_imgsz=settings.adaptive_imgsz_max,
+            closeup_coverage=settings.adaptive_closeup_coverage,
+            wide_coverage=settings.adaptive_wide_coverage,
+            elongated_aspect=settings.adaptive_elongated_aspect,
+            overload_queue_depth=settings.adaptive_overload_queue_depth
+        )
+        logger.info(
+            f"Adaptive inference resolution enabled: "
+            f"{_resolution_policy.min_imgsz}-{_resolution_policy.max_imgsz} px"
+        )
+    return _resolution_policy
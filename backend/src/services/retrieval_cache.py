@@ -0,0 +1,102 @@
+"""
+Topraksız Tarım AI Agent - Retrieval Cache
+Knowledge-base search results keyed by query, top_k, filters and the
+collection version, so repeated searches skip embedding and Qdrant.
+"""
+from collections import OrderedDict
+import copy
+import json
+import logging
+import threading
+import time
+from typing import Optional
+
+from .embedding_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+def retrieval_key(version: str, query: str, top_k: int, filters: Optional[dict] = None) -> tuple:
+    """Cache key of one search against collection ``version``."""
+    return version, normalize_text(query), top_k, json.dumps(filters or {}, sort_keys=True, default=str)
+
+
+class RetrievalCache:
+    """
+    LRU + TTL cache of search results.
+
+    The collection version is part of every key: after an ingest bumps
+    it, old entries are never served again and age out of the LRU.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple, tuple[float, list[dict]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: tuple) -> Optional[list[dict]]:
+        """Copy of the cached documents for ``key``, or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds > 0 and now - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key: tuple, documents: list[dict]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(documents))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": True,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Global cache instance (lazy created)
+_retrieval_cache: Optional[RetrievalCache] = None
+
+
+def get_retrieval_cache(settings) -> Optional[RetrievalCache]:
+    """Get the process-wide retrieval cache, or None when caching is disabled."""
+    global _retrieval_cache
+
+    if not settings.retrieval_cache_enabled:
+        return None
+
+    if _retrieval_cache is None:
+        _retrieval_cache = RetrievalCache(
+            max_entries=settings.retrieval_cache_max_entries,
+            ttl_seconds=settings.retrieval_cache_ttl_seconds
+        )
+    return _retrieval_cache
@@ -0,0 +1,114 @@
+"""
+Topraksız Tarım AI Agent - Tiled Inference Helpers
+Overlapping tile planning and cross-tile detection merging for high-resolution images.
+"""
+from dataclasses import dataclass
+import logging
+from typing import Optional
+
+import numpy as np
+
+from .vision_backends import non_max_suppression
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Tile:
+    """One crop window in working-image pixels."""
+    x: int
+    y: int
+    width: int
+    height: int
+    vegetation: float = 1.0  # Share of plant-colored pixels (green/earth)
+
+    @property
+    def box(self) -> tuple[int, int, int, int]:
+        return self.x, self.y, self.x + self.width, self.y + self.height
+
+
+def _axis_starts(length: int, tile: int, stride: int) -> list[int]:
+    """Tile origins along one axis; the last tile is aligned to the edge."""
+    if length <= tile:
+        return [0]
+    starts = list(range(0, length - tile, stride))
+    starts.append(length - tile)
+    return starts
+
+
+def plan_tiles(width: int, height: int, tile_size: int, overlap: float) -> list[Tile]:
+    """Cover a ``width`` x ``height`` image with overlapping square tiles."""
+    stride = max(1, int(tile_size * (1.0 - overlap)))
+    return [
+        Tile(x=x, y=y, width=min(tile_size, width), height=min(tile_size, height))
+        for y in _axis_starts(height, tile_size, stride)
+        for x in _axis_starts(width, tile_size, stride)
+    ]
+
+
+def score_vegetation(
+    tiles: list[Tile],
+    class_map: np.ndarray,
+    image_size: tuple[int, int],
+    plant_bits: int
+) -> list[Tile]:
+    """
+    Attach a vegetation ratio to each tile from the fused color class map.
+
+    The class map is the (downsampled) per-pixel bitmask already computed
+    for plant validation, so this costs one slice + mean per tile.
+    """
+    map_h, map_w = class_map.shape
+    sx, sy = map_w / image_size[0], map_h / image_size[1]
+    plant = (class_map & plant_bits) != 0
+
+    for tile in tiles:
+        x1, y1 = int(tile.x * sx), int(tile.y * sy)
+        x2 = max(x1 + 1, int((tile.x + tile.width) * sx))
+        y2 = max(y1 + 1, int((tile.y + tile.height) * sy))
+        tile.vegetation = float(plant[y1:y2, x1:x2].mean())
+    return tiles
+
+
+def merge_tile_detections(
+    tile_detections: list[list[dict]],
+    tiles: list[Tile],
+    iou_threshold: float,
+    scale: Optional[tuple[float, float]] = None
+) -> list[dict]:
+    """
+    Map per-tile boxes to global coordinates and remove cross-tile duplicates.
+
+    Args:
+        tile_detections: Detections per tile, bboxes in tile pixels
+        tiles: The tiles the detections came from
+        iou_threshold: IoU above which same-class boxes are merged
+        scale: Optional factor from the tiled image back to working pixels
+
+    Returns:
+        Merged detections in working-image coordinates, highest confidence first
+    """
+    sx, sy = scale or (1.0, 1.0)
+    merged = []
+    for tile, detections in zip(tiles, tile_detections):
+        for det in detections:
+            x1, y1, x2, y2 = det["bbox"]
+            merged.append({
+                **det,
+                "bbox": [
+                    (x1 + tile.x) * sx, (y1 + tile.y) * sy,
+                    (x2 + tile.x) * sx, (y2 + tile.y) * sy
+                ],
+            })
+
+    if len(merged) < 2:
+        return merged
+
+    boxes = np.array([d["bbox"] for d in merged], dtype=np.float32)
+    scores = np.array([d["confidence"] for d in merged], dtype=np.float32)
+    class_index = {name: i for i, name in enumerate(sorted({d["class_name"] for d in merged}))}
+    class_ids = np.array([class_index[d["class_name"]] for d in merged])
+
+    keep = non_max_suppression(boxes, scores, class_ids, iou_threshold, max_detections=len(merged))
+    logger.info(f"Cross-tile NMS: {len(merged)} → {len(keep)} detections")
+    return [merged[i] for i in keep]
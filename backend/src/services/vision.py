@@ -4,292 +4,941 @@ YOLO-based plant disease detection with robust fallback color analysis.
 """
 from ultralytics import YOLO
 from PIL import Image
+import cv2
+import asyncio
+import copy
 import io
 import logging
+import threading
 import numpy as np
 import torch
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from .cascade import SCREEN_NON_PLANT, CascadeScreen, ScreenDecision
+from .change_detection import CHANGE_PARTIAL, CHANGE_UNCHANGED, ChangeReport, changed_regions, get_change_detector
+from .inference_executor import get_inference_executor
+from .micro_batcher import MicroBatcher
+from .model_pool import VisionModelPool
+from .model_registry import ModelRegistry
+from .resolution_policy import LOAD_NORMAL, ResolutionChoice, get_resolution_policy
+from .vision_backends import DEFAULT_IMGSZ, OnnxBackend, UltralyticsBackend, VisionBackend
+from .tiling import merge_tile_detections, plan_tiles, score_vegetation
+from .vision_cache import get_vision_cache, hash_image_bytes
+from .vision_workers import ProcessPoolBackend
 
 logger = logging.getLogger(__name__)
 
-# Global model instance (lazy loaded)
-_yolo_model = None
-_yolo_load_error = None
+# Versioned detector weights; owns the active inference backend (lazy created)
+_model_registry: Optional[ModelRegistry] = None
+_model_registry_lock = threading.Lock()
+# Per-crop detectors with LRU residency (lazy created)
+_crop_model_pool: Optional[VisionModelPool] = None
+# Coalesces concurrent single-image requests into one forward pass
+_micro_batcher: Optional[MicroBatcher] = None
+# Cheap-first color screen in front of YOLO (lazy created)
+_cascade_screen: Optional[CascadeScreen] = None
 
 
-def get_yolo_model(model_path: str) -> YOLO:
-    """Get or load the YOLO model with PyTorch 2.6+ compatibility."""
-    global _yolo_model, _yolo_load_error
+def load_yolo_model(model_path: str, fallback: bool = False) -> YOLO:
+    """
+    Load YOLO weights with PyTorch 2.6+ compatibility.
 
-    if _yolo_model is not None:
-        return _yolo_model
+    A missing file raises ``FileNotFoundError``, except with ``fallback``
+    (the legacy fp32 default), which serves the stock yolov8n instead.
+    """
+    model_file = Path(model_path)
+    if not model_file.exists():
+        if not fallback:
+            raise FileNotFoundError(f"YOLO model not found at {model_path}")
+        logger.warning(f"Custom model not found at {model_path}, trying default yolov8n")
+        return YOLO("yolov8n.pt")
 
-    if _yolo_load_error is not None:
-        # Already failed once, don't retry to avoid blocking
-        raise RuntimeError(f"YOLO model previously failed: {_yolo_load_error}")
+    logger.info(f"Loading custom YOLO model from {model_path}")
 
+    # Fix for PyTorch 2.6+: Add ultralytics safe globals
     try:
-        model_file = Path(model_path)
-        if not model_file.exists():
-            logger.warning(f"Custom model not found at {model_path}, trying default yolov8n")
-            _yolo_model = YOLO("yolov8n.pt")
-            return _yolo_model
+        import ultralytics.nn.tasks as tasks
+        safe_classes = []
+        for attr_name in ['DetectionModel', 'SegmentationModel', 'ClassificationModel', 'PoseModel']:
+            cls = getattr(tasks, attr_name, None)
+            if cls is not None:
+                safe_classes.append(cls)
+        if safe_classes:
+            torch.serialization.add_safe_globals(safe_classes)
+            logger.info(f"Registered {len(safe_classes)} safe globals for PyTorch 2.6+")
+    except Exception as e:
+        logger.warning(f"Could not register safe globals (older PyTorch?): {e}")
+
+    model = YOLO(model_path)
+    logger.info("YOLO model loaded successfully")
+    return model
+
+
+def active_model_path(settings) -> str:
+    """Weights file used by the configured inference backend and precision."""
+    if settings.vision_precision == "int8":
+        return settings.int8_model_path
+    if settings.vision_backend == "onnx":
+        return settings.onnx_model_path
+    return settings.yolo_model_path
+
+
+def _create_vision_backend(settings, model_path: Optional[str] = None) -> VisionBackend:
+    """
+    Instantiate the backend selected by ``settings.vision_backend``.
+
+    ``model_path`` defaults to ``active_model_path(settings)``; the model
+    registry passes the weights of the version being activated. With
+    ``vision_precision=int8`` both backends serve the statically
+    quantized ONNX artifact (ultralytics loads ONNX files through its own
+    ONNX Runtime wrapper). With ``vision_process_workers > 0`` the model
+    lives in worker processes instead (see ``vision_workers``).
+
+    Missing weights raise ``FileNotFoundError``; only the fp32
+    ``yolo_model_path`` default still falls back to the stock yolov8n.
+    """
+    if settings.vision_precision not in ("fp32", "int8"):
+        raise ValueError(f"Unknown vision precision: {settings.vision_precision}")
+    model_path = model_path or active_model_path(settings)
+
+    if settings.vision_process_workers > 0:
+        return ProcessPoolBackend(settings, model_path)
+    if settings.vision_backend == "onnx":
+        return OnnxBackend(
+            model_path,
+            intra_op_threads=settings.onnx_intra_op_threads,
+            precision=settings.vision_precision
+        )
+    if settings.vision_backend != "ultralytics":
+        raise ValueError(f"Unknown vision backend: {settings.vision_backend}")
+    fallback = settings.vision_precision == "fp32" and model_path == settings.yolo_model_path
+    model = load_yolo_model(model_path, fallback=fallback)
+    return UltralyticsBackend(model, model_path, precision=settings.vision_precision)
+
+
+def _warm_backend(backend: VisionBackend, settings, image: Optional[Image.Image] = None):
+    """One dummy inference so the first real request skips lazy initialization."""
+    image = image or Image.new("RGB", (DEFAULT_IMGSZ, DEFAULT_IMGSZ), (60, 140, 60))
+    backend.predict([image], conf=settings.yolo_confidence_threshold, iou=settings.yolo_iou_threshold)
+
+
+def _reload_warmup(settings) -> Optional[Callable[[VisionBackend], None]]:
+    """Warm-up for models reloaded after an idle unload (None = cold reload)."""
+    if not settings.vision_idle_reload_warmup:
+        return None
+    return lambda backend: _warm_backend(backend, settings)
+
+
+def get_model_registry(settings) -> ModelRegistry:
+    """
+    Get or create the model registry.
+
+    The configured weights (``active_model_path``) become the initial
+    version; they are loaded by the first request, as before.
+    """
+    global _model_registry
+
+    if _model_registry is None:
+        with _model_registry_lock:
+            if _model_registry is None:
+                registry = ModelRegistry(
+                    load_backend=lambda path: _create_vision_backend(settings, path),
+                    warmup=(lambda backend: _warm_backend(backend, settings)) if settings.vision_model_swap_warmup else None,
+                    retry_base_seconds=settings.vision_model_retry_seconds,
+                    retry_max_seconds=settings.vision_model_retry_max_seconds,
+                    max_attempts=settings.vision_model_max_attempts,
+                    reload_warmup=_reload_warmup(settings)
+                )
+                initial = registry.register(active_model_path(settings))
+                registry.set_initial(initial.version)
+                _model_registry = registry
+    return _model_registry
+
+
+def get_vision_backend(settings) -> VisionBackend:
+    """Backend of the active model version (ultralytics or onnx), loaded on first use."""
+    return get_model_registry(settings).get_backend()
+
+
+def available_crops(settings) -> list[str]:
+    """Crops with a detector: the default model's crop plus ``crop_models``."""
+    return sorted({settings.default_crop, *settings.crop_models})
+
+
+def crop_model_path(settings, crop: Optional[str]) -> Optional[str]:
+    """Weights of ``crop``'s own detector; None when the default model serves it."""
+    if not crop or crop == settings.default_crop:
+        return None
+    if crop not in settings.crop_models:
+        raise ValueError(f"Unknown crop '{crop}' (available: {', '.join(available_crops(settings))})")
+    return settings.crop_models[crop]
+
+
+def get_crop_model_pool(settings) -> VisionModelPool:
+    """Get or create the pool of per-crop detectors."""
+    global _crop_model_pool
+
+    if _crop_model_pool is None:
+        with _model_registry_lock:
+            if _crop_model_pool is None:
+                _crop_model_pool = VisionModelPool(
+                    load_backend=lambda path: _create_vision_backend(settings, path),
+                    max_models=settings.crop_pool_max_models,
+                    memory_budget_mb=settings.crop_pool_memory_budget_mb,
+                    reload_warmup=_reload_warmup(settings)
+                )
+    return _crop_model_pool
+
+
+@contextmanager
+def crop_backend(settings, crop: Optional[str] = None) -> Iterator[VisionBackend]:
+    """
+    Backend serving ``crop`` (the registry's active model or a pooled crop
+    model), leased so a swap or eviction cannot close it mid-predict.
+    """
+    model_path = crop_model_path(settings, crop)
+    if model_path is None:
+        lease = get_model_registry(settings).lease()
+    else:
+        lease = get_crop_model_pool(settings).lease(crop, model_path)
+    with lease as backend:
+        yield backend
+
+
+def pinned_imgsz(settings, crop: Optional[str] = None) -> Optional[int]:
+    """
+    Input size pinned by the model serving ``crop`` (static ONNX export).
+
+    Only a resident model is inspected, so this never triggers a load;
+    None means the model takes any size (or is not loaded yet).
+    """
+    model_path = crop_model_path(settings, crop)
+    if model_path is None:
+        backend = get_model_registry(settings).backend
+    else:
+        backend = get_crop_model_pool(settings).peek(crop, model_path)
+    return backend.fixed_imgsz if backend is not None else None
+
 
-        logger.info(f"Loading custom YOLO model from {model_path}")
+def unload_idle_models(settings) -> list[str]:
+    """Release the registry model and crop models unused for ``vision_idle_unload_seconds``."""
+    idle_seconds = settings.vision_idle_unload_seconds
+    unloaded = []
+    if _model_registry is not None:
+        version = _model_registry.unload_if_idle(idle_seconds)
+        if version is not None:
+            unloaded.append(version)
+    if _crop_model_pool is not None:
+        unloaded.extend(_crop_model_pool.unload_idle(idle_seconds))
+    return unloaded
 
-        # Fix for PyTorch 2.6+: Add ultralytics safe globals
+
+async def run_idle_unloader(settings):
+    """
+    Background loop that unloads idle models (started by the app lifespan).
+
+    Checks every quarter of the idle period (at most once a minute), so a
+    model is released at most ~25% later than configured.
+    """
+    interval = min(60.0, max(1.0, settings.vision_idle_unload_seconds / 4))
+    logger.info(f"Idle model unloading after {settings.vision_idle_unload_seconds:.0f}s (checked every {interval:.0f}s)")
+    while True:
+        await asyncio.sleep(interval)
         try:
-            import ultralytics.nn.tasks as tasks
-            safe_classes = []
-            for attr_name in ['DetectionModel', 'SegmentationModel', 'ClassificationModel', 'PoseModel']:
-                cls = getattr(tasks, attr_name, None)
-                if cls is not None:
-                    safe_classes.append(cls)
-            if safe_classes:
-                torch.serialization.add_safe_globals(safe_classes)
-                logger.info(f"Registered {len(safe_classes)} safe globals for PyTorch 2.6+")
+            await asyncio.to_thread(unload_idle_models, settings)
         except Exception as e:
-            logger.warning(f"Could not register safe globals (older PyTorch?): {e}")
+            logger.warning(f"Idle model unload failed: {e}")
 
-        _yolo_model = YOLO(model_path)
-        logger.info("YOLO model loaded successfully")
-        return _yolo_model
 
-    except Exception as e:
-        _yolo_load_error = str(e)
-        logger.error(f"YOLO model loading failed: {e}")
-        raise
+def close_vision_backend():
+    """Release the inference backends (application shutdown; stops worker processes)."""
+    if _model_registry is not None:
+        _model_registry.close()
+    if _crop_model_pool is not None:
+        _crop_model_pool.close()
+
+
+# ── Fused color analysis kernel ──
+# Every pixel is classified once into a bitmask of color classes. Plant
+# validation (green/earth) and the disease heuristics (brown, yellow, dark,
+# red-brown, white) all read their ratios from the same pass.
+COLOR_CLASSES = ("green", "earth", "brown", "yellow", "dark", "red_brown", "white")
+COLOR_CLASS_BITS = {name: 1 << i for i, name in enumerate(COLOR_CLASSES)}
+
+# Rows processed per block; bounds temporary arrays regardless of image size
+_COLOR_BLOCK_ROWS = 256
+# Never downsample below this many pixels on the short side
+_COLOR_MIN_SIDE = 64
+
+
+@dataclass(frozen=True)
+class ColorThresholds:
+    """HSV/RGB thresholds of the color heuristics (HSV on PIL's 0-255 scale)."""
+    brown_hue: tuple[int, int] = (10, 30)
+    brown_min_saturation: int = 40
+    brown_value: tuple[int, int] = (40, 180)  # Exclusive bounds
+    yellow_hue: tuple[int, int] = (25, 50)
+    yellow_min_saturation: int = 50
+    yellow_min_value: int = 120
+    dark_max_channel: int = 70
+    red_brown_max_hue: int = 15
+    red_brown_min_saturation: int = 60
+    red_brown_value: tuple[int, int] = (50, 200)  # Exclusive bounds
+    white_max_saturation: int = 30
+    white_min_value: int = 200
+
 
+DEFAULT_COLOR_THRESHOLDS = ColorThresholds()
 
-def analyze_colors_for_disease(image: Image.Image) -> list[dict]:
+
+@dataclass
+class ColorStats:
+    """Result of one fused color-analysis pass over an image."""
+    width: int                # Original image width
+    height: int               # Original image height
+    downsample: int           # Effective sampling factor used
+    sample_pixels: int        # Pixels actually analyzed
+    green: float = 0.0
+    earth: float = 0.0
+    brown: float = 0.0
+    yellow: float = 0.0
+    dark: float = 0.0
+    red_brown: float = 0.0
+    white: float = 0.0
+    # Per-pixel class bitmask at the sampled resolution
+    class_map: Optional[np.ndarray] = field(default=None, repr=False)
+
+    @property
+    def ratios(self) -> dict[str, float]:
+        return {name: getattr(self, name) for name in COLOR_CLASSES}
+
+    @property
+    def is_plant(self) -> bool:
+        # Very permissive: almost any natural image passes
+        return self.green > 0.05 or self.earth > 0.15
+
+
+def _classify_pixels(rgb: np.ndarray, thresholds: ColorThresholds = DEFAULT_COLOR_THRESHOLDS) -> np.ndarray:
     """
-    Color-based disease detection.
-    Analyzes brown, yellow, dark patches which indicate disease.
-    Uses HSV color space for more accurate detection.
+    Classify an (H, W, 3) uint8 RGB block into per-pixel class bitmasks.
+
+    HSV is derived in numpy with the same formula and 0-255 scaling as
+    PIL's ``convert('HSV')``, so thresholds match the original heuristics.
     """
-    img_rgb = np.array(image.convert('RGB'))
-    img_hsv = np.array(image.convert('HSV'))
+    t = thresholds
+    r = rgb[..., 0].astype(np.int16)
+    g = rgb[..., 1].astype(np.int16)
+    b = rgb[..., 2].astype(np.int16)
 
-    height, width = img_rgb.shape[:2]
-    total_pixels = height * width
+    maxc = np.maximum(np.maximum(r, g), b)
+    minc = np.minimum(np.minimum(r, g), b)
+    v = maxc
+    chroma = (maxc - minc).astype(np.float32)
+    gray = chroma == 0
+    safe_chroma = np.where(gray, 1.0, chroma)
+    safe_max = np.where(maxc == 0, 1, maxc).astype(np.float32)
 
-    detections = []
+    s = np.where(gray, 0, (chroma / safe_max * 255.0).astype(np.int16))
 
-    # ── HSV-based analysis (more accurate than RGB) ──
-    h, s, v = img_hsv[:, :, 0], img_hsv[:, :, 1], img_hsv[:, :, 2]
+    rc = (maxc - r) / safe_chroma
+    gc = (maxc - g) / safe_chroma
+    bc = (maxc - b) / safe_chroma
+    hue = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    hue = np.fmod(hue / 6.0 + 1.0, 1.0)
+    h = np.where(gray, 0, (hue * 255.0).astype(np.int16))
 
-    # 1. Brown spots (fungal diseases — early blight, late blight)
-    # Hue 10-30, Saturation > 40, Value 40-180
-    brown_mask = (
-        (h >= 10) & (h <= 30) &
-        (s > 40) &
-        (v > 40) & (v < 180)
-    )
-    brown_ratio = np.sum(brown_mask) / total_pixels
-
-    # 2. Yellow/Chlorotic areas (nitrogen deficiency, viruses)
-    # Hue 25-45, Saturation > 50, Value > 120
-    yellow_mask = (
-        (h >= 25) & (h <= 50) &
-        (s > 50) &
-        (v > 120)
-    )
-    yellow_ratio = np.sum(yellow_mask) / total_pixels
-
-    # 3. Dark necrotic spots (tissue death)
-    # Very low value across all channels
-    dark_mask = (
-        (img_rgb[:, :, 0] < 70) &
-        (img_rgb[:, :, 1] < 70) &
-        (img_rgb[:, :, 2] < 70)
-    )
-    dark_ratio = np.sum(dark_mask) / total_pixels
+    codes = np.zeros(r.shape, dtype=np.uint8)
 
-    # 4. Reddish-brown spots (rust, bacterial spots)
-    red_brown_mask = (
-        (h >= 0) & (h <= 15) &
-        (s > 60) &
-        (v > 50) & (v < 200)
-    )
-    red_brown_ratio = np.sum(red_brown_mask) / total_pixels
+    # Green dominant pixels (healthy plant)
+    codes |= ((g > r) & (g > b)).astype(np.uint8) * COLOR_CLASS_BITS["green"]
+    # Earth/warm tone pixels (diseased/dry plant)
+    codes |= ((r > b) & (g > b)).astype(np.uint8) * COLOR_CLASS_BITS["earth"]
+    # Brown spots (fungal diseases): Hue 10-30, Saturation > 40, Value 40-180
+    codes |= (
+        (h >= t.brown_hue[0]) & (h <= t.brown_hue[1]) & (s > t.brown_min_saturation)
+        & (v > t.brown_value[0]) & (v < t.brown_value[1])
+    ).astype(np.uint8) * COLOR_CLASS_BITS["brown"]
+    # Yellow/Chlorotic areas: Hue 25-50, Saturation > 50, Value > 120
+    codes |= (
+        (h >= t.yellow_hue[0]) & (h <= t.yellow_hue[1]) & (s > t.yellow_min_saturation)
+        & (v > t.yellow_min_value)
+    ).astype(np.uint8) * COLOR_CLASS_BITS["yellow"]
+    # Dark necrotic spots: very low value across all channels
+    dark = t.dark_max_channel
+    codes |= ((r < dark) & (g < dark) & (b < dark)).astype(np.uint8) * COLOR_CLASS_BITS["dark"]
+    # Reddish-brown spots (rust, bacterial spots)
+    codes |= (
+        (h >= 0) & (h <= t.red_brown_max_hue) & (s > t.red_brown_min_saturation)
+        & (v > t.red_brown_value[0]) & (v < t.red_brown_value[1])
+    ).astype(np.uint8) * COLOR_CLASS_BITS["red_brown"]
+    # White/powdery areas (powdery mildew)
+    codes |= ((s < t.white_max_saturation) & (v > t.white_min_value)).astype(np.uint8) * COLOR_CLASS_BITS["white"]
+
+    return codes
+
+
+class ColorLUT:
+    """
+    Precomputed RGB → class-bitmask lookup table.
+
+    The heuristics depend only on a pixel's RGB value, so every (quantized)
+    color is classified once with the exact kernel. Classifying an image is
+    then one gather instead of the HSV conversion and nine mask expressions.
+    With ``bits=8`` the table covers all 256³ colors (16 MiB) and is exact;
+    fewer bits quantize each channel to its bin center (e.g. ``bits=5`` is a
+    32³ table of 32 KiB).
+    """
+
+    def __init__(self, thresholds: ColorThresholds = DEFAULT_COLOR_THRESHOLDS, bits: int = 8):
+        if not 1 <= bits <= 8:
+            raise ValueError(f"LUT bits must be in 1..8, got {bits}")
+        self.thresholds = thresholds
+        self.bits = bits
+        self.shift = 8 - bits
+
+        start = time.perf_counter()
+        levels = 1 << bits
+        # Bin centers, so quantized tables round instead of truncating
+        values = (np.arange(levels, dtype=np.int32) << self.shift) + ((1 << self.shift) >> 1)
+        g, b = np.meshgrid(values, values, indexing="ij")
+        plane = np.empty((levels, levels, 3), dtype=np.uint8)
+        plane[..., 1], plane[..., 2] = g, b
+
+        self.table = np.empty(levels ** 3, dtype=np.uint8)
+        for i, red in enumerate(values):  # One R plane at a time bounds temporaries
+            plane[..., 0] = red
+            self.table[i * levels * levels:(i + 1) * levels * levels] = _classify_pixels(plane, thresholds).ravel()
+        self.build_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Color LUT built: {levels}³ entries in {self.build_ms:.0f} ms")
+
+    def classify(self, rgb: np.ndarray) -> np.ndarray:
+        """Class bitmasks for an (H, W, 3) uint8 RGB array."""
+        r = rgb[..., 0].astype(np.int32)
+        g = rgb[..., 1].astype(np.int32)
+        b = rgb[..., 2].astype(np.int32)
+        if self.shift:
+            r >>= self.shift
+            g >>= self.shift
+            b >>= self.shift
+        return self.table[(r << (2 * self.bits)) | (g << self.bits) | b]
+
+
+# Global lookup table (lazy built, replaced by rebuild_color_lut)
+_color_lut: Optional[ColorLUT] = None
+_color_lut_lock = threading.Lock()
+
+
+def get_color_lut(settings) -> Optional[ColorLUT]:
+    """Get or build the color lookup table (None when ``color_lut_enabled`` is off)."""
+    global _color_lut
+
+    if not settings.color_lut_enabled:
+        return None
+
+    if _color_lut is None:
+        with _color_lut_lock:
+            if _color_lut is None:
+                _color_lut = ColorLUT(bits=settings.color_lut_bits)
+    return _color_lut
 
-    # 5. White/powdery areas (powdery mildew)
-    white_mask = (
-        (s < 30) &
-        (v > 200)
+
+def rebuild_color_lut(thresholds: ColorThresholds = DEFAULT_COLOR_THRESHOLDS, bits: int = 8) -> ColorLUT:
+    """Build a table for new thresholds and swap it in atomically."""
+    global _color_lut
+
+    lut = ColorLUT(thresholds, bits)
+    with _color_lut_lock:
+        _color_lut = lut
+    return lut
+
+
+def _class_ratios_from_histogram(histogram: np.ndarray, total: int) -> dict[str, float]:
+    """Turn a bincount over class bitmasks into per-class pixel ratios."""
+    values = np.arange(len(histogram))
+    return {
+        name: float(histogram[(values & bit) != 0].sum()) / total
+        for name, bit in COLOR_CLASS_BITS.items()
+    }
+
+
+def compute_color_stats(
+    image: Image.Image,
+    downsample: int = 1,
+    lut: Optional[ColorLUT] = None,
+    thresholds: ColorThresholds = DEFAULT_COLOR_THRESHOLDS
+) -> ColorStats:
+    """
+    Fused single-pass color analysis shared by plant validation and disease heuristics.
+
+    Args:
+        image: Input image (converted to RGB once if needed)
+        downsample: Sampling factor; every N-th pixel per axis is analyzed.
+            The sample is taken with nearest-neighbour resizing, so the full
+            resolution array is never materialized.
+        lut: Optional lookup table replacing the exact HSV kernel
+        thresholds: Thresholds of the exact kernel (ignored with ``lut``)
+
+    Returns:
+        ColorStats with every class ratio and the sampled class map
+    """
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    width, height = image.size
+    factor = max(1, min(int(downsample), min(width, height) // _COLOR_MIN_SIDE or 1))
+
+    if factor > 1:
+        sample = image.resize((width // factor, height // factor), Image.NEAREST)
+    else:
+        sample = image
+    rgb = np.asarray(sample)
+
+    sample_height, sample_width = rgb.shape[:2]
+    total = sample_height * sample_width
+    class_map = np.empty((sample_height, sample_width), dtype=np.uint8)
+    histogram = np.zeros(1 << len(COLOR_CLASSES), dtype=np.int64)
+
+    for row in range(0, sample_height, _COLOR_BLOCK_ROWS):
+        block = rgb[row:row + _COLOR_BLOCK_ROWS]
+        codes = lut.classify(block) if lut is not None else _classify_pixels(block, thresholds)
+        class_map[row:row + _COLOR_BLOCK_ROWS] = codes
+        histogram += np.bincount(codes.ravel(), minlength=len(histogram))
+
+    return ColorStats(
+        width=width,
+        height=height,
+        downsample=factor,
+        sample_pixels=total,
+        class_map=class_map,
+        **_class_ratios_from_histogram(histogram, max(total, 1))
     )
-    white_ratio = np.sum(white_mask) / total_pixels
+
+
+def downsample_report(
+    image: Image.Image,
+    factors: tuple[int, ...] = (1, 2, 4, 8, 16)
+) -> list[dict]:
+    """
+    Measure how the downsampling factor affects color ratios and runtime.
+
+    Factor 1 (full resolution) is the reference; every row reports the
+    ratios, the absolute deviation from the reference per class and the
+    analysis time in milliseconds.
+    """
+    report = []
+    reference = None
+
+    for factor in sorted(set((1,) + tuple(factors))):
+        start = time.perf_counter()
+        stats = compute_color_stats(image, downsample=factor)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        ratios = stats.ratios
+        if reference is None:
+            reference = ratios
+
+        deviation = {name: abs(ratios[name] - reference[name]) for name in COLOR_CLASSES}
+        report.append({
+            "downsample": stats.downsample,
+            "sample_pixels": stats.sample_pixels,
+            "time_ms": round(elapsed_ms, 3),
+            "ratios": {name: round(value, 5) for name, value in ratios.items()},
+            "abs_deviation": {name: round(value, 5) for name, value in deviation.items()},
+            "max_abs_deviation": round(max(deviation.values()), 5),
+            "is_plant": stats.is_plant,
+        })
+
+    return report
+
+
+def lut_accuracy_report(image: Image.Image, lut: ColorLUT, downsample: int = 1) -> dict:
+    """
+    Compare a lookup table against the exact kernel on one image.
+
+    Reports per-class pixel agreement, ratio deviation and the time of
+    both paths in milliseconds.
+    """
+    start = time.perf_counter()
+    exact = compute_color_stats(image, downsample, thresholds=lut.thresholds)
+    exact_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    fast = compute_color_stats(image, downsample, lut)
+    lut_ms = (time.perf_counter() - start) * 1000
+
+    agreement = {
+        name: float(((exact.class_map & bit) == (fast.class_map & bit)).mean())
+        for name, bit in COLOR_CLASS_BITS.items()
+    }
+    deviation = {name: abs(exact.ratios[name] - fast.ratios[name]) for name in COLOR_CLASSES}
+    return {
+        "lut_bits": lut.bits,
+        "downsample": exact.downsample,
+        "exact_ms": round(exact_ms, 3),
+        "lut_ms": round(lut_ms, 3),
+        "pixel_agreement": {name: round(value, 5) for name, value in agreement.items()},
+        "min_pixel_agreement": round(min(agreement.values()), 5),
+        "abs_deviation": {name: round(value, 5) for name, value in deviation.items()},
+        "max_abs_deviation": round(max(deviation.values()), 5),
+    }
+
+
+# Color heuristic → suspected disease.
+# (color class, ratio threshold, base confidence, slope, cap, class_name, display_name, log label)
+COLOR_DISEASE_RULES = (
+    ("brown", 0.01, 0.45, 8, 0.92, "early_blight_suspected", "Erken Yanıklık (Şüpheli)", "🔴 Brown spots"),
+    ("yellow", 0.03, 0.40, 5, 0.85, "chlorosis_suspected", "Kloroz / Sararma", "🟡 Yellow areas"),
+    ("dark", 0.02, 0.40, 6, 0.80, "necrosis_suspected", "Nekroz / Doku Ölümü", "⚫ Dark spots"),
+    ("red_brown", 0.01, 0.45, 7, 0.88, "bacterial_spot_suspected", "Bakteriyel Leke (Şüpheli)", "🟤 Red-brown spots"),
+    ("white", 0.05, 0.35, 4, 0.78, "powdery_mildew_suspected", "Külleme (Şüpheli)", "⚪ White patches"),
+)
+
+# 3x3 dilation joins speckled lesion pixels into one region before labeling
+_REGION_KERNEL = np.ones((3, 3), dtype=np.uint8)
+
+
+def find_lesion_regions(
+    stats: ColorStats,
+    color_class: str,
+    max_regions: int = 8,
+    min_area: float = 0.0005
+) -> list[dict]:
+    """
+    Locate connected regions of one color class on the sampled class map.
+
+    Labeling runs in OpenCV on the downsampled map (a few hundred pixels
+    per side), so it costs well under a millisecond per class.
+
+    Args:
+        stats: Fused color pass result (provides the class map)
+        color_class: Name from ``COLOR_CLASSES``
+        max_regions: Keep at most this many regions, largest first
+        min_area: Drop regions smaller than this share of the image
+
+    Returns:
+        Regions with ``bbox`` (working-image pixels) and ``area_ratio``
+    """
+    if stats.class_map is None or max_regions <= 0:
+        return []
+
+    mask = (stats.class_map & COLOR_CLASS_BITS[color_class]) != 0
+    if not mask.any():
+        return []
+
+    grown = cv2.dilate(mask.view(np.uint8), _REGION_KERNEL)
+    count, labels = cv2.connectedComponents(grown, connectivity=8)
+
+    # Areas and boxes from true mask pixels; dilation only decides which
+    # pixels belong together
+    ys, xs = np.nonzero(mask)
+    pixel_labels = labels[ys, xs]
+    areas = np.bincount(pixel_labels, minlength=count)
+    x1 = np.full(count, mask.shape[1]); np.minimum.at(x1, pixel_labels, xs)
+    y1 = np.full(count, mask.shape[0]); np.minimum.at(y1, pixel_labels, ys)
+    x2 = np.zeros(count, dtype=np.int64); np.maximum.at(x2, pixel_labels, xs + 1)
+    y2 = np.zeros(count, dtype=np.int64); np.maximum.at(y2, pixel_labels, ys + 1)
+
+    total = mask.size
+    candidates = np.flatnonzero(areas >= max(1, min_area * total))
+    order = candidates[np.argsort(-areas[candidates], kind="stable")][:max_regions]
+
+    map_height, map_width = mask.shape
+    sx, sy = stats.width / map_width, stats.height / map_height
+    return [
+        {
+            "bbox": [float(x1[i] * sx), float(y1[i] * sy), float(x2[i] * sx), float(y2[i] * sy)],
+            "area_ratio": round(float(areas[i]) / total, 5),
+        }
+        for i in order
+    ]
+
+
+def analyze_colors_for_disease(
+    image: Image.Image,
+    stats: Optional[ColorStats] = None,
+    max_regions: int = 8,
+    min_region_area: float = 0.0005
+) -> list[dict]:
+    """
+    Color-based disease detection.
+    Analyzes brown, yellow, dark patches which indicate disease.
+    Uses HSV color space for more accurate detection.
+
+    Pass a precomputed ``stats`` to reuse the fused color pass. Each
+    detection is localized with connected-component ``regions`` (bbox,
+    area and confidence per region); its ``bbox`` is the union of those
+    regions. ``max_regions=0`` keeps the whole-image bbox.
+    """
+    if stats is None:
+        stats = compute_color_stats(image)
+
+    width, height = stats.width, stats.height
+    detections = []
 
     # ── Generate detections with LOWER thresholds ──
     logger.info(
-        f"Color ratios: brown={brown_ratio:.4f}, yellow={yellow_ratio:.4f}, "
-        f"dark={dark_ratio:.4f}, red_brown={red_brown_ratio:.4f}, white={white_ratio:.4f}"
+        f"Color ratios: brown={stats.brown:.4f}, yellow={stats.yellow:.4f}, "
+        f"dark={stats.dark:.4f}, red_brown={stats.red_brown:.4f}, white={stats.white:.4f}"
     )
 
-    if brown_ratio > 0.01:  # 1% threshold
-        confidence = min(0.45 + brown_ratio * 8, 0.92)
-        detections.append({
-            "class_name": "early_blight_suspected",
-            "display_name": "Erken Yanıklık (Şüpheli)",
-            "confidence": round(confidence, 3),
-            "bbox": [0, 0, width, height],
-            "source": "color_analysis"
-        })
-        logger.info(f"🔴 Brown spots: {brown_ratio:.2%} → confidence {confidence:.2f}")
+    for color_class, threshold, base, slope, cap, class_name, display_name, label in COLOR_DISEASE_RULES:
+        ratio = getattr(stats, color_class)
+        if ratio <= threshold:
+            continue
 
-    if yellow_ratio > 0.03:  # 3% threshold
-        confidence = min(0.40 + yellow_ratio * 5, 0.85)
-        detections.append({
-            "class_name": "chlorosis_suspected",
-            "display_name": "Kloroz / Sararma",
+        confidence = min(base + ratio * slope, cap)
+        detection = {
+            "class_name": class_name,
+            "display_name": display_name,
             "confidence": round(confidence, 3),
             "bbox": [0, 0, width, height],
             "source": "color_analysis"
-        })
-        logger.info(f"🟡 Yellow areas: {yellow_ratio:.2%} → confidence {confidence:.2f}")
+        }
 
-    if dark_ratio > 0.02:  # 2% threshold
-        confidence = min(0.40 + dark_ratio * 6, 0.80)
-        detections.append({
-            "class_name": "necrosis_suspected",
-            "display_name": "Nekroz / Doku Ölümü",
-            "confidence": round(confidence, 3),
-            "bbox": [0, 0, width, height],
-            "source": "color_analysis"
-        })
-        logger.info(f"⚫ Dark spots: {dark_ratio:.2%} → confidence {confidence:.2f}")
+        regions = find_lesion_regions(stats, color_class, max_regions, min_region_area)
+        if regions:
+            for region in regions:
+                region["confidence"] = round(min(base + region["area_ratio"] * slope, cap), 3)
+            boxes = np.array([region["bbox"] for region in regions])
+            detection["bbox"] = [*boxes[:, :2].min(axis=0).tolist(), *boxes[:, 2:].max(axis=0).tolist()]
+            detection["regions"] = regions
 
-    if red_brown_ratio > 0.01:
-        confidence = min(0.45 + red_brown_ratio * 7, 0.88)
-        detections.append({
-            "class_name": "bacterial_spot_suspected",
-            "display_name": "Bakteriyel Leke (Şüpheli)",
-            "confidence": round(confidence, 3),
-            "bbox": [0, 0, width, height],
-            "source": "color_analysis"
-        })
-        logger.info(f"🟤 Red-brown spots: {red_brown_ratio:.2%} → confidence {confidence:.2f}")
-
-    if white_ratio > 0.05:
-        confidence = min(0.35 + white_ratio * 4, 0.78)
-        detections.append({
-            "class_name": "powdery_mildew_suspected",
-            "display_name": "Külleme (Şüpheli)",
-            "confidence": round(confidence, 3),
-            "bbox": [0, 0, width, height],
-            "source": "color_analysis"
-        })
-        logger.info(f"⚪ White patches: {white_ratio:.2%} → confidence {confidence:.2f}")
+        detections.append(detection)
+        logger.info(f"{label}: {ratio:.2%} → confidence {confidence:.2f} ({len(regions)} regions)")
 
     return detections
 
 
-def is_plant(image: Image.Image) -> bool:
+def is_plant(image: Image.Image, stats: Optional[ColorStats] = None) -> bool:
     """
     Check if the image is likely a plant based on color analysis.
     Uses a permissive check to avoid false negatives.
     """
-    img_array = np.array(image.convert('RGB'))
-    height, width = img_array.shape[:2]
-    total_pixels = height * width
+    if stats is None:
+        stats = compute_color_stats(image)
 
-    # Green dominant pixels (healthy plant)
-    green_mask = (
-        (img_array[:, :, 1] > img_array[:, :, 0]) &
-        (img_array[:, :, 1] > img_array[:, :, 2])
-    )
-    green_ratio = np.sum(green_mask) / total_pixels
+    logger.info(f"Plant validation: green={stats.green:.2%}, earth={stats.earth:.2%}")
 
-    # Earth/warm tone pixels (diseased/dry plant)
-    earth_mask = (
-        (img_array[:, :, 0] > img_array[:, :, 2]) &
-        (img_array[:, :, 1] > img_array[:, :, 2])
-    )
-    earth_ratio = np.sum(earth_mask) / total_pixels
+    return stats.is_plant
 
-    logger.info(f"Plant validation: green={green_ratio:.2%}, earth={earth_ratio:.2%}")
 
-    # Very permissive: almost any natural image passes
-    return green_ratio > 0.05 or earth_ratio > 0.15
+PLANT_DISEASE_CLASSES = [
+    "disease", "blight", "spot", "rust", "mildew",
+    "virus", "early_blight", "late_blight"
+]
 
 
-async def analyze_image_with_yolo(
-    image_bytes: bytes,
-    settings=None
-) -> dict:
-    """
-    Analyze an image using YOLO with robust fallback to color analysis.
-    CRITICAL: Color analysis ALWAYS runs as supplement/fallback.
-    """
-    from ..config import get_settings
+# Modes Image.reduce can average directly (palette and bilevel images cannot)
+REDUCIBLE_MODES = ("RGB", "RGBA", "L", "LA", "CMYK", "YCbCr")
+
+
+@dataclass
+class DecodedImage:
+    """An upload decoded at (possibly) reduced working resolution."""
+    image: Image.Image
+    original_size: tuple[int, int]  # (width, height) of the encoded image
+
+    @property
+    def scale(self) -> tuple[float, float]:
+        """Factors mapping working-resolution coordinates back to the original."""
+        width, height = self.image.size
+        return self.original_size[0] / width, self.original_size[1] / height
 
-    if settings is None:
-        settings = get_settings()
 
-    # Load image first (common for both paths)
+def decode_image(image_bytes: bytes, max_side: int = 0) -> DecodedImage:
+    """
+    Decode upload bytes into an RGB image no larger than needed.
+
+    With ``max_side`` > 0, JPEGs are decoded with draft mode (libjpeg
+    DCT scaling by 1/2, 1/4 or 1/8), so a 12 MP photo never exists at full
+    resolution in memory. Other formats are decoded in their own mode and
+    shrunk with ``Image.reduce`` before the RGB conversion, so no
+    full-resolution RGB copy is made (palette and bilevel images, which
+    cannot be averaged, are converted first). The result keeps at least
+    ``max_side`` pixels on its long side; callers rescale boxes with
+    ``DecodedImage.scale``.
+    """
     image = Image.open(io.BytesIO(image_bytes))
-    if image.mode != "RGB":
+    original_size = image.size
+
+    if max_side > 0 and max(original_size) > max_side:
+        ratio = max_side / max(original_size)
+        target = (max(1, int(original_size[0] * ratio)), max(1, int(original_size[1] * ratio)))
+        if image.format == "JPEG":
+            # Picks the largest DCT scale that still covers the target size
+            image.draft("RGB", target)
+        factor = max(image.size) // max_side
+        if factor > 1 and image.mode in REDUCIBLE_MODES:
+            image = image.reduce(factor)
+            factor = 1
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        if factor > 1:
+            image = image.reduce(factor)
+    elif image.mode != "RGB":
         image = image.convert("RGB")
+    else:
+        image.load()
 
-    # 1. Plant Validation
-    if not is_plant(image):
-        logger.warning("Non-plant object detected")
-        return {"error": "Non-plant object detected", "detections": []}
+    return DecodedImage(image=image, original_size=original_size)
 
-    detections = []
-    yolo_succeeded = False
 
-    # 2. Try YOLO (may fail due to model issues)
+def _rescale_detections(detections: list[dict], scale: tuple[float, float]) -> list[dict]:
+    """Map bboxes from working resolution back to original image pixels."""
+    sx, sy = scale
+    if sx == 1 and sy == 1:
+        return detections
+    for det in detections:
+        for box_owner in [det, *det.get("regions", [])]:
+            bbox = box_owner.get("bbox")
+            if bbox and len(bbox) == 4:
+                box_owner["bbox"] = [bbox[0] * sx, bbox[1] * sy, bbox[2] * sx, bbox[3] * sy]
+    return detections
+
+
+def _run_yolo_batch(
+    images: list[Image.Image],
+    settings,
+    imgsz: int = DEFAULT_IMGSZ,
+    crop: Optional[str] = None
+) -> Optional[list[list[dict]]]:
+    """
+    Run YOLO over a list of images in a single batched predict call.
+
+    Returns per-image detection lists (same order as ``images``),
+    or None if the model could not be loaded or inference failed.
+    """
+    if not images:
+        return []
+
     try:
-        model = get_yolo_model(settings.yolo_model_path)
+        with crop_backend(settings, crop) as backend:
+            start = time.perf_counter()
+            per_image = backend.predict(
+                images,
+                conf=settings.yolo_confidence_threshold,
+                imgsz=imgsz,
+                iou=settings.yolo_iou_threshold
+            )
+        if _cascade_screen is not None:
+            _cascade_screen.observe_yolo((time.perf_counter() - start) * 1000, len(images))
 
-        results = model.predict(
-            source=image,
-            conf=settings.yolo_confidence_threshold,
-            verbose=False
+        logger.info(
+            f"YOLO batch of {len(images)} image(s) found "
+            f"{sum(len(d) for d in per_image)} detections"
         )
-
-        for result in results:
-            boxes = result.boxes
-            if boxes is not None:
-                for i in range(len(boxes)):
-                    bbox = boxes.xyxy[i].tolist()
-                    confidence = float(boxes.conf[i])
-                    class_id = int(boxes.cls[i])
-                    class_name = result.names.get(class_id, f"class_{class_id}")
-
-                    detections.append({
-                        "class_name": class_name,
-                        "confidence": confidence,
-                        "bbox": bbox,
-                        "source": "yolo"
-                    })
-
-        yolo_succeeded = True
-        logger.info(f"YOLO found {len(detections)} detections")
+        return per_image
 
     except Exception as e:
         logger.error(f"YOLO inference failed (using color analysis): {e}")
         # DO NOT raise — fall through to color analysis
+        return None
 
-    # 3. Color analysis — ALWAYS runs if YOLO finds nothing or fails
-    plant_disease_classes = [
-        "disease", "blight", "spot", "rust", "mildew",
-        "virus", "early_blight", "late_blight"
-    ]
+
+def get_cascade_screen(settings) -> Optional[CascadeScreen]:
+    """Get or create the cascade color screen (None when the cascade is disabled)."""
+    global _cascade_screen
+
+    if not settings.cascade_enabled:
+        return None
+
+    if _cascade_screen is None:
+        _cascade_screen = CascadeScreen(
+            symptom_thresholds={rule[0]: rule[1] for rule in COLOR_DISEASE_RULES},
+            healthy_min_green=settings.cascade_healthy_min_green,
+            healthy_margin=settings.cascade_healthy_margin
+        )
+        logger.info(
+            f"Inference cascade enabled: YOLO skipped for clearly healthy images "
+            f"(green ≥ {settings.cascade_healthy_min_green:.0%}, margin {settings.cascade_healthy_margin:.0%})"
+        )
+    return _cascade_screen
+
+
+def get_micro_batcher(settings) -> Optional[MicroBatcher]:
+    """Get or create the YOLO micro-batcher (None when micro-batching is disabled)."""
+    global _micro_batcher
+
+    if not settings.micro_batch_enabled:
+        return None
+
+    if _micro_batcher is None:
+        async def run_batch(images: list[Image.Image], key: tuple) -> list[Optional[list[dict]]]:
+            imgsz, crop = key
+            executor = get_inference_executor(settings)
+            per_image = await executor.run(_run_yolo_batch, images, settings, imgsz, crop)
+            return per_image if per_image is not None else [None] * len(images)
+
+        _micro_batcher = MicroBatcher(
+            run_batch,
+            max_batch_size=settings.micro_batch_max_size,
+            max_wait_ms=settings.micro_batch_max_wait_ms
+        )
+        logger.info(
+            f"YOLO micro-batcher started: batch ≤ {_micro_batcher.max_batch_size}, "
+            f"wait ≤ {settings.micro_batch_max_wait_ms} ms"
+        )
+    return _micro_batcher
+
+
+async def _detect_images(
+    images: list[Image.Image],
+    settings,
+    imgsz: int = DEFAULT_IMGSZ,
+    crop: Optional[str] = None
+) -> list[Optional[list[dict]]]:
+    """
+    YOLO detections per image (None where inference failed).
+
+    With micro-batching enabled each image joins the shared batcher, so
+    concurrent requests share forward passes (batches are keyed by input
+    size and crop model); otherwise the images run as one batch of their
+    own.
+    """
+    if not images:
+        return []
+
+    batcher = get_micro_batcher(settings)
+    if batcher is not None:
+        return list(await asyncio.gather(*(batcher.submit(image, (imgsz, crop)) for image in images)))
+
+    per_image = await get_inference_executor(settings).run(_run_yolo_batch, images, settings, imgsz, crop)
+    return per_image if per_image is not None else [None] * len(images)
+
+
+def _finalize_detections(
+    image: Image.Image,
+    stats: ColorStats,
+    detections: list[dict],
+    yolo_succeeded: bool,
+    scale: tuple[float, float] = (1.0, 1.0),
+    max_regions: int = 8,
+    min_region_area: float = 0.0005
+) -> dict:
+    """
+    Supplement YOLO detections with color analysis and build the result dict.
+
+    Boxes are mapped back to original image coordinates with ``scale``.
+    """
+    # Color analysis — ALWAYS runs if YOLO finds nothing or fails
     has_yolo_disease = any(
-        any(dc in d.get("class_name", "").lower() for dc in plant_disease_classes)
+        any(dc in d.get("class_name", "").lower() for dc in PLANT_DISEASE_CLASSES)
         for d in detections
     )
 
     if not has_yolo_disease:
         logger.info("Running color analysis (YOLO found no diseases or failed)")
-        color_detections = analyze_colors_for_disease(image)
+        color_detections = analyze_colors_for_disease(image, stats, max_regions, min_region_area)
         detections.extend(color_detections)
         logger.info(f"Color analysis found {len(color_detections)} detections")
 
     # Sort by confidence
     detections.sort(key=lambda x: x["confidence"], reverse=True)
+    _rescale_detections(detections, scale)
 
     source = "yolo+color" if yolo_succeeded else "color_analysis_only"
     logger.info(f"Vision total: {len(detections)} detections [{source}]")
@@ -297,18 +946,571 @@ async def analyze_image_with_yolo(
     return {"detections": detections, "analysis_source": source}
 
 
+def _cache_namespace(settings, crop: Optional[str] = None) -> str:
+    """
+    Cache namespace: model version + thresholds that change the result.
+
+    The model version is the active registry version (or the crop model)
+    plus its weights path and modification time, so activating another
+    version or replacing the weights file invalidates every cached entry.
+    """
+    model_path = crop_model_path(settings, crop)
+    if model_path is None:
+        registry = get_model_registry(settings)
+        entry = registry.get(registry.active_version)
+        version, model_path = entry.version, entry.model_path
+    else:
+        version = f"crop={crop}"
+    model_file = Path(model_path)
+    try:
+        model_version = f"{version}:{model_file}@{int(model_file.stat().st_mtime)}"
+    except OSError:
+        model_version = f"{version}:yolov8n.pt"
+    namespace = (
+        f"{model_version}|conf={settings.yolo_confidence_threshold}"
+        f"|ds={settings.color_analysis_downsample}"
+        f"|decode={settings.vision_decode_max_side}"
+    )
+    if settings.adaptive_imgsz_enabled:
+        namespace += f"|imgsz=adaptive/{settings.adaptive_imgsz_min}-{settings.adaptive_imgsz_max}"
+    if settings.cascade_enabled:
+        namespace += f"|cascade={settings.cascade_healthy_min_green}/{settings.cascade_healthy_margin}"
+    return namespace
+
+
+def _run_yolo_tiled(
+    image: Image.Image,
+    stats: ColorStats,
+    settings,
+    crop: Optional[str] = None
+) -> tuple[Optional[list[dict]], dict]:
+    """
+    Tiled detection for one high-resolution image.
+
+    The image is cut into overlapping ``vision_tile_size`` tiles. Tiles
+    without enough vegetation (read from the fused color class map) are
+    skipped. If more than ``vision_max_tiles`` remain, the image is
+    shrunk until they fit. Surviving tiles run as one YOLO batch, and
+    boxes are merged across tiles with NMS.
+
+    Returns:
+        (detections in working-image pixels or None on failure, tiling info)
+    """
+    tile_size = settings.vision_tile_size
+    plant_bits = COLOR_CLASS_BITS["green"] | COLOR_CLASS_BITS["earth"]
+
+    working = image
+    factor = 1.0  # Uniform working/original scale, so boxes keep their aspect ratio
+    while True:
+        tiles = plan_tiles(working.width, working.height, tile_size, settings.vision_tile_overlap)
+        score_vegetation(tiles, stats.class_map, working.size, plant_bits)
+        selected = [t for t in tiles if t.vegetation >= settings.vision_tile_min_vegetation]
+        if len(selected) <= settings.vision_max_tiles or max(working.size) <= tile_size:
+            break
+        # Shrink so the vegetated tile count drops to the cap (area scales with tile count),
+        # never below one tile on the long side
+        shrink = 0.95 * (settings.vision_max_tiles / len(selected)) ** 0.5
+        factor = max(factor * shrink, tile_size / max(image.size))
+        working = image.resize(
+            (max(1, round(image.width * factor)), max(1, round(image.height * factor))),
+            Image.BILINEAR
+        )
+
+    scale = (image.width / working.width, image.height / working.height)
+    info = {
+        "tile_size": tile_size,
+        "tiles_total": len(tiles),
+        "tiles_inferred": len(selected),
+        "tile_scale": round(scale[0], 3),
+    }
+    logger.info(f"Tiled inference: {info}")
+
+    if not selected:
+        return [], info
+
+    try:
+        with crop_backend(settings, crop) as backend:
+            per_tile = backend.predict(
+                [working.crop(t.box) for t in selected],
+                conf=settings.yolo_confidence_threshold,
+                imgsz=tile_size,
+                iou=settings.yolo_iou_threshold
+            )
+    except Exception as e:
+        logger.error(f"Tiled YOLO inference failed (using color analysis): {e}")
+        return None, info
+
+    detections = merge_tile_detections(per_tile, selected, settings.vision_tile_nms_iou, scale)
+    return detections, info
+
+
+@dataclass
+class _PreparedImage:
+    """Per-image state carried between the stages of the vision pipeline."""
+    image: Optional[Image.Image] = None
+    stats: Optional[ColorStats] = None
+    scale: tuple[float, float] = (1.0, 1.0)  # Working resolution → original pixels
+    tiled: bool = False
+    namespace: Optional[str] = None
+    cache_key: Optional[tuple[int, tuple[int, int]]] = None  # (phash, original size)
+    detections: Optional[list[dict]] = None  # YOLO output (None = failed)
+    tiling: Optional[dict] = None
+    resolution: Optional[ResolutionChoice] = None  # Adaptive imgsz (None = fixed)
+    screen: Optional[ScreenDecision] = None  # Cascade verdict (None = not screened)
+    result: Optional[dict] = None  # Set when the image is resolved early
+
+
+def _use_tiling(settings, size: tuple[int, int], tiled: Optional[bool]) -> bool:
+    """Explicit request wins; otherwise tile large images when tiling is enabled."""
+    if tiled is not None:
+        return tiled
+    return settings.vision_tiling_enabled and max(size) >= settings.vision_tiling_min_side
+
+
+def _prepare_image(
+    index: int,
+    image_bytes: bytes,
+    settings,
+    namespace: Optional[str],
+    strict: bool,
+    tiled: Optional[bool] = None
+) -> _PreparedImage:
+    """
+    CPU-bound front half of the pipeline (runs on the inference executor).
+
+    Cache lookup → decode → fused color pass → plant validation.
+    """
+    prepared = _PreparedImage()
+
+    # 0. Mode selection needs only the header (no pixel decode)
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as probe:
+            prepared.tiled = _use_tiling(settings, probe.size, tiled)
+    except Exception:
+        pass  # Let the decoder report the problem
+    if namespace is not None and prepared.tiled:
+        namespace = (
+            f"{namespace}|tiled={settings.vision_tile_size}/{settings.vision_tile_overlap}"
+            f"/{settings.vision_tiling_decode_max_side}"
+        )
+    prepared.namespace = namespace
+
+    # 1. Perceptual-hash cache (near-duplicate uploads skip inference)
+    cache = get_vision_cache(settings) if namespace is not None else None
+    if cache is not None:
+        try:
+            phash, size = hash_image_bytes(image_bytes)
+        except Exception:
+            phash = None  # Let the decoder report the problem
+        if phash is not None:
+            cached = cache.get(phash, namespace, size)
+            if cached is not None:
+                logger.info(f"Vision cache hit (image {index}, hash {phash:016x})")
+                prepared.result = cached
+                return prepared
+            prepared.cache_key = (phash, size)
+
+    # 2. Decode (reduced resolution: YOLO and color heuristics don't need full size;
+    #    tiled mode keeps more pixels so small lesions survive)
+    max_side = settings.vision_tiling_decode_max_side if prepared.tiled else settings.vision_decode_max_side
+    try:
+        decoded = decode_image(image_bytes, max_side)
+        image = decoded.image
+    except Exception as e:
+        if strict:
+            raise
+        logger.warning(f"Image {index} could not be decoded: {e}")
+        prepared.result = {"error": f"Invalid image: {e}", "detections": []}
+        return prepared
+
+    # 3. Plant validation (fused color pass, reused by the color supplement)
+    stats = compute_color_stats(image, settings.color_analysis_downsample, get_color_lut(settings))
+    prepared.stats = stats
+    if not is_plant(image, stats):
+        logger.warning(f"Non-plant object detected (image {index})")
+        prepared.result = {"error": "Non-plant object detected", "detections": []}
+        return prepared
+
+    prepared.image = image
+    prepared.scale = decoded.scale
+    return prepared
+
+
+async def _analyze_images(
+    images_bytes: list[bytes],
+    settings,
+    strict: bool,
+    tiled: Optional[bool] = None,
+    crop: Optional[str] = None
+) -> list[dict]:
+    """
+    Shared vision pipeline for single and batch analysis.
+
+    All CPU-bound stages run on the bounded inference executor so the
+    event loop stays free for other requests:
+    prepare (cache/decode/validate) per image → cascade screen (clearly
+    healthy images skip YOLO) → input size choice → micro-batched YOLO
+    pass per size (tiled images run their own tile
+    batch) → color supplement per image → cache store. With ``strict`` decode errors are raised; otherwise they
+    become per-image ``error`` entries. ``crop`` selects the detector
+    (see ``crop_backend``); unknown crops raise ValueError.
+    """
+    crop_model_path(settings, crop)  # Validate before any work
+    executor = get_inference_executor(settings)
+    cache = get_vision_cache(settings)
+    namespace = _cache_namespace(settings, crop) if cache else None
+
+    # 1. Prepare every image in parallel
+    prepared: list[_PreparedImage] = await asyncio.gather(*(
+        executor.run(_prepare_image, i, image_bytes, settings, namespace, strict, tiled)
+        for i, image_bytes in enumerate(images_bytes)
+    ))
+    # 2. Cheap-first cascade: clearly healthy images skip the detector
+    screen = get_cascade_screen(settings)
+    if screen is not None:
+        for i, p in enumerate(prepared):
+            if p.stats is None:
+                continue  # Cache hit or undecodable
+            if p.result is not None:
+                p.screen = ScreenDecision(SCREEN_NON_PLANT, 1.0, ["failed plant validation"])
+            elif not p.tiled:
+                p.screen = screen.screen(p.stats.ratios)
+            else:
+                continue
+            screen.record(p.screen)
+            if p.result is not None:
+                p.result["cascade"] = p.screen.to_dict()
+            if p.screen.verdict == SCREEN_NON_PLANT:
+                outcome = ", rejected as non-plant"
+            elif p.screen.skips_yolo:
+                outcome = f", YOLO skipped (~{p.screen.saved_ms:.0f} ms saved)"
+            else:
+                outcome = ", escalated to YOLO"
+            logger.info(f"Cascade image {i}: {p.screen.verdict} (margin {p.screen.margin:.2f}){outcome}")
+
+    pending = [p for p in prepared if p.result is None]
+    screened = [p for p in pending if p.screen is not None and p.screen.skips_yolo]
+    regular = [p for p in pending if not p.tiled and not (p.screen is not None and p.screen.skips_yolo)]
+    tiled_images = [p for p in pending if p.tiled]
+    for p in screened:
+        p.detections = []
+
+    # 3. Input size per image: content + current queue depth (adaptive policy),
+    #    unless the model pins its input size
+    policy = get_resolution_policy(settings)
+    pinned = pinned_imgsz(settings, crop)
+    by_imgsz: dict[int, list[_PreparedImage]] = {}
+    for p in regular:
+        if policy is not None and pinned is None:
+            p.resolution = policy.choose(p.image.size, p.stats.green, executor.queue_depth)
+        by_imgsz.setdefault(pinned or (p.resolution.imgsz if p.resolution else DEFAULT_IMGSZ), []).append(p)
+
+    # 4. Batched YOLO pass per input size (shared with concurrent requests)
+    #    + tile batches (may fail due to model issues)
+    batch_outputs, tiled_outputs = await asyncio.gather(
+        asyncio.gather(*(
+            _detect_images([p.image for p in group], settings, imgsz, crop)
+            for imgsz, group in by_imgsz.items()
+        )),
+        asyncio.gather(*(executor.run(_run_yolo_tiled, p.image, p.stats, settings, crop) for p in tiled_images))
+    )
+    for group, batch_detections in zip(by_imgsz.values(), batch_outputs):
+        for p, detections in zip(group, batch_detections):
+            p.detections = detections
+    for p, (detections, info) in zip(tiled_images, tiled_outputs):
+        p.detections, p.tiling = detections, info
+    # The first request loads the model: its pinned size is only known now
+    pinned = pinned or pinned_imgsz(settings, crop)
+
+    # 5. Per-image color supplement
+    finalized = await asyncio.gather(*(
+        executor.run(
+            _finalize_detections,
+            p.image,
+            p.stats,
+            p.detections or [],
+            p.detections is not None,
+            p.scale,
+            settings.color_region_max,
+            settings.color_region_min_area
+        )
+        for p in pending
+    ))
+    for p, result in zip(pending, finalized):
+        if p.tiling is not None:
+            result["tiling"] = p.tiling
+            result["inference"] = {"imgsz": pinned or p.tiling["tile_size"], "policy": "tiled"}
+        elif p.screen is not None and p.screen.skips_yolo:
+            result["analysis_source"] = "color_screen"
+            result["inference"] = {"imgsz": None, "policy": "cascade"}
+        elif pinned is not None:
+            # Report the size the model actually ran at, not the policy's choice
+            p.resolution = None
+            result["inference"] = {"imgsz": pinned, "policy": "pinned"}
+        elif p.resolution is not None:
+            result["inference"] = p.resolution.to_dict()
+        else:
+            result["inference"] = {"imgsz": DEFAULT_IMGSZ, "policy": "fixed"}
+        result["inference"]["crop"] = crop or settings.default_crop
+        if p.screen is not None:
+            result["cascade"] = p.screen.to_dict()
+        p.result = result
+
+    # 6. Cache store — skip results degraded by a (possibly transient) YOLO
+    #    failure or by a load-driven drop in input size
+    if cache is not None:
+        for p in prepared:
+            if p.cache_key is None or p.result.get("analysis_source") == "color_analysis_only":
+                continue
+            if p.resolution is not None and p.resolution.load != LOAD_NORMAL:
+                continue
+            cache.put(p.cache_key[0], p.namespace, p.cache_key[1], p.result)
+
+    return [p.result for p in prepared]
+
+
+async def analyze_images_with_yolo(
+    images_bytes: list[bytes],
+    settings=None,
+    tiled: Optional[bool] = None,
+    crop: Optional[str] = None
+) -> list[dict]:
+    """
+    Analyze several images with one batched YOLO forward pass.
+
+    Every image is decoded and plant-validated individually; all valid
+    plant images then go through a single ``model.predict`` call. Results
+    are returned in input order and have the same format as
+    ``analyze_image_with_yolo``. Undecodable images yield an ``error`` entry
+    instead of failing the whole batch.
+    """
+    from ..config import get_settings
+
+    if settings is None:
+        settings = get_settings()
+
+    return await _analyze_images(images_bytes, settings, strict=False, tiled=tiled, crop=crop)
+
+
+async def analyze_image_with_yolo(
+    image_bytes: bytes,
+    settings=None,
+    tiled: Optional[bool] = None,
+    crop: Optional[str] = None
+) -> dict:
+    """
+    Analyze an image using YOLO with robust fallback to color analysis.
+    CRITICAL: Color analysis ALWAYS runs as supplement/fallback.
+
+    Args:
+        image_bytes: Raw upload bytes
+        settings: Application settings
+        tiled: Force tiled inference on/off for high-resolution panoramas;
+            None tiles automatically above ``vision_tiling_min_side``
+        crop: Crop whose detector to use (``crop_models``); None or
+            ``default_crop`` uses the active registry model
+
+    The YOLO input size used is reported under ``inference``; with
+    ``adaptive_imgsz_enabled`` it follows the image content and the
+    inference queue depth (see ``resolution_policy``).
+    """
+    from ..config import get_settings
+
+    if settings is None:
+        settings = get_settings()
+
+    results = await _analyze_images([image_bytes], settings, strict=True, tiled=tiled, crop=crop)
+    return results[0]
+
+
+@dataclass
+class CaptureAnalysis:
+    """Vision outcome of a fixed-camera capture analyzed in change-detection mode."""
+    vision_result: dict
+    change: dict
+    pipeline_result: Optional[dict] = None  # Previous full pipeline output (unchanged capture, same inputs)
+
+
+def _capture_thumbnail(image_bytes: bytes, detector) -> tuple[np.ndarray, tuple[int, int]]:
+    """Cheap reduced decode → change-detection thumbnail + original size."""
+    decoded = decode_image(image_bytes, detector.thumbnail_side * 2)
+    return detector.thumbnail(decoded.image), decoded.original_size
+
+
+async def _analyze_changed_regions(
+    image_bytes: bytes,
+    report: ChangeReport,
+    settings,
+    crop: Optional[str] = None
+) -> dict:
+    """
+    Re-run YOLO on the changed regions only and merge with the previous result.
+
+    Previous YOLO boxes whose centers lie outside every changed region are
+    kept. The fused color pass still covers the whole frame: its ratios
+    are image-global and it costs a few milliseconds.
+    """
+    executor = get_inference_executor(settings)
+    prepared = await executor.run(_prepare_image, 0, image_bytes, settings, None, True, False)
+    if prepared.result is not None:
+        return prepared.result
+
+    image, scale = prepared.image, prepared.scale
+    boxes = changed_regions(report.changed_cells, image.size, settings.vision_tile_size // 2)
+    region_detections = await _detect_images([image.crop(box) for box in boxes], settings, crop=crop)
+
+    detections = []
+    for (x1, y1, _, _), found in zip(boxes, region_detections):
+        for det in found or []:
+            bx1, by1, bx2, by2 = det["bbox"]
+            detections.append({**det, "bbox": [bx1 + x1, by1 + y1, bx2 + x1, by2 + y1]})
+
+    # Previous YOLO boxes are in original pixels; bring them to working pixels
+    sx, sy = scale
+    for det in report.reference.vision_result.get("detections", []):
+        if det.get("source") != "yolo":
+            continue
+        bx1, by1, bx2, by2 = (v / s for v, s in zip(det["bbox"], (sx, sy, sx, sy)))
+        cx, cy = (bx1 + bx2) / 2, (by1 + by2) / 2
+        if any(x1 <= cx < x2 and y1 <= cy < y2 for x1, y1, x2, y2 in boxes):
+            continue
+        detections.append({**copy.deepcopy(det), "bbox": [bx1, by1, bx2, by2]})
+
+    result = await executor.run(
+        _finalize_detections,
+        image,
+        prepared.stats,
+        detections,
+        all(found is not None for found in region_detections),
+        scale,
+        settings.color_region_max,
+        settings.color_region_min_area
+    )
+    result["regions_reanalyzed"] = len(boxes)
+    result["inference"] = {
+        "imgsz": pinned_imgsz(settings, crop) or DEFAULT_IMGSZ,
+        "policy": "regions",
+        "crop": crop or settings.default_crop
+    }
+    return result
+
+
+async def analyze_capture(
+    image_bytes: bytes,
+    position_id: str,
+    settings=None,
+    pipeline_key: Optional[str] = None,
+    crop: Optional[str] = None
+) -> CaptureAnalysis:
+    """
+    Analyze a fixed-camera capture relative to the last frame of its position.
+
+    A block-wise difference against the stored reference thumbnail decides:
+    unchanged captures reuse the previous vision result (and the previous
+    pipeline result when it was produced with the same ``pipeline_key``),
+    partially changed ones re-run YOLO on the changed regions only, and new
+    or heavily changed ones get a full analysis.
+    """
+    from ..config import get_settings
+
+    if settings is None:
+        settings = get_settings()
+
+    detector = get_change_detector(settings)
+    executor = get_inference_executor(settings)
+    thumbnail, size = await executor.run(_capture_thumbnail, image_bytes, detector)
+    report = detector.compare(position_id, thumbnail, size)
+    change = report.to_dict(position_id)
+
+    if report.status == CHANGE_UNCHANGED:
+        reference = report.reference
+        reusable = reference.pipeline_result if reference.pipeline_key == pipeline_key else None
+        return CaptureAnalysis(copy.deepcopy(reference.vision_result), change, copy.deepcopy(reusable))
+
+    if report.status == CHANGE_PARTIAL:
+        result = await _analyze_changed_regions(image_bytes, report, settings, crop)
+        change["regions_reanalyzed"] = result.pop("regions_reanalyzed", 0)
+    else:
+        result = await analyze_image_with_yolo(image_bytes, settings, tiled=False, crop=crop)
+
+    if not result.get("error"):
+        detector.update(position_id, thumbnail, size, result)
+    return CaptureAnalysis(result, change)
+
+
+def warmup_vision_model(settings, image_path: Optional[str] = None) -> dict:
+    """
+    Load the inference backend and run one dummy inference (blocking).
+
+    Uses ``image_path`` when it exists, otherwise a synthetic green frame,
+    so the first real request does not pay model-load and first-predict
+    latency. Raises if the model cannot be loaded.
+
+    Returns:
+        Timings in milliseconds for the load and the dummy inference
+    """
+    if image_path and Path(image_path).exists():
+        with Image.open(image_path) as img:
+            image = img.convert("RGB")
+    else:
+        logger.info(f"Warm-up image not found ({image_path}), using a synthetic frame")
+        image = Image.new("RGB", (640, 640), (60, 140, 60))
+
+    start = time.perf_counter()
+    with get_model_registry(settings).lease() as backend:
+        load_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        compute_color_stats(image, settings.color_analysis_downsample, get_color_lut(settings))
+        _warm_backend(backend, settings, image)
+        inference_ms = (time.perf_counter() - start) * 1000
+
+    return {"model_load_ms": round(load_ms, 1), "inference_ms": round(inference_ms, 1)}
+
+
 async def check_yolo_model(settings) -> dict:
     """Check if YOLO model is loaded and working."""
     try:
         model_path = settings.yolo_model_path
         exists = Path(model_path).exists()
+        cache = get_vision_cache(settings)
+        registry = get_model_registry(settings)
+        backend = registry.backend
 
         return {
             "status": "custom" if exists else "default",
             "model_path": model_path,
             "exists": exists,
+            "backend": settings.vision_backend,
+            "backend_model_path": backend.model_path if backend else active_model_path(settings),
+            "backend_loaded": backend is not None,
+            "process_workers": (
+                backend.pool.stats() if isinstance(backend, ProcessPoolBackend)
+                else {"workers": settings.vision_process_workers}
+            ),
+            "precision": backend.precision if backend else settings.vision_precision,
             "fallback": "color_analysis",
-            "yolo_error": _yolo_load_error
+            "yolo_error": registry.last_error,
+            "registry": registry.stats(),
+            "idle_unload": {
+                "enabled": settings.vision_idle_unload_seconds > 0,
+                "idle_seconds": settings.vision_idle_unload_seconds,
+                "reload_warmup": settings.vision_idle_reload_warmup,
+            },
+            "crop_models": {
+                "default_crop": settings.default_crop,
+                "configured": dict(settings.crop_models),
+                **(_crop_model_pool.stats() if _crop_model_pool else {"resident": []}),
+            },
+            "cache": cache.stats() if cache else {"enabled": False},
+            "executor": get_inference_executor(settings).stats(),
+            "change_detection": get_change_detector(settings).stats(),
+            "cascade": _cascade_screen.stats() if _cascade_screen else {"enabled": settings.cascade_enabled},
+            "micro_batcher": _micro_batcher.stats() if _micro_batcher else {"enabled": settings.micro_batch_enabled},
+            "resolution_policy": (
+                get_resolution_policy(settings).stats() if settings.adaptive_imgsz_enabled
+                else {"enabled": False, "imgsz": DEFAULT_IMGSZ}
+            )
         }
     except Exception as e:
         return {
@@ -0,0 +1,398 @@
+"""
+Topraksız Tarım AI Agent - Vision Inference Backends
+Interchangeable detector engines behind a common detection-dict interface.
+
+- ``ultralytics``: the original PyTorch eager path
+- ``onnx``: ONNX Runtime on CPU with numpy letterbox preprocessing and NMS
+"""
+from abc import ABC, abstractmethod
+from PIL import Image
+import ast
+import ctypes
+import gc
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Ultralytics defaults, mirrored so both backends produce the same boxes
+DEFAULT_IMGSZ = 640
+DEFAULT_IOU_THRESHOLD = 0.7
+LETTERBOX_COLOR = 114
+MAX_DETECTIONS = 300
+
+
+class VisionBackend(ABC):
+    """
+    Common interface for detector engines.
+
+    ``predict`` takes RGB PIL images and returns, per image, a list of
+    detection dicts: ``{"class_name", "confidence", "bbox", "source"}``
+    with ``bbox`` as ``[x1, y1, x2, y2]`` in the input image's pixels.
+    """
+
+    name: str = "base"
+    precision: str = "fp32"
+    fixed_imgsz: Optional[int] = None  # Input size pinned by a static export (overrides imgsz)
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+
+    @abstractmethod
+    def predict(
+        self,
+        images: list[Image.Image],
+        conf: float,
+        imgsz: int = DEFAULT_IMGSZ,
+        iou: float = DEFAULT_IOU_THRESHOLD
+    ) -> list[list[dict]]:
+        """Run detection on a batch of images."""
+
+    def close(self):
+        """Release model memory. The backend must not be used afterwards."""
+
+    def memory_mb(self) -> float:
+        """Estimated memory held by the loaded model (the weights file size by default)."""
+        try:
+            return Path(self.model_path).stat().st_size / 2 ** 20
+        except OSError:
+            return 0.0
+
+    def describe(self) -> dict:
+        return {
+            "backend": self.name,
+            "model_path": self.model_path,
+            "precision": self.precision,
+            "fixed_imgsz": self.fixed_imgsz,
+        }
+
+
+def release_backend(backend: VisionBackend):
+    """
+    Close ``backend`` and hand the freed heap back to the OS.
+
+    Dropping the model alone leaves its pages in the allocator's free
+    lists, so RSS would not shrink on idle-unloaded edge nodes.
+    """
+    backend.close()
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass  # Not glibc
+
+
+class BackendLeases:
+    """
+    In-flight use counts of shared backends.
+
+    Every predict on a shared backend runs between ``acquire`` and
+    ``release``. ``retire`` releases a backend that is no longer served
+    (swapped out, evicted, idle-unloaded) once its last user is done,
+    at once when nobody uses it, so a model is never closed under a
+    running request. Closing runs in a background thread, off the
+    caller's locks and request path.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users: dict[int, int] = {}
+        self._retired: dict[int, VisionBackend] = {}
+
+    def acquire(self, backend: VisionBackend):
+        with self._lock:
+            self._users[id(backend)] = self._users.get(id(backend), 0) + 1
+
+    def release(self, backend: VisionBackend):
+        with self._lock:
+            remaining = self._users[id(backend)] - 1
+            if remaining:
+                self._users[id(backend)] = remaining
+                return
+            del self._users[id(backend)]
+            retired = self._retired.pop(id(backend), None)
+        if retired is not None:
+            self._close(retired)
+
+    def retire(self, backend: VisionBackend):
+        with self._lock:
+            if self._users.get(id(backend)):
+                self._retired[id(backend)] = backend
+                return
+        self._close(backend)
+
+    @staticmethod
+    def _close(backend: VisionBackend):
+        threading.Thread(target=release_backend, args=(backend,), name="model-release", daemon=True).start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"in_flight": sum(self._users.values()), "retiring": len(self._retired)}
+
+
+# ── Ultralytics / PyTorch ──
+
+class UltralyticsBackend(VisionBackend):
+    """PyTorch eager inference through ultralytics ``YOLO.predict``."""
+
+    name = "ultralytics"
+
+    def __init__(self, model, model_path: str, precision: str = "fp32"):
+        super().__init__(model_path)
+        self.model = model
+        self.precision = precision
+        # Ultralytics predictors keep per-call state and are not thread-safe
+        self._lock = threading.Lock()
+
+    def predict(self, images, conf, imgsz=DEFAULT_IMGSZ, iou=DEFAULT_IOU_THRESHOLD):
+        with self._lock:
+            results = self.model.predict(
+                source=images,
+                conf=conf,
+                iou=iou,
+                imgsz=imgsz,
+                verbose=False
+            )
+        return [_parse_ultralytics_result(result) for result in results]
+
+    def memory_mb(self) -> float:
+        # Parameters and buffers of the PyTorch module; exported models fall back to file size
+        module = getattr(self.model, "model", None)
+        if not hasattr(module, "parameters"):
+            return super().memory_mb()
+        tensors = [*module.parameters(), *module.buffers()]
+        return sum(t.numel() * t.element_size() for t in tensors) / 2 ** 20
+
+    def close(self):
+        self.model = None
+
+
+def _parse_ultralytics_result(result) -> list[dict]:
+    """Convert a single ultralytics result into detection dicts."""
+    detections = []
+    boxes = result.boxes
+    if boxes is not None:
+        for i in range(len(boxes)):
+            bbox = boxes.xyxy[i].tolist()
+            confidence = float(boxes.conf[i])
+            class_id = int(boxes.cls[i])
+            class_name = result.names.get(class_id, f"class_{class_id}")
+
+            detections.append({
+                "class_name": class_name,
+                "confidence": confidence,
+                "bbox": bbox,
+                "source": "yolo"
+            })
+    return detections
+
+
+# ── ONNX Runtime ──
+
+def letterbox(image: Image.Image, size: int) -> tuple[np.ndarray, float, tuple[float, float]]:
+    """
+    Resize keeping aspect ratio and pad to ``size`` x ``size`` (ultralytics style).
+
+    Returns:
+        (CHW float32 array in [0, 1], scale ratio, (pad_x, pad_y))
+    """
+    width, height = image.size
+    ratio = min(size / width, size / height)
+    new_w, new_h = int(round(width * ratio)), int(round(height * ratio))
+    pad_x, pad_y = (size - new_w) / 2, (size - new_h) / 2
+
+    canvas = np.full((size, size, 3), LETTERBOX_COLOR, dtype=np.uint8)
+    left, top = int(round(pad_x - 0.1)), int(round(pad_y - 0.1))
+    resized = image.resize((new_w, new_h), Image.BILINEAR) if (new_w, new_h) != (width, height) else image
+    canvas[top:top + new_h, left:left + new_w] = np.asarray(resized)
+
+    chw = canvas.transpose(2, 0, 1).astype(np.float32) / 255.0
+    return chw, ratio, (left, top)
+
+
+def box_iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """IoU of one xyxy box against many."""
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / np.maximum(area + areas - inter, 1e-9)
+
+
+def non_max_suppression(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    class_ids: np.ndarray,
+    iou_threshold: float = DEFAULT_IOU_THRESHOLD,
+    max_detections: int = MAX_DETECTIONS
+) -> np.ndarray:
+    """
+    Class-aware greedy NMS on xyxy boxes.
+
+    Boxes of different classes never suppress each other (they are offset
+    into disjoint coordinate ranges, as ultralytics does).
+
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    offset = boxes.max() + 1
+    shifted = boxes + (class_ids.astype(boxes.dtype) * offset)[:, None]
+    order = np.argsort(-scores)
+    keep = []
+
+    while order.size and len(keep) < max_detections:
+        current = order[0]
+        keep.append(current)
+        if order.size == 1:
+            break
+        ious = box_iou(shifted[current], shifted[order[1:]])
+        order = order[1:][ious <= iou_threshold]
+
+    return np.asarray(keep, dtype=np.int64)
+
+
+class OnnxBackend(VisionBackend):
+    """
+    ONNX Runtime CPU inference for YOLOv8 detection exports.
+
+    Expects the standard ultralytics export output of shape
+    ``(batch, 4 + num_classes, anchors)``; class names are read from the
+    ``names`` metadata that ultralytics embeds in the model.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_path: str, intra_op_threads: int = 0, precision: str = "fp32"):
+        super().__init__(model_path)
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError(
+                "onnxruntime is not installed; `pip install onnxruntime` to use VISION_BACKEND=onnx"
+            ) from e
+
+        if not Path(model_path).exists():
+            raise FileNotFoundError(
+                f"ONNX model not found at {model_path} (export it with `python -m src.scripts.export_onnx`)"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.precision = precision
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+
+        # Static exports pin batch and/or spatial size; dynamic ones use strings/None
+        batch_dim, _, height_dim, _ = model_input.shape
+        self.fixed_batch = batch_dim if isinstance(batch_dim, int) else None
+        self.fixed_imgsz = height_dim if isinstance(height_dim, int) else None
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = self._parse_names(metadata.get("names"))
+        logger.info(
+            f"ONNX model loaded from {model_path} "
+            f"(batch={self.fixed_batch or 'dynamic'}, imgsz={self.fixed_imgsz or 'dynamic'}, "
+            f"{len(self.names)} classes)"
+        )
+
+    @staticmethod
+    def _parse_names(raw: Optional[str]) -> dict[int, str]:
+        if not raw:
+            return {}
+        try:
+            return {int(k): str(v) for k, v in ast.literal_eval(raw).items()}
+        except (ValueError, SyntaxError, AttributeError):
+            logger.warning("Could not parse class names from ONNX metadata")
+            return {}
+
+    def _postprocess(
+        self,
+        output: np.ndarray,
+        conf: float,
+        iou: float,
+        ratio: float,
+        pad: tuple[float, float],
+        image_size: tuple[int, int]
+    ) -> list[dict]:
+        """Decode one image's raw output (4 + nc, anchors) into detection dicts."""
+        predictions = output.T  # (anchors, 4 + nc)
+        class_scores = predictions[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(class_scores)), class_ids]
+
+        mask = scores > conf
+        if not mask.any():
+            return []
+        predictions, scores, class_ids = predictions[mask], scores[mask], class_ids[mask]
+
+        # xywh (letterboxed input pixels) → xyxy
+        xy, wh = predictions[:, :2], predictions[:, 2:4]
+        boxes = np.concatenate([xy - wh / 2, xy + wh / 2], axis=1)
+
+        keep = non_max_suppression(boxes, scores, class_ids, iou)
+        boxes, scores, class_ids = boxes[keep], scores[keep], class_ids[keep]
+
+        # Undo letterbox and clip to the original image
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad[0]) / ratio
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad[1]) / ratio
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, image_size[0])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, image_size[1])
+
+        return [
+            {
+                "class_name": self.names.get(int(class_id), f"class_{int(class_id)}"),
+                "confidence": float(score),
+                "bbox": box.tolist(),
+                "source": "yolo"
+            }
+            for box, score, class_id in zip(boxes, scores, class_ids)
+        ]
+
+    def predict(self, images, conf, imgsz=DEFAULT_IMGSZ, iou=DEFAULT_IOU_THRESHOLD):
+        if not images:
+            return []
+        size = self.fixed_imgsz or imgsz
+
+        prepared = [letterbox(image, size) for image in images]
+        batch = np.stack([p[0] for p in prepared])
+
+        if self.fixed_batch is None:
+            outputs = self.session.run(None, {self.input_name: batch})[0]
+        else:
+            # Static-batch export: feed fixed-size chunks
+            chunks = []
+            step = self.fixed_batch
+            for start in range(0, len(batch), step):
+                chunk = batch[start:start + step]
+                missing = step - len(chunk)
+                if missing:
+                    chunk = np.concatenate([chunk, np.zeros((missing,) + chunk.shape[1:], chunk.dtype)])
+                chunks.append(self.session.run(None, {self.input_name: chunk})[0][:step - missing])
+            outputs = np.concatenate(chunks)
+
+        return [
+            self._postprocess(output, conf, iou, ratio, pad, image.size)
+            for output, (_, ratio, pad), image in zip(outputs, prepared, images)
+        ]
+
+    def close(self):
+        self.session = None
+
+
+def onnx_path_for(weights_path: str) -> str:
+    """Default ONNX artifact path next to a ``.pt`` weights file."""
+    return str(Path(weights_path).with_suffix(".onnx"))
@@ -0,0 +1,203 @@
+"""
+Topraksız Tarım AI Agent - Vision Result Cache
+Perceptual-hash keyed cache so repeated or near-identical uploads skip inference.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from PIL import Image
+import copy
+import io
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# dHash grid: (HASH_SIZE + 1) x HASH_SIZE thumbnail → 64-bit hash
+HASH_SIZE = 8
+
+
+def compute_dhash(image: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """
+    Difference hash of an image.
+
+    The image is reduced to a tiny grayscale thumbnail and each bit records
+    whether a pixel is brighter than its right neighbour. Recompression,
+    resizing and small exposure changes leave most bits intact.
+    """
+    thumb = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = thumb.tobytes()
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hash_image_bytes(image_bytes: bytes) -> tuple[int, tuple[int, int]]:
+    """
+    Hash raw upload bytes without a full-resolution decode.
+
+    JPEG draft mode lets the decoder scale down during decoding, so hashing
+    a 12 MP photo only touches a small fraction of its pixels.
+
+    Returns:
+        (dhash, (width, height)) of the original image
+    """
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        size = img.size
+        img.draft("L", (64, 64))
+        return compute_dhash(img), size
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return (a ^ b).bit_count()
+
+
+@dataclass
+class _CacheEntry:
+    phash: int
+    namespace: str
+    size: tuple[int, int]
+    result: dict
+    stored_at: float
+
+
+def _scale_bboxes(result: dict, from_size: tuple[int, int], to_size: tuple[int, int]) -> dict:
+    """Rescale cached bboxes to the dimensions of the image being served."""
+    if from_size == to_size or not from_size[0] or not from_size[1]:
+        return result
+
+    sx = to_size[0] / from_size[0]
+    sy = to_size[1] / from_size[1]
+    for det in result.get("detections", []):
+        for box_owner in [det, *det.get("regions", [])]:
+            bbox = box_owner.get("bbox")
+            if bbox and len(bbox) == 4:
+                box_owner["bbox"] = [bbox[0] * sx, bbox[1] * sy, bbox[2] * sx, bbox[3] * sy]
+    return result
+
+
+class VisionResultCache:
+    """
+    LRU + TTL cache of vision results keyed by perceptual hash.
+
+    Entries live in a namespace (model version + confidence threshold), so
+    swapping weights or thresholds never serves stale detections. Lookups
+    first try an exact hash match, then the closest stored hash within
+    ``max_distance`` bits.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600, max_distance: int = 4):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self._entries: OrderedDict[tuple[str, int], _CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, entry: _CacheEntry, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry.stored_at > self.ttl_seconds
+
+    def get(self, phash: int, namespace: str, size: tuple[int, int]) -> Optional[dict]:
+        """Return a copy of the cached result for a (near-)duplicate image, or None."""
+        now = time.monotonic()
+
+        with self._lock:
+            key = (namespace, phash)
+            entry = self._entries.get(key)
+            near = False
+
+            if entry is not None and self._expired(entry, now):
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None and self.max_distance > 0:
+                best_distance = self.max_distance + 1
+                for candidate_key, candidate in self._entries.items():
+                    if candidate.namespace != namespace or self._expired(candidate, now):
+                        continue
+                    distance = hamming_distance(phash, candidate.phash)
+                    if distance < best_distance:
+                        best_distance, entry, key = distance, candidate, candidate_key
+                near = entry is not None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if near:
+                self.near_hits += 1
+            else:
+                self.hits += 1
+            result = copy.deepcopy(entry.result)
+            from_size = entry.size
+
+        return _scale_bboxes(result, from_size, size)
+
+    def put(self, phash: int, namespace: str, size: tuple[int, int], result: dict):
+        """Store a result, evicting the least recently used entry when full."""
+        entry = _CacheEntry(
+            phash=phash,
+            namespace=namespace,
+            size=size,
+            result=copy.deepcopy(result),
+            stored_at=time.monotonic()
+        )
+        with self._lock:
+            key = (namespace, phash)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "max_distance": self.max_distance,
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round((self.hits + self.near_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Global cache instance (lazy created)
+_vision_cache: Optional[VisionResultCache] = None
+
+
+def get_vision_cache(settings) -> Optional[VisionResultCache]:
+    """Get the process-wide vision cache, or None when caching is disabled."""
+    global _vision_cache
+
+    if not settings.vision_cache_enabled:
+        return None
+
+    if _vision_cache is None:
+        _vision_cache = VisionResultCache(
+            max_entries=settings.vision_cache_max_entries,
+            ttl_seconds=settings.vision_cache_ttl_seconds,
+            max_distance=settings.vision_cache_max_distance
+        )
+    return _vision_cache
@@ -0,0 +1,330 @@
+"""
+Topraksız Tarım AI Agent - Vision Worker Processes
+Optional pool of model-holding processes so one API process can drive every
+core for YOLO inference. Decoded images travel through shared memory; only
+small detection dicts come back over each worker's result pipe.
+"""
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from multiprocessing import connection, shared_memory
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from typing import Optional
+
+from PIL import Image
+import numpy as np
+
+from .vision_backends import DEFAULT_IMGSZ, DEFAULT_IOU_THRESHOLD, VisionBackend
+
+logger = logging.getLogger(__name__)
+
+# How often the supervisor checks worker liveness
+_MONITOR_INTERVAL = 0.5
+# Restart backoff for workers that keep dying (seconds, doubled per failure)
+_RESTART_BACKOFF = 0.5
+_RESTART_BACKOFF_MAX = 30.0
+
+
+class WorkerCrashed(RuntimeError):
+    """Raised for tasks that were in flight when their worker process died."""
+
+
+def _worker_main(worker_id: int, settings_data: dict, model_path: str, tasks, results):
+    """
+    Worker process entry point: load one model, then serve tasks until ``None``.
+
+    A task is ``(task_id, shm_name, shapes, conf, imgsz, iou)``; images are
+    read as uint8 RGB arrays laid out back to back in the shared block.
+    Replies go through ``results``, the write end of this worker's own pipe.
+    """
+    from ..config import Settings
+    from .vision import _create_vision_backend
+
+    settings = Settings(**settings_data)
+    if settings.vision_worker_threads > 0:
+        import torch
+        torch.set_num_threads(settings.vision_worker_threads)
+
+    try:
+        backend = _create_vision_backend(settings, model_path)
+    except Exception as e:
+        results.send(("failed", worker_id, repr(e)))
+        return
+    results.send(("ready", worker_id, backend.describe()))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        task_id, shm_name, shapes, conf, imgsz, iou = task
+        try:
+            shm = shared_memory.SharedMemory(name=shm_name)
+        except FileNotFoundError:
+            continue  # Caller gave up and released the block
+
+        try:
+            images, offset = [], 0
+            for shape in shapes:
+                array = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+                # Copy inside the worker: PIL must not keep pointers into the block
+                images.append(Image.fromarray(array.copy()))
+                offset += array.nbytes
+                del array
+            results.send((task_id, backend.predict(images, conf=conf, imgsz=imgsz, iou=iou), None))
+        except Exception as e:
+            results.send((task_id, None, repr(e)))
+        finally:
+            shm.close()
+
+    backend.close()
+
+
+@dataclass
+class _Worker:
+    index: int
+    process: mp.Process
+    tasks: object  # multiprocessing.Queue
+    results: object  # Read end of the worker's result pipe
+    ready: bool = False
+    inflight: set[int] = field(default_factory=set)
+    failures: int = 0          # Consecutive deaths without becoming ready
+    restart_at: float = 0.0    # Scheduled restart time once dead
+
+
+class VisionWorkerPool:
+    """
+    Supervised pool of vision worker processes.
+
+    ``predict`` blocks the calling thread (an inference-executor thread)
+    until a worker returns the detections. Tasks go to the worker with the
+    fewest in-flight tasks. A worker that dies is restarted automatically;
+    its in-flight tasks fail with ``WorkerCrashed`` so callers can fall
+    back to color analysis.
+    """
+
+    def __init__(self, settings, model_path: str, num_workers: int, task_timeout: float = 120.0):
+        self.model_path = model_path
+        self.num_workers = max(1, num_workers)
+        self.task_timeout = task_timeout
+        # Workers build a local backend instead of another pool
+        self._settings_data = settings.model_copy(update={"vision_process_workers": 0}).model_dump()
+        self._ctx = mp.get_context("spawn")  # Never fork a process holding torch threads
+        self._lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._futures: dict[int, tuple[int, Future]] = {}
+        self._closing = False
+        self.fixed_imgsz: Optional[int] = None  # Reported by the workers' backend once ready
+        self.restarts = 0
+        self.completed = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+
+        self._workers = [self._spawn(i) for i in range(self.num_workers)]
+        self._collector = threading.Thread(target=self._collect, name="vision-worker-results", daemon=True)
+        self._collector.start()
+        self._monitor = threading.Thread(target=self._supervise, name="vision-worker-monitor", daemon=True)
+        self._monitor.start()
+        logger.info(f"Vision worker pool started: {self.num_workers} process(es)")
+
+    def _spawn(self, index: int) -> _Worker:
+        # One result pipe per worker: a shared queue's write lock stays held
+        # forever when a worker is killed mid-send, blocking every other worker
+        tasks = self._ctx.Queue()
+        results, writer = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(index, self._settings_data, self.model_path, tasks, writer),
+            name=f"vision-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        writer.close()  # Only the worker writes; EOF then signals its exit
+        return _Worker(index, process, tasks, results)
+
+    def _collect(self):
+        """Resolve futures from worker results (runs in a daemon thread)."""
+        while not self._closing:
+            with self._lock:
+                pipes = [worker.results for worker in self._workers if not worker.results.closed]
+            for pipe in connection.wait(pipes, timeout=_MONITOR_INTERVAL):
+                try:
+                    message = pipe.recv()
+                except (EOFError, OSError):
+                    pipe.close()  # Worker exited; the supervisor restarts it
+                    continue
+                self._handle_result(message)
+
+    def _handle_result(self, message: tuple):
+        """Apply one worker message: a ready/failed notice or a task result."""
+        kind, payload, error = message
+        if kind in ("ready", "failed"):
+            with self._lock:
+                worker = self._workers[payload]
+                worker.ready = kind == "ready"
+                if worker.ready:
+                    worker.failures = 0
+            if kind == "failed":
+                self.last_error = error
+                logger.error(f"Vision worker {payload} could not load the model: {error}")
+            else:
+                self.fixed_imgsz = error.get("fixed_imgsz")
+                logger.info(f"Vision worker {payload} ready: {error}")
+            return
+
+        with self._lock:
+            entry = self._futures.pop(kind, None)
+            if entry is not None:
+                self._workers[entry[0]].inflight.discard(kind)
+        if entry is None:
+            return  # Task already failed (timeout or crash)
+
+        future = entry[1]
+        if error is None:
+            self.completed += 1
+            future.set_result(payload)
+        else:
+            self.failed += 1
+            future.set_exception(RuntimeError(f"Vision worker error: {error}"))
+
+    def _supervise(self):
+        """Fail in-flight tasks of dead workers and restart them with backoff."""
+        while not self._closing:
+            time.sleep(_MONITOR_INTERVAL)
+            now = time.monotonic()
+            for index, worker in enumerate(self._workers):
+                if self._closing or worker.process.is_alive():
+                    continue
+
+                exitcode = worker.process.exitcode
+                with self._lock:
+                    lost = [self._futures.pop(task_id) for task_id in worker.inflight if task_id in self._futures]
+                    worker.inflight.clear()
+                    worker.ready = False
+
+                    if not worker.restart_at:
+                        delay = min(_RESTART_BACKOFF * 2 ** worker.failures, _RESTART_BACKOFF_MAX)
+                        worker.restart_at = now + delay
+                        self.last_error = f"worker {index} exited with code {exitcode}"
+                        logger.error(f"Vision worker {index} died (exit code {exitcode}); restarting in {delay:.1f}s")
+                    elif now >= worker.restart_at:
+                        replacement = self._spawn(index)
+                        replacement.failures = worker.failures + 1
+                        self._workers[index] = replacement
+                        self.restarts += 1
+
+                for _, future in lost:
+                    self.failed += 1
+                    future.set_exception(WorkerCrashed(f"Vision worker {index} crashed (exit code {exitcode})"))
+
+    def predict(
+        self,
+        images: list[Image.Image],
+        conf: float,
+        imgsz: int = DEFAULT_IMGSZ,
+        iou: float = DEFAULT_IOU_THRESHOLD
+    ) -> list[list[dict]]:
+        """Run one batch on the least busy worker (blocking)."""
+        if not images:
+            return []
+
+        arrays = [np.asarray(image if image.mode == "RGB" else image.convert("RGB")) for image in images]
+        shm = shared_memory.SharedMemory(create=True, size=max(1, sum(a.nbytes for a in arrays)))
+        try:
+            offset = 0
+            for array in arrays:
+                np.ndarray(array.shape, dtype=np.uint8, buffer=shm.buf, offset=offset)[...] = array
+                offset += array.nbytes
+
+            future = Future()
+            with self._lock:
+                if self._closing:
+                    raise RuntimeError("Vision worker pool is shut down")
+                task_id = next(self._task_ids)
+                worker = min(
+                    self._workers,
+                    key=lambda w: (w.restart_at > 0, not w.ready, len(w.inflight))
+                )
+                worker.inflight.add(task_id)
+                self._futures[task_id] = (worker.index, future)
+                worker.tasks.put((task_id, shm.name, [a.shape for a in arrays], conf, imgsz, iou))
+
+            try:
+                return future.result(timeout=self.task_timeout)
+            except TimeoutError:
+                with self._lock:
+                    entry = self._futures.pop(task_id, None)
+                    if entry is not None:
+                        self._workers[entry[0]].inflight.discard(task_id)
+                self.failed += 1
+                raise
+        finally:
+            # The caller owns the block; workers only attach to it
+            shm.close()
+            shm.unlink()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.num_workers,
+                "alive": sum(w.process.is_alive() for w in self._workers),
+                "ready": sum(w.ready for w in self._workers),
+                "inflight": len(self._futures),
+                "completed": self.completed,
+                "failed": self.failed,
+                "restarts": self.restarts,
+                "last_error": self.last_error,
+            }
+
+    def shutdown(self, timeout: float = 5.0):
+        with self._lock:
+            self._closing = True
+            pending = list(self._futures.values())
+            self._futures.clear()
+        for _, future in pending:
+            future.set_exception(RuntimeError("Vision worker pool is shut down"))
+
+        for worker in self._workers:
+            try:
+                worker.tasks.put(None)
+            except (ValueError, OSError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+
+class ProcessPoolBackend(VisionBackend):
+    """Vision backend that forwards every batch to a ``VisionWorkerPool``."""
+
+    def __init__(self, settings, model_path: str):
+        super().__init__(model_path)
+        self.name = settings.vision_backend
+        self.precision = settings.vision_precision
+        self.pool = VisionWorkerPool(
+            settings,
+            model_path,
+            settings.vision_process_workers,
+            task_timeout=settings.vision_worker_timeout_seconds
+        )
+
+    @property
+    def fixed_imgsz(self) -> Optional[int]:
+        return self.pool.fixed_imgsz
+
+    def predict(self, images, conf, imgsz=DEFAULT_IMGSZ, iou=DEFAULT_IOU_THRESHOLD):
+        return self.pool.predict(images, conf=conf, imgsz=imgsz, iou=iou)
+
+    def memory_mb(self) -> float:
+        return super().memory_mb() * self.pool.num_workers  # One copy per worker process
+
+    def close(self):
+        self.pool.shutdown()
+
+    def describe(self) -> dict:
+        return {**super().describe(), "process_workers": self.pool.stats()}
@@ -0,0 +1,127 @@
+"""
+Topraksız Tarım AI Agent - Startup Warm-up
+Preloads models and connections so the first real request is not slow.
+"""
+from dataclasses import dataclass, field
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupStatus:
+    """Readiness state of the application."""
+    ready: bool = False
+    enabled: bool = False
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    steps: dict[str, dict] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        duration = None
+        if self.started_at is not None and self.finished_at is not None:
+            duration = round((self.finished_at - self.started_at) * 1000, 1)
+        return {
+            "ready": self.ready,
+            "enabled": self.enabled,
+            "duration_ms": duration,
+            "steps": self.steps,
+        }
+
+
+# Process-wide readiness state
+_status = WarmupStatus()
+
+
+def get_warmup_status() -> WarmupStatus:
+    """Current readiness state."""
+    return _status
+
+
+def mark_ready(enabled: bool = False):
+    """Mark the application ready without warming up (warm-up disabled)."""
+    _status.enabled = enabled
+    _status.ready = True
+
+
+async def _run_step(name: str, step: Callable[[], Awaitable[Optional[dict]]]):
+    """Run one warm-up step and record its outcome; failures never abort warm-up."""
+    start = time.perf_counter()
+    try:
+        details = await step()
+        _status.steps[name] = {"status": "ok", **(details or {})}
+    except Exception as e:
+        logger.warning(f"Warm-up step '{name}' failed: {e}")
+        _status.steps[name] = {"status": "failed", "error": str(e)}
+    _status.steps[name]["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+
+async def _warm_yolo(settings) -> dict:
+    from .inference_executor import get_inference_executor
+    from .vision import warmup_vision_model
+
+    executor = get_inference_executor(settings)
+    return await executor.run(warmup_vision_model, settings, settings.warmup_image_path)
+
+
+async def _warm_ollama_llm(settings) -> dict:
+    from .embeddings import get_client
+
+    # An empty prompt makes Ollama load the model into memory without generating
+    client = await get_client()
+    response = await client.post(
+        f"{settings.ollama_host}/api/generate",
+        json={"model": settings.ollama_model, "prompt": "", "stream": False},
+        timeout=settings.warmup_timeout_seconds
+    )
+    response.raise_for_status()
+    return {"model": settings.ollama_model}
+
+
+async def _warm_ollama_embed(settings) -> dict:
+    from .embeddings import get_embeddings
+
+    # Bypass the embedding cache: the point is to make Ollama load the model
+    embedding = (await get_embeddings(["warm-up"], settings, use_cache=False))[0]
+    if not embedding or not any(embedding):
+        raise RuntimeError("Embedding model returned an empty vector")
+    return {"model": settings.ollama_embed_model, "dimension": len(embedding)}
+
+
+async def _warm_qdrant(settings) -> dict:
+    from .rag import get_qdrant_client
+
+    client = await get_qdrant_client(settings)
+    if client is None:
+        raise RuntimeError("Qdrant is not available")
+    return {"collection": settings.qdrant_collection}
+
+
+async def run_warmup(settings):
+    """
+    Warm up every backing model and connection, then mark the app ready.
+
+    Steps run concurrently: YOLO load + dummy inference, Ollama generation
+    model, Ollama embedding model and the Qdrant connection. A failing step
+    is recorded but does not keep the app unready, since every component
+    has a runtime fallback.
+    """
+    _status.enabled = True
+    _status.ready = False
+    _status.started_at = time.monotonic()
+    logger.info("🔥 Warm-up started")
+
+    steps = {
+        "yolo": lambda: _warm_yolo(settings),
+        "ollama_llm": lambda: _warm_ollama_llm(settings),
+        "ollama_embed": lambda: _warm_ollama_embed(settings),
+        "qdrant": lambda: _warm_qdrant(settings),
+    }
+    await asyncio.gather(*(_run_step(name, step) for name, step in steps.items()))
+
+    _status.finished_at = time.monotonic()
+    _status.ready = True
+    logger.info(f"🔥 Warm-up finished: {_status.to_dict()}")
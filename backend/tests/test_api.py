@@ -3,6 +3,7 @@ Backend Tests - API Tests
 """
 import pytest
 from fastapi.testclient import TestClient
+from backend.src.config import Settings, get_settings
 from backend.src.main import app
 
 client = TestClient(app)
@@ -39,3 +40,80 @@ def test_analyze_with_invalid_file():
         files={"file": ("test.txt", b"hello world", "text/plain")}
     )
     assert response.status_code == 400
+
+
+def test_analyze_batch_without_files():
+    """Test batch analyze endpoint without files."""
+    response = client.post("/api/v1/analyze/batch")
+    assert response.status_code == 422  # Validation error
+
+
+def test_analyze_batch_with_invalid_file():
+    """Test batch analyze endpoint rejects non-image files."""
+    response = client.post(
+        "/api/v1/analyze/batch",
+        files=[
+            ("files", ("leaf.jpg", b"not really a jpeg", "image/jpeg")),
+            ("files", ("notes.txt", b"hello world", "text/plain")),
+        ]
+    )
+    assert response.status_code == 400
+
+
+def test_ready_after_startup():
+    """Readiness turns green once startup (without warm-up) completes."""
+    with TestClient(app) as started_client:
+        response = started_client.get("/ready")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["ready"] is True
+        assert data["status"] == "ready"
+
+
+def test_admin_endpoints_disabled_without_key():
+    """Model hot-swap endpoints refuse every caller until an admin key is configured."""
+    response = client.post("/api/v1/models/versions", json={"path": "weights.pt"})
+    assert response.status_code == 503
+    assert client.post("/api/v1/models/rollback").status_code == 503
+
+
+def test_register_model_outside_model_dir_rejected():
+    """Admin registration only accepts weights inside the model directory."""
+    app.dependency_overrides[get_settings] = lambda: Settings(admin_api_key="secret")
+    try:
+        unauthorized = client.post("/api/v1/models/versions", json={"path": "weights.pt"})
+        assert unauthorized.status_code == 401
+        response = client.post(
+            "/api/v1/models/versions",
+            json={"path": "../../etc/passwd"},
+            headers={"X-Admin-Key": "secret"}
+        )
+        assert response.status_code == 400
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_register_missing_model_rejected(tmp_path):
+    """A mistyped weights path is refused up front instead of failing at activation."""
+    app.dependency_overrides[get_settings] = lambda: Settings(admin_api_key="secret", vision_model_dir=str(tmp_path))
+    try:
+        response = client.post(
+            "/api/v1/models/versions",
+            json={"path": "tomato_v2_typo.pt", "activate": True},
+            headers={"X-Admin-Key": "secret"}
+        )
+        assert response.status_code == 400
+        assert "not found" in response.json()["detail"]
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_analyze_unknown_crop_rejected():
+    """Crops without a configured detector are rejected before analysis."""
+    response = client.post(
+        "/api/v1/analyze",
+        files={"file": ("leaf.jpg", b"not-an-image", "image/jpeg")},
+        data={"crop": "banana"}
+    )
+    assert response.status_code == 400
+    assert "tomato" in response.json()["detail"]
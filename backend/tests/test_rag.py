@@ -0,0 +1,237 @@
+"""
+Backend Tests - RAG Service Tests
+"""
+import asyncio
+import json
+
+import numpy as np
+
+from backend.src.config import BACKEND_DIR, Settings, backend_path
+from backend.src.services import embedding_cache, embeddings
+
+
+def test_embedding_cache_dedups_and_survives_restart(tmp_path, monkeypatch):
+    """Identical texts are embedded once; vectors persist in the SQLite tier."""
+    requested = []
+
+    async def fake_request(texts, settings):
+        requested.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    monkeypatch.setattr(embeddings, "_request_embeddings", fake_request)
+    monkeypatch.setattr(embedding_cache, "_embedding_cache", None)
+    settings = Settings(embedding_cache_path=str(tmp_path / "embeddings.sqlite3"))
+
+    first = asyncio.run(embeddings.get_embeddings(["early  blight", "early blight", "chlorosis"], settings))
+    assert requested == [["early  blight", "chlorosis"]]
+    assert first[0] == first[1] == [13.0, 1.0]
+
+    # Fresh process: memory tier empty, disk tier still has the vectors
+    embedding_cache.get_embedding_cache(settings).close()
+    monkeypatch.setattr(embedding_cache, "_embedding_cache", None)
+    again = asyncio.run(embeddings.get_embeddings(["chlorosis"], settings))
+    assert again == [[9.0, 1.0]] and len(requested) == 1
+
+    stats = embedding_cache.get_embedding_cache(settings).stats()
+    assert stats["disk_hits"] == 1 and stats["disk_entries"] == 2
+    # Both tiers hold float32 arrays; callers get plain lists
+    key = embedding_cache.embedding_key(settings.ollama_embed_model, "chlorosis")
+    hit = embedding_cache.get_embedding_cache(settings).get_many([key])
+    assert [vector.dtype for vector in hit.values()] == [np.float32]
+    assert type(again[0][0]) is float
+
+
+def test_embedding_cache_path_resolves_against_backend_dir():
+    """A relative cache path means the same file whichever directory the process starts in."""
+    assert backend_path("./data/embedding_cache.sqlite3") == str(BACKEND_DIR / "data" / "embedding_cache.sqlite3")
+    assert backend_path("/var/cache/embeddings.sqlite3") == "/var/cache/embeddings.sqlite3"
+
+
+def test_batched_embed_client_keeps_order_and_retries(monkeypatch):
+    """Texts go out in /api/embed batches; a failed batch is split and retried."""
+    import httpx
+
+    batches = []
+
+    def handler(request):
+        texts = json.loads(request.content)["input"]
+        batches.append(len(texts))
+        if len(batches) == 1:
+            return httpx.Response(500)
+        return httpx.Response(200, json={"embeddings": [[float(text.split()[-1])] for text in texts]})
+
+    monkeypatch.setattr(embeddings, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(embeddings, "_batch_size", None)
+    settings = Settings(
+        embedding_cache_enabled=False,
+        embed_batch_size=4,
+        embed_max_concurrency=2,
+        embed_retry_backoff_seconds=0
+    )
+
+    texts = [f"chunk {i}" for i in range(10)]
+    vectors = asyncio.run(embeddings.get_embeddings(texts, settings))
+
+    assert vectors == [[float(i)] for i in range(10)]
+    assert max(batches) <= 4 and sum(batches[1:]) == 10
+    assert embeddings.get_batch_size(settings).stats()["retries"] == 1
+
+
+def test_retrieval_cache_invalidated_by_ingest(monkeypatch):
+    """Repeated searches hit the cache until an ingest bumps the knowledge-base version."""
+    from types import SimpleNamespace
+
+    from qdrant_client import AsyncQdrantClient
+
+    from backend.src.services import rag, retrieval_cache
+
+    client = AsyncQdrantClient(":memory:")
+    searches = []
+
+    async def query_points(**kwargs):
+        searches.append(kwargs["query_filter"])
+        point = SimpleNamespace(id=1, score=0.9, payload={"title": "Erken Yanıklık", "content": "..."})
+        return SimpleNamespace(points=[point])
+
+    async def fake_embedding(text, settings):
+        return [1.0, 0.0]
+
+    client.query_points = query_points
+    monkeypatch.setattr(rag, "_qdrant_client", client)
+    monkeypatch.setattr(rag, "_qdrant_available", True)
+    monkeypatch.setattr(rag, "_collection_version", None)
+    monkeypatch.setattr(rag, "get_single_embedding", fake_embedding)
+    monkeypatch.setattr(retrieval_cache, "_retrieval_cache", None)
+    settings = Settings(retrieval_version_check_seconds=0)
+
+    search = lambda **kwargs: asyncio.run(rag.search_knowledge_base("early blight", 3, settings, **kwargs))
+    first = search()
+    assert search() == first and len(searches) == 1
+    search(filters={"source": "guide.pdf"})
+    assert len(searches) == 2 and searches[1] is not None
+
+    asyncio.run(rag.bump_collection_version(client, settings))
+    search()
+    assert len(searches) == 3
+    assert rag.retrieval_cache_status(settings)["hits"] == 1
+
+
+def test_bulk_ingest_bumps_version_once(monkeypatch):
+    """A bulk load writes every document, then invalidates cached searches a single time."""
+    from qdrant_client import AsyncQdrantClient
+    from qdrant_client.models import Distance, VectorParams
+
+    from backend.src.services import rag
+
+    settings = Settings()
+    client = AsyncQdrantClient(":memory:")
+    asyncio.run(client.create_collection(
+        collection_name=settings.qdrant_collection,
+        vectors_config=VectorParams(size=2, distance=Distance.COSINE)
+    ))
+    bumps = []
+
+    async def fake_embeddings(texts, settings):
+        return [[1.0, 0.0] for _ in texts]
+
+    async def fake_bump(client, settings):
+        bumps.append(settings.qdrant_collection)
+
+    monkeypatch.setattr(rag, "_qdrant_client", client)
+    monkeypatch.setattr(rag, "_qdrant_available", True)
+    monkeypatch.setattr(embeddings, "get_embeddings", fake_embeddings)
+    monkeypatch.setattr(rag, "bump_collection_version", fake_bump)
+
+    documents = [{"content": f"Belge {i} içeriği", "title": f"Belge {i}"} for i in range(3)]
+    doc_ids = asyncio.run(rag.add_documents_bulk(documents, settings))
+
+    assert all(doc_ids) and len(bumps) == 1
+    assert asyncio.run(client.count(settings.qdrant_collection)).count == 3
+
+
+def test_seed_script_bumps_the_version_the_api_reads(tmp_path, monkeypatch):
+    """Re-seeding through scripts/seed_knowledge.py invalidates every node's cached searches."""
+    import importlib.util
+    from qdrant_client import AsyncQdrantClient, QdrantClient
+
+    from backend.src.services import rag
+
+    spec = importlib.util.spec_from_file_location("seed_knowledge", BACKEND_DIR.parent / "scripts" / "seed_knowledge.py")
+    seed_knowledge = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(seed_knowledge)
+
+    qdrant = QdrantClient(path=str(tmp_path))
+    first = seed_knowledge.bump_collection_version(qdrant)
+    version = seed_knowledge.bump_collection_version(qdrant)  # Every re-seed gets a new version
+    qdrant.close()
+    assert version != first
+
+    monkeypatch.setattr(rag, "_collection_version", None)
+    client = AsyncQdrantClient(path=str(tmp_path))
+    try:
+        assert asyncio.run(rag.get_collection_version(client, Settings())) == version
+    finally:
+        asyncio.run(client.close())
+
+
+def test_qdrant_client_receives_grpc_settings(monkeypatch):
+    """QDRANT_PREFER_GRPC and QDRANT_GRPC_PORT reach the AsyncQdrantClient constructor."""
+    from types import SimpleNamespace
+
+    from backend.src.services import rag
+
+    created = []
+
+    class FakeAsyncClient:
+        def __init__(self, **kwargs):
+            created.append(kwargs)
+
+        async def get_collections(self):
+            return SimpleNamespace(collections=[SimpleNamespace(name="agricultural_knowledge")])
+
+    monkeypatch.setattr(rag, "AsyncQdrantClient", FakeAsyncClient)
+    cases = (
+        (Settings(), False, 6334),  # REST by default
+        (Settings(qdrant_prefer_grpc=True, qdrant_grpc_port=7334), True, 7334),
+    )
+    for settings, prefer_grpc, grpc_port in cases:
+        monkeypatch.setattr(rag, "_qdrant_client", None)
+        monkeypatch.setattr(rag, "_qdrant_available", False)
+        monkeypatch.setattr(rag, "_qdrant_retry_at", 0.0)
+        created.clear()
+
+        client = asyncio.run(rag.get_qdrant_client(settings))
+
+        assert isinstance(client, FakeAsyncClient) and len(created) == 1
+        assert created[0]["prefer_grpc"] is prefer_grpc and created[0]["grpc_port"] == grpc_port
+        assert created[0]["port"] == settings.qdrant_port
+
+
+def test_qdrant_client_created_once_under_concurrency(monkeypatch):
+    """Concurrent first searches share one client; an unreachable Qdrant is retried later."""
+    from backend.src.services import rag
+
+    created = []
+
+    class FakeAsyncClient:
+        def __init__(self, **kwargs):
+            created.append(kwargs)
+
+        async def get_collections(self):
+            await asyncio.sleep(0.01)
+            raise ConnectionError("qdrant down")
+
+        async def close(self):
+            pass
+
+    monkeypatch.setattr(rag, "AsyncQdrantClient", FakeAsyncClient)
+    monkeypatch.setattr(rag, "_qdrant_client", None)
+    monkeypatch.setattr(rag, "_qdrant_available", False)
+    monkeypatch.setattr(rag, "_qdrant_retry_at", 0.0)
+    settings = Settings(qdrant_max_connections=4)
+
+    async def scenario():
+        return await asyncio.gather(*(rag.get_qdrant_client(settings) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [None] * 5
+    assert len(created) == 1 and created[0]["limits"].max_connections == 4
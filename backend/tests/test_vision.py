@@ -0,0 +1,826 @@
+"""
+Backend Tests - Vision Service Tests
+"""
+import numpy as np
+from PIL import Image
+
+from backend.src.services.vision import (
+    COLOR_CLASS_BITS, _classify_pixels, compute_color_stats, is_plant
+)
+
+
+def _legacy_masks(rgb: np.ndarray) -> dict:
+    """Reference masks built the original way (PIL HSV + separate masks)."""
+    hsv = np.array(Image.fromarray(rgb).convert("HSV")).astype(int)
+    h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+    r, g, b = (rgb[..., i].astype(int) for i in range(3))
+    return {
+        "green": (g > r) & (g > b),
+        "earth": (r > b) & (g > b),
+        "brown": (h >= 10) & (h <= 30) & (s > 40) & (v > 40) & (v < 180),
+        "yellow": (h >= 25) & (h <= 50) & (s > 50) & (v > 120),
+        "dark": (r < 70) & (g < 70) & (b < 70),
+        "red_brown": (h <= 15) & (s > 60) & (v > 50) & (v < 200),
+        "white": (s < 30) & (v > 200),
+    }
+
+
+def test_fused_kernel_matches_pil_hsv_masks():
+    """Fused classification reproduces the original per-mask heuristics."""
+    rng = np.random.default_rng(0)
+    rgb = rng.integers(0, 256, (128, 128, 3), dtype=np.uint8)
+
+    codes = _classify_pixels(rgb)
+    for name, mask in _legacy_masks(rgb).items():
+        fused = (codes & COLOR_CLASS_BITS[name]) != 0
+        assert np.array_equal(fused, mask), name
+
+
+def test_color_stats_downsampled_ratios():
+    """Downsampled stats keep original dimensions and close ratios."""
+    rgb = np.zeros((512, 512, 3), dtype=np.uint8)
+    rgb[:, :256] = (40, 160, 40)   # green half
+    rgb[:, 256:] = (150, 100, 40)  # brown half
+    image = Image.fromarray(rgb)
+
+    full = compute_color_stats(image)
+    sampled = compute_color_stats(image, downsample=4)
+
+    assert sampled.downsample == 4
+    assert (sampled.width, sampled.height) == (512, 512)
+    assert sampled.sample_pixels == 128 * 128
+    assert abs(full.green - 0.5) < 1e-6
+    assert abs(sampled.green - full.green) < 0.01
+    assert abs(sampled.brown - full.brown) < 0.01
+    assert is_plant(image, sampled)
+
+
+def test_vision_cache_near_duplicate_hit():
+    """Recompressed/resized duplicates hit the cache with rescaled bboxes."""
+    import io
+    from backend.src.services.vision_cache import VisionResultCache, hash_image_bytes
+
+    rng = np.random.default_rng(1)
+    base = Image.fromarray(rng.integers(0, 256, (24, 32, 3), dtype=np.uint8)).resize((640, 480))
+
+    original, recompressed = io.BytesIO(), io.BytesIO()
+    base.save(original, "JPEG", quality=95)
+    base.resize((320, 240)).save(recompressed, "JPEG", quality=60)
+
+    cache = VisionResultCache(max_entries=4, max_distance=6)
+    phash, size = hash_image_bytes(original.getvalue())
+    cache.put(phash, "model-a", size, {"detections": [{"class_name": "x", "confidence": 0.9, "bbox": [0, 0, 640, 480]}]})
+
+    near_hash, near_size = hash_image_bytes(recompressed.getvalue())
+    hit = cache.get(near_hash, "model-a", near_size)
+    assert hit is not None
+    assert hit["detections"][0]["bbox"] == [0, 0, 320, 240]
+    assert cache.get(near_hash, "model-b", near_size) is None
+
+    stats = cache.stats()
+    assert stats["hits"] + stats["near_hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_inference_executor_rejects_when_full():
+    """Work beyond workers + queue limit is rejected, not queued."""
+    import asyncio
+    import threading
+    import pytest
+    from backend.src.services.inference_executor import InferenceExecutor, InferenceQueueFull
+
+    executor = InferenceExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(lambda: "done"))
+        await asyncio.sleep(0.05)
+        assert executor.active == 1 and executor.queue_depth == 1
+        with pytest.raises(InferenceQueueFull):
+            await executor.run(lambda: None)
+        release.set()
+        return await running, await queued
+
+    try:
+        assert asyncio.run(scenario()) == (True, "done")
+        stats = executor.stats()
+        assert stats["rejected"] == 1 and stats["completed"] == 2
+    finally:
+        executor.shutdown()
+
+
+def test_inference_executor_releases_slot_of_cancelled_task():
+    """A request cancelled while queued gives its admission slot back."""
+    import asyncio
+    import threading
+    from backend.src.services.inference_executor import InferenceExecutor
+
+    executor = InferenceExecutor(max_workers=1, max_queue=2)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(lambda: "never"))
+        try:
+            await asyncio.sleep(0.05)
+            assert executor.queue_depth == 1
+            queued.cancel()
+            await asyncio.sleep(0)
+            assert executor.queue_depth == 0
+        finally:
+            release.set()
+        return await running
+
+    try:
+        assert asyncio.run(scenario()) is True
+        stats = executor.stats()
+        assert stats["queue_depth"] == 0 and stats["completed"] == 1
+    finally:
+        executor.shutdown()
+
+
+def test_non_max_suppression_is_class_aware():
+    """Overlapping boxes suppress within a class but not across classes."""
+    from backend.src.services.vision_backends import non_max_suppression
+
+    boxes = np.array([
+        [0, 0, 100, 100],
+        [5, 5, 105, 105],     # overlaps box 0, same class → suppressed
+        [5, 5, 105, 105],     # same box, other class → kept
+        [200, 200, 260, 260],
+    ], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7, 0.6], dtype=np.float32)
+    class_ids = np.array([0, 0, 1, 0])
+
+    keep = non_max_suppression(boxes, scores, class_ids, iou_threshold=0.5)
+    assert keep.tolist() == [0, 2, 3]
+
+
+def test_decode_image_reduced_resolution_keeps_original_size():
+    """Draft/reduce decode shrinks large uploads but reports original size."""
+    import io
+    from backend.src.services.vision import decode_image
+
+    for fmt, mode in (("JPEG", "RGB"), ("PNG", "RGB"), ("PNG", "RGBA"), ("PNG", "P")):
+        big = Image.new(mode, (4000, 3000), (60, 140, 60))
+        buf = io.BytesIO()
+        big.save(buf, fmt)
+
+        decoded = decode_image(buf.getvalue(), max_side=1280)
+        assert decoded.image.mode == "RGB"
+        assert np.allclose(decoded.image.getpixel((0, 0)), (60, 140, 60), atol=3)
+        assert decoded.original_size == (4000, 3000)
+        assert 1280 <= max(decoded.image.size) < 4000
+        sx, sy = decoded.scale
+        assert abs(decoded.image.size[0] * sx - 4000) < 1e-6
+        assert abs(decoded.image.size[1] * sy - 3000) < 1e-6
+
+
+def test_tiles_cover_image_and_merge_cross_tile_duplicates():
+    """Overlapping tiles cover the image; a lesion seen by two tiles is merged."""
+    from backend.src.services.tiling import merge_tile_detections, plan_tiles
+
+    tiles = plan_tiles(1500, 700, tile_size=640, overlap=0.2)
+    assert max(t.x + t.width for t in tiles) == 1500
+    assert max(t.y + t.height for t in tiles) == 700
+    assert all(t.width == 640 and t.height == 640 for t in tiles)
+
+    first, second = tiles[0], tiles[1]
+    overlap_x = first.x + first.width - second.x
+    lesion = lambda dx, conf: {
+        "class_name": "Early Blight", "confidence": conf,
+        "bbox": [600 - dx, 100, 630 - dx, 130], "source": "yolo"
+    }
+    merged = merge_tile_detections(
+        [[lesion(0, 0.9)], [lesion(second.x, 0.7)]], [first, second], iou_threshold=0.5
+    )
+    assert len(merged) == 1
+    assert merged[0]["confidence"] == 0.9
+    assert merged[0]["bbox"] == [600, 100, 630, 130]
+    assert overlap_x > 30
+
+
+def test_tiled_inference_shrinks_portrait_images_uniformly(monkeypatch):
+    """Capping the tile count scales both axes alike, so mapped boxes keep their shape."""
+    import contextlib
+    from backend.src.config import Settings
+    from backend.src.services import vision
+    from backend.src.services.vision_backends import VisionBackend
+
+    class SquareBackend(VisionBackend):
+        def predict(self, images, conf, imgsz=640, iou=0.7):
+            return [[{"class_name": "Early Blight", "confidence": 0.9, "bbox": [10, 10, 110, 110]}] for _ in images]
+
+    monkeypatch.setattr(vision, "crop_backend", lambda settings, crop=None: contextlib.nullcontext(SquareBackend("fake.pt")))
+    settings = Settings(vision_tile_size=640, vision_max_tiles=2, vision_tile_min_vegetation=0.0)
+    image = Image.new("RGB", (1500, 6000), (60, 140, 60))
+    stats = vision.compute_color_stats(image)
+
+    detections, info = vision._run_yolo_tiled(image, stats, settings)
+    assert info["tiles_inferred"] <= 2
+    for det in detections:
+        x1, y1, x2, y2 = det["bbox"]
+        assert abs((x2 - x1) - (y2 - y1)) < 0.01 * (x2 - x1)
+
+
+def test_micro_batcher_coalesces_concurrent_submits():
+    """Concurrent submits share batches up to max size; each caller gets its own result."""
+    import asyncio
+    from backend.src.services.micro_batcher import MicroBatcher
+
+    calls = []
+
+    async def run_batch(items, key):
+        calls.append((key, list(items)))
+        return [item * 10 for item in items]
+
+    async def scenario():
+        batcher = MicroBatcher(run_batch, max_batch_size=4, max_wait_ms=20)
+        results = await asyncio.gather(*(batcher.submit(i, key=640) for i in range(5)))
+        return batcher, results
+
+    batcher, results = asyncio.run(scenario())
+    assert results == [0, 10, 20, 30, 40]
+    assert [len(items) for _, items in calls] == [4, 1]
+    stats = batcher.stats()
+    assert stats["batch_size_histogram"] == {"1": 1, "4": 1}
+    assert stats["flush_reasons"] == {"full": 1, "timeout": 1}
+
+
+def test_color_detections_are_localized_to_lesion_regions():
+    """Brown patches become separate regions; the detection bbox is their union."""
+    from backend.src.services.vision import analyze_colors_for_disease
+
+    rgb = np.zeros((480, 640, 3), dtype=np.uint8)
+    rgb[...] = (50, 150, 40)
+    rgb[40:80, 100:160] = (140, 90, 40)    # larger lesion
+    rgb[300:332, 400:440] = (140, 90, 40)  # smaller lesion
+    image = Image.fromarray(rgb)
+
+    stats = compute_color_stats(image, downsample=4)
+    detections = analyze_colors_for_disease(image, stats)
+    blight = next(d for d in detections if d["class_name"] == "early_blight_suspected")
+
+    assert [r["bbox"] for r in blight["regions"]] == [[100, 40, 160, 80], [400, 300, 440, 332]]
+    assert blight["bbox"] == [100, 40, 440, 332]
+    assert blight["regions"][0]["confidence"] >= blight["regions"][1]["confidence"]
+
+    capped = analyze_colors_for_disease(image, stats, max_regions=1)
+    assert len(capped[0]["regions"]) == 1
+
+
+def test_color_lut_matches_exact_kernel_and_rebuilds():
+    """Full-resolution LUT is exact; a rebuilt table follows new thresholds."""
+    from backend.src.services.vision import ColorLUT, ColorThresholds
+
+    rng = np.random.default_rng(2)
+    rgb = rng.integers(0, 256, size=(128, 128, 3), dtype=np.uint8)
+
+    lut = ColorLUT(bits=8)
+    assert np.array_equal(lut.classify(rgb), _classify_pixels(rgb))
+
+    strict_white = ColorThresholds(white_max_saturation=5, white_min_value=250)
+    rebuilt = ColorLUT(strict_white, bits=4)
+    centers = (rgb >> 4 << 4) + 8
+    assert np.array_equal(rebuilt.classify(rgb), _classify_pixels(centers, strict_white))
+
+
+def test_change_detector_classifies_captures():
+    """Identical frames are unchanged; a local change yields one region to re-run."""
+    from backend.src.services.change_detection import ChangeDetector, changed_regions
+
+    detector = ChangeDetector(thumbnail_side=128, block_size=16, block_threshold=12.0)
+    rng = np.random.default_rng(3)
+    frame = rng.integers(60, 120, size=(480, 640, 3), dtype=np.uint8)
+    image = Image.fromarray(frame)
+
+    thumbnail = detector.thumbnail(image)
+    assert detector.compare("bench-1", thumbnail, image.size).status == "new"
+    detector.update("bench-1", thumbnail, image.size, {"detections": []})
+    assert detector.compare("bench-1", detector.thumbnail(image), image.size).status == "unchanged"
+
+    changed_frame = frame.copy()
+    changed_frame[100:200, 400:520] = (150, 90, 30)
+    changed_image = Image.fromarray(changed_frame)
+    report = detector.compare("bench-1", detector.thumbnail(changed_image), changed_image.size)
+    assert report.status == "partial"
+
+    boxes = changed_regions(report.changed_cells, changed_image.size)
+    assert len(boxes) == 1
+    x1, y1, x2, y2 = boxes[0]
+    assert x1 <= 400 and y1 <= 100 and x2 >= 520 and y2 >= 200
+
+
+def _constant_detector_onnx(path) -> str:
+    """Tiny YOLO-shaped ONNX model: every anchor predicts one box at (24, 24, 40, 40)."""
+    import onnx
+    from onnx import TensorProto, helper
+
+    head = [32.0, 32.0, 16.0, 16.0, 0.9]  # cx, cy, w, h, class-0 score
+    graph = helper.make_graph(
+        [
+            # Weights are named like an ultralytics export: model.0 backbone, model.1 head
+            helper.make_node("Conv", ["images", "model.0.conv.weight", "model.0.conv.bias"], ["backbone"],
+                             name="/model.0/conv/Conv"),
+            helper.make_node("Conv", ["backbone", "model.1.cv3.weight", "model.1.cv3.bias"], ["features"],
+                             name="/model.1/cv3/Conv"),
+            helper.make_node("Reshape", ["features", "shape"], ["output0"], name="/model.1/Reshape"),
+        ],
+        "constant_detector",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, ["batch", 3, "height", "width"])],
+        [helper.make_tensor_value_info("output0", TensorProto.FLOAT, ["batch", 5, "anchors"])],
+        [
+            helper.make_tensor("model.0.conv.weight", TensorProto.FLOAT, [3, 3, 1, 1], np.eye(3).ravel().tolist()),
+            helper.make_tensor("model.0.conv.bias", TensorProto.FLOAT, [3], [0.0] * 3),
+            helper.make_tensor("model.1.cv3.weight", TensorProto.FLOAT, [5, 3, 1, 1], [0.0] * 15),
+            helper.make_tensor("model.1.cv3.bias", TensorProto.FLOAT, [5], head),
+            helper.make_tensor("shape", TensorProto.INT64, [3], [0, 5, -1]),
+        ]
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    helper.set_model_props(model, {"names": "{0: 'Early Blight'}"})
+    onnx.save(model, str(path))
+    return str(path)
+
+
+def test_process_pool_predicts_and_releases_shared_memory(tmp_path):
+    """Images reach the worker through shared memory; no segment survives success or a crash."""
+    import os
+    import pytest
+    from backend.src.config import Settings
+    from backend.src.services.vision_workers import VisionWorkerPool, WorkerCrashed
+
+    segments = lambda: {name for name in os.listdir("/dev/shm") if name.startswith("psm_")}
+    before = segments()
+    settings = Settings(vision_backend="onnx", vision_process_workers=1)
+    image = Image.new("RGB", (64, 48), (60, 140, 60))
+
+    pool = VisionWorkerPool(settings, _constant_detector_onnx(tmp_path / "detector.onnx"), 1, task_timeout=60)
+    try:
+        detections = pool.predict([image, image], conf=0.5, imgsz=64)
+        assert [len(d) for d in detections] == [1, 1]
+        assert detections[0][0]["class_name"] == "Early Blight"
+        assert pool.stats()["completed"] == 1
+    finally:
+        pool.shutdown()
+
+    # A worker that cannot load its model exits; its task fails instead of hanging
+    broken = VisionWorkerPool(settings, str(tmp_path / "missing.onnx"), 1, task_timeout=60)
+    try:
+        with pytest.raises(WorkerCrashed):
+            broken.predict([image], conf=0.5, imgsz=64)
+    finally:
+        broken.shutdown()
+
+    assert segments() <= before
+
+
+def test_process_pool_restarts_dead_workers_with_backoff(tmp_path, monkeypatch):
+    """A killed worker is replaced after the backoff; repeated deaths double the delay."""
+    import time
+    from backend.src.config import Settings
+    from backend.src.services import vision_workers
+
+    monkeypatch.setattr(vision_workers, "_MONITOR_INTERVAL", 0.05)
+    monkeypatch.setattr(vision_workers, "_RESTART_BACKOFF", 1.0)
+    settings = Settings(vision_backend="onnx", vision_process_workers=1)
+    image = Image.new("RGB", (64, 48), (60, 140, 60))
+
+    def wait_for(condition, timeout=60.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline
+            time.sleep(0.02)
+        return time.monotonic()
+
+    model_path = _constant_detector_onnx(tmp_path / "detector.onnx")
+    pool = vision_workers.VisionWorkerPool(settings, model_path, 1, task_timeout=60)
+    try:
+        assert len(pool.predict([image], conf=0.5, imgsz=64)[0]) == 1
+        pool._workers[0].process.kill()
+        died = wait_for(lambda: pool._workers[0].restart_at > 0)
+        restarted = wait_for(lambda: pool.stats()["restarts"] == 1)
+        assert restarted - died >= 0.9
+        wait_for(lambda: pool.stats()["ready"] == 1)
+        assert pool._workers[0].failures == 0  # Reset once the replacement is ready
+        assert len(pool.predict([image], conf=0.5, imgsz=64)[0]) == 1
+    finally:
+        pool.shutdown()
+
+    # A worker that keeps dying before it is ready waits twice as long each time
+    broken = vision_workers.VisionWorkerPool(settings, str(tmp_path / "missing.onnx"), 1, task_timeout=60)
+    try:
+        first = wait_for(lambda: broken.stats()["restarts"] == 1)
+        second = wait_for(lambda: broken.stats()["restarts"] == 2)
+        assert second - first >= 1.9
+        assert broken._workers[0].failures == 2
+    finally:
+        broken.shutdown()
+
+
+def test_int8_quantization_keeps_head_fp32_and_reports_agreement(tmp_path):
+    """The head stays fp32; the report compares fp32 and int8 on the holdout images."""
+    import warnings
+    with warnings.catch_warnings():
+        # Scripts import the config again as ``src.config``; pydantic repeats its deprecation notice
+        warnings.simplefilter("ignore", DeprecationWarning)
+        from backend.src.scripts.quantize_int8 import _head_nodes, build_report, list_images, quantize
+
+    fp32_path = _constant_detector_onnx(tmp_path / "detector.onnx")
+    int8_path = str(tmp_path / "detector.int8.onnx")
+    images = tmp_path / "images"
+    images.mkdir()
+    for i in range(3):
+        Image.new("RGB", (80, 60), (40 * i, 140, 60)).save(images / f"leaf_{i}.png")
+
+    assert _head_nodes(fp32_path) == ["/model.1/cv3/Conv", "/model.1/Reshape"]
+
+    quantize(fp32_path, int8_path, list_images(str(images)), imgsz=64)
+    import onnx
+    op_types = [node.op_type for node in onnx.load(int8_path).graph.node]
+    assert "QuantizeLinear" in op_types and "DequantizeLinear" in op_types
+
+    report = build_report(fp32_path, int8_path, list_images(str(images)), 64, 0.5, 1, overlaps_calibration=True)
+    assert report["holdout_images"] == 3
+    assert report["detection_agreement"] == 1.0
+    assert set(report["per_image_agreement"]) == {"leaf_0.png", "leaf_1.png", "leaf_2.png"}
+    for precision in ("fp32", "int8"):
+        latency = report[precision]["latency_ms"]
+        assert latency["median"] > 0 and latency["p95"] >= latency["median"]
+    assert report["speedup"] > 0
+
+
+def test_int8_precision_serves_the_quantized_artifact(tmp_path, monkeypatch):
+    """VISION_PRECISION=int8 loads int8_model_path, reports it, and never falls back to yolov8n."""
+    import asyncio
+    import pytest
+    from backend.src.config import Settings
+    from backend.src.services import vision
+
+    int8_path = _constant_detector_onnx(tmp_path / "detector.int8.onnx")
+    settings = Settings(vision_backend="onnx", vision_precision="int8", int8_model_path=int8_path)
+    assert vision.active_model_path(settings) == int8_path
+
+    monkeypatch.setattr(vision, "_model_registry", None)
+    status = asyncio.run(vision.check_yolo_model(settings))
+    assert status["precision"] == "int8" and status["backend_model_path"] == int8_path
+
+    vision.get_model_registry(settings).get_backend()
+    status = asyncio.run(vision.check_yolo_model(settings))
+    assert status["backend_loaded"] and status["precision"] == "int8"
+    vision.get_model_registry(settings).close()
+
+    # A missing explicit artifact is an error for the ultralytics backend too
+    missing = str(tmp_path / "missing.int8.onnx")
+    with pytest.raises(FileNotFoundError):
+        vision._create_vision_backend(Settings(vision_precision="int8", int8_model_path=missing))
+    with pytest.raises(FileNotFoundError):
+        vision._create_vision_backend(Settings(), str(tmp_path / "v2.pt"))
+
+
+def test_bench_comparison_flags_regressions_beyond_threshold_and_noise():
+    """Only changes past both the relative threshold and the absolute floor are flagged."""
+    import warnings
+    with warnings.catch_warnings():
+        # Scripts import the config again as ``src.config``; pydantic repeats its deprecation notice
+        warnings.simplefilter("ignore", DeprecationWarning)
+        from backend.src.scripts.bench_vision import compare_results
+
+    baseline = {"results": {
+        "decode": {"p50_ms": 10.0, "p95_ms": 12.0},
+        "yolo": {"p50_ms": 100.0, "p95_ms": 120.0},
+        "color": {"p50_ms": 0.2, "p95_ms": 0.3},
+        "removed": {"p50_ms": 5.0, "p95_ms": 6.0},
+    }}
+    current = {"results": {
+        "decode": {"p50_ms": 11.0, "p95_ms": 12.5},   # +10% / +4%: within the threshold
+        "yolo": {"p50_ms": 130.0, "p95_ms": 90.0},    # +30% slower, -25% faster
+        "color": {"p50_ms": 0.4, "p95_ms": 0.6},      # +100% but under min_delta_ms
+        "tiled": {"p50_ms": 400.0, "p95_ms": 450.0},  # New case
+    }}
+
+    comparison = compare_results(current, baseline, threshold=0.15, min_delta_ms=1.0)
+
+    assert [(e["case"], e["metric"]) for e in comparison["regressions"]] == [("yolo", "p50_ms")]
+    assert comparison["regressions"][0]["change"] == 0.3
+    assert [(e["case"], e["metric"]) for e in comparison["improvements"]] == [("yolo", "p95_ms")]
+    assert comparison["compared_cases"] == 3
+    assert comparison["missing_in_baseline"] == ["tiled"]
+
+
+def test_resolution_policy_follows_content_and_load():
+    """Close-ups shrink, wide/elongated shots grow, overload drops to the minimum."""
+    from backend.src.services.resolution_policy import ResolutionPolicy
+
+    policy = ResolutionPolicy(base_imgsz=640, min_imgsz=320, max_imgsz=960, overload_queue_depth=8)
+
+    assert policy.choose((1280, 960), plant_coverage=0.8).imgsz == 512
+    assert policy.choose((1280, 960), plant_coverage=0.4).imgsz == 640
+    assert policy.choose((1280, 960), plant_coverage=0.1).imgsz == 800
+    assert policy.choose((1800, 600), plant_coverage=0.1).imgsz == 960
+    # Never upscale past the source resolution
+    assert policy.choose((400, 300), plant_coverage=0.1).imgsz == 416
+
+    elevated = policy.choose((1280, 960), plant_coverage=0.4, queue_depth=4)
+    assert elevated.imgsz == 512 and elevated.load == "elevated"
+    overload = policy.choose((1280, 960), plant_coverage=0.1, queue_depth=8)
+    assert overload.imgsz == 320 and "overload" in overload.to_dict()["reasons"]
+    assert policy.stats()["load_levels"]["overload"] == 1
+
+
+def test_pinned_model_input_size_overrides_adaptive_policy(monkeypatch):
+    """A statically exported model skips the resolution policy and reports its own size."""
+    import asyncio
+    import io
+    from backend.src.config import Settings
+    from backend.src.services import resolution_policy, vision
+    from backend.src.services.model_registry import ModelRegistry
+    from backend.src.services.vision_backends import VisionBackend
+
+    sizes = []
+
+    class StaticBackend(VisionBackend):
+        fixed_imgsz = 320
+
+        def predict(self, images, conf, imgsz=640, iou=0.7):
+            sizes.append(imgsz)
+            return [[] for _ in images]
+
+    registry = ModelRegistry(StaticBackend)
+    registry.register_backend("static", StaticBackend("static.onnx"))
+    monkeypatch.setattr(vision, "_model_registry", registry)
+    monkeypatch.setattr(resolution_policy, "_resolution_policy", None)
+    settings = Settings(adaptive_imgsz_enabled=True, vision_cache_enabled=False, micro_batch_enabled=False)
+
+    buf = io.BytesIO()
+    Image.new("RGB", (1280, 960), (60, 140, 60)).save(buf, "PNG")
+    result = asyncio.run(vision.analyze_image_with_yolo(buf.getvalue(), settings))
+
+    assert sizes == [320]
+    assert result["inference"]["imgsz"] == 320 and result["inference"]["policy"] == "pinned"
+    assert resolution_policy.get_resolution_policy(settings).stats()["imgsz_histogram"] == {}
+
+
+def test_model_registry_swaps_retries_and_rolls_back():
+    """A failed activation keeps the old model serving; rollback restores the previous one."""
+    from backend.src.services.model_registry import ModelRegistry
+    from backend.src.services.vision_backends import VisionBackend
+
+    class FakeBackend(VisionBackend):
+        def predict(self, images, conf, imgsz=640, iou=0.7):
+            return [[] for _ in images]
+
+    broken = {"v2.pt"}
+
+    def load(path):
+        if path in broken:
+            raise RuntimeError("corrupt weights")
+        return FakeBackend(path)
+
+    registry = ModelRegistry(load, retry_base_seconds=0.01, max_attempts=2)
+    registry.set_initial(registry.register("v1.pt", "v1").version)
+    assert registry.get_backend().model_path == "v1.pt"
+
+    registry.register("v2.pt", "v2")
+    failed = registry.activate("v2", wait=True)
+    assert failed.status == "failed" and failed.attempts == 2
+    assert registry.get_backend().model_path == "v1.pt"
+
+    broken.clear()
+    registry.activate("v2", wait=True)
+    assert registry.active_version == "v2"
+    assert registry.get_backend().model_path == "v2.pt"
+
+    registry.rollback(wait=True)
+    assert registry.active_version == "v1"
+    assert registry.stats()["swaps"] == 2
+
+
+def test_activating_missing_weights_fails_and_keeps_the_old_model(tmp_path):
+    """The real loader refuses missing weights, so activation fails instead of serving yolov8n."""
+    from backend.src.config import Settings
+    from backend.src.services import vision
+    from backend.src.services.model_registry import ModelRegistry
+    from backend.src.services.vision_backends import VisionBackend
+
+    class FakeBackend(VisionBackend):
+        def predict(self, images, conf, imgsz=640, iou=0.7):
+            return [[] for _ in images]
+
+    settings = Settings()
+    registry = ModelRegistry(lambda path: vision._create_vision_backend(settings, path), max_attempts=1)
+    registry.register_backend("v1", FakeBackend("v1.pt"))
+    registry.register(str(tmp_path / "tomato_v2_typo.pt"), "v2")
+
+    failed = registry.activate("v2", wait=True)
+    assert failed.status == "failed" and "not found" in failed.error
+    assert registry.active_version == "v1"
+    assert registry.get_backend().model_path == "v1.pt"
+
+
+def test_swapped_out_model_stays_open_until_its_last_request_finishes():
+    """Swaps and evictions retire a backend; it is closed only once no lease holds it."""
+    import time
+    from backend.src.services.model_pool import VisionModelPool
+    from backend.src.services.model_registry import ModelRegistry
+    from backend.src.services.vision_backends import VisionBackend
+
+    closed = []
+
+    class FakeBackend(VisionBackend):
+        def predict(self, images, conf, imgsz=640, iou=0.7):
+            return [[] for _ in images]
+
+        def close(self):
+            closed.append(self.model_path)
+
+    def wait_closed(path):
+        deadline = time.monotonic() + 2
+        while path not in closed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return path in closed
+
+    registry = ModelRegistry(FakeBackend)
+    registry.set_initial(registry.register("v1.pt", "v1").version)
+    with registry.lease() as backend:
+        registry.register("v2.pt", "v2")
+        registry.activate("v2", wait=True)
+        assert registry.get_backend().model_path == "v2.pt"
+        time.sleep(0.05)
+        assert closed == [] and registry.stats()["leases"] == {"in_flight": 1, "retiring": 1}
+        backend.predict([Image.new("RGB", (8, 8))], conf=0.5)  # Still usable
+    assert wait_closed("v1.pt")
+
+    pool = VisionModelPool(FakeBackend, max_models=1)
+    with pool.lease("pepper", "pepper.pt"):
+        pool.get("cucumber", "cucumber.pt")  # Evicts pepper while it is in use
+        time.sleep(0.05)
+        assert "pepper.pt" not in closed
+    assert wait_closed("pepper.pt")
+    assert pool.stats()["leases"] == {"in_flight": 0, "retiring": 0}
+
+
+def test_crop_model_pool_lru_eviction():
+    """The pool keeps at most max_models crop models, evicting the least recently used."""
+    from backend.src.services.model_pool import VisionModelPool
+    from backend.src.services.vision_backends import VisionBackend
+
+    class FakeBackend(VisionBackend):
+        def predict(self, images, conf, imgsz=640, iou=0.7):
+            return [[] for _ in images]
+
+    pool = VisionModelPool(FakeBackend, max_models=2)
+    pool.get("pepper", "pepper.pt")
+    pool.get("cucumber", "cucumber.pt")
+    assert pool.get("pepper", "pepper.pt").model_path == "pepper.pt"  # Hit, now most recent
+
+    pool.get("lettuce", "lettuce.pt")
+    stats = pool.stats()
+    assert stats["resident"] == ["pepper", "lettuce"]
+    assert stats["models"]["cucumber"]["evictions"] == 1
+    assert stats["models"]["pepper"]["hits"] == 1
+
+    pool.get("cucumber", "cucumber.pt")
+    assert pool.stats()["models"]["cucumber"]["loads"] == 2
+
+
+def test_crop_model_pool_memory_budget_and_warm_reload(tmp_path):
+    """Models over the memory budget are evicted LRU-first; idle reloads are warmed."""
+    from backend.src.services import model_pool
+    from backend.src.services.vision_backends import VisionBackend
+
+    class FakeBackend(VisionBackend):
+        def predict(self, images, conf, imgsz=640, iou=0.7):
+            return [[] for _ in images]
+
+    # The footprint of a backend without its own estimate is the weights file size
+    weights = {}
+    for crop, size_mb in (("pepper", 3), ("cucumber", 2), ("lettuce", 2)):
+        weights[crop] = str(tmp_path / f"{crop}.pt")
+        (tmp_path / f"{crop}.pt").write_bytes(b"\0" * size_mb * 2 ** 20)
+
+    loaded, warmed = [], []
+
+    def load(path):
+        loaded.append(path)
+        return FakeBackend(path)
+
+    pool = model_pool.VisionModelPool(
+        load, max_models=3, memory_budget_mb=5, reload_warmup=warmed.append
+    )
+    pool.get("pepper", weights["pepper"])
+    pool.get("cucumber", weights["cucumber"])
+    assert pool.stats()["resident_mb"] == 5.0
+
+    pool.get("lettuce", weights["lettuce"])  # 7 MB > budget: pepper (LRU) goes
+    stats = pool.stats()
+    assert stats["resident"] == ["cucumber", "lettuce"] and stats["resident_mb"] == 4.0
+    assert stats["models"]["pepper"]["evictions"] == 1
+
+    # Loads after an eviction are cold, loads after an idle unload are warmed
+    pepper = pool.get("pepper", weights["pepper"])
+    assert warmed == [] and pool.stats()["resident"] == ["lettuce", "pepper"]
+    assert sorted(pool.unload_idle(idle_seconds=0)) == ["lettuce", "pepper"]
+    assert pool.get("pepper", weights["pepper"]) is not pepper
+    assert len(warmed) == 1 and warmed[0].model_path == weights["pepper"]
+    assert pool.stats()["models"]["pepper"]["reloads"] == 1
+    assert [event["event"] for event in pool.stats()["idle_events"]] == ["unload", "unload", "reload"]
+    assert loaded.count(weights["pepper"]) == 3
+
+
+def test_crop_model_pool_charges_each_model_its_own_footprint(tmp_path):
+    """Concurrent loads and warm-up allocations are not charged to the model being loaded."""
+    import threading
+    from backend.src.services.model_pool import VisionModelPool
+    from backend.src.services.vision_backends import UltralyticsBackend
+
+    class TinyDetector:
+        def __init__(self, channels):
+            import torch
+            self.model = torch.nn.Conv2d(3, channels, 1)  # (3 + 1) * channels float32 values
+
+    sizes = {"pepper.pt": 2 ** 16, "cucumber.pt": 2 ** 17}  # 1 MB and 2 MB
+    started = threading.Barrier(2)
+    garbage = []
+
+    def load(path):
+        started.wait()  # Both loads run at the same time
+        return UltralyticsBackend(TinyDetector(sizes[path]), path)
+
+    pool = VisionModelPool(load, max_models=2, reload_warmup=lambda backend: garbage.append(bytearray(2 ** 22)))
+    threads = [
+        threading.Thread(target=pool.get, args=(crop, f"{crop}.pt"))
+        for crop in ("pepper", "cucumber")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    models = pool.stats()["models"]
+    assert models["pepper"]["memory_mb"] == 1.0 and models["cucumber"]["memory_mb"] == 2.0
+
+    pool.unload_idle(idle_seconds=0)
+    started = threading.Barrier(1)
+    pool.get("pepper", "pepper.pt")  # Warmed reload allocates 4 MB outside the model
+    assert garbage and pool.stats()["models"]["pepper"]["memory_mb"] == 1.0
+
+
+def test_idle_models_unload_and_reload_transparently():
+    """Idle models are released and reloaded (warmed) on the next request."""
+    from backend.src.services.model_pool import VisionModelPool
+    from backend.src.services.model_registry import ModelRegistry
+    from backend.src.services.vision_backends import VisionBackend
+
+    class FakeBackend(VisionBackend):
+        def predict(self, images, conf, imgsz=640, iou=0.7):
+            return [[] for _ in images]
+
+    warmed = []
+    registry = ModelRegistry(FakeBackend, reload_warmup=warmed.append)
+    registry.set_initial(registry.register("v1.pt", "v1").version)
+    first = registry.get_backend()
+
+    assert registry.unload_if_idle(idle_seconds=3600) is None
+    assert registry.unload_if_idle(idle_seconds=0) == "v1"
+    assert registry.backend is None and registry.get("v1").status == "unloaded"
+
+    reloaded = registry.get_backend()
+    assert reloaded is not first and warmed == [reloaded]
+    idle = registry.stats()["idle"]
+    assert idle["unloads"] == 1 and idle["reloads"] == 1
+    assert [event["event"] for event in idle["events"]] == ["unload", "reload"]
+
+    pool = VisionModelPool(FakeBackend)
+    pool.get("pepper", "pepper.pt")
+    assert pool.unload_idle(idle_seconds=0) == ["pepper"]
+    assert pool.stats()["resident"] == []
+    pool.get("pepper", "pepper.pt")
+    assert pool.stats()["models"]["pepper"]["reloads"] == 1
+
+
+def test_cascade_screen_skips_only_clearly_healthy_images():
+    """Clean foliage skips YOLO; symptom colors near their threshold escalate."""
+    from backend.src.services.cascade import SCREEN_NON_PLANT, CascadeScreen, ScreenDecision
+
+    screen = CascadeScreen({"brown": 0.01, "yellow": 0.03}, healthy_min_green=0.3, healthy_margin=0.5)
+
+    healthy = screen.screen({"green": 0.7, "brown": 0.001, "yellow": 0.005})
+    assert healthy.verdict == "healthy" and healthy.skips_yolo
+    assert screen.screen({"green": 0.7, "brown": 0.007, "yellow": 0.0}).verdict == "escalate"
+    assert screen.screen({"green": 0.1, "brown": 0.0, "yellow": 0.0}).verdict == "escalate"
+
+    screen.observe_yolo(200.0, images=2)
+    screen.record(healthy)
+    assert healthy.saved_ms == 100.0
+    assert screen.stats()["skip_rate"] == 1.0
+
+    # Rejected non-plants are neither skips nor savings
+    rejected = ScreenDecision(SCREEN_NON_PLANT, 1.0)
+    screen.record(rejected)
+    assert not rejected.skips_yolo and rejected.saved_ms == 0.0
+    stats = screen.stats()
+    assert stats["skip_rate"] == 1.0 and stats["screened"] == 1 and stats["rejected_non_plant"] == 1
+    assert stats["saved_ms_total"] == 100.0
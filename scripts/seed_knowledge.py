@@ -9,6 +9,7 @@ from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams, PointStruct
 import uuid
 import os
+import time
 
 # Configuration
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
@@ -16,6 +17,9 @@ OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
 QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
 COLLECTION_NAME = "agricultural_knowledge"
+# Knowledge-base version the API's retrieval cache is keyed by (see backend/src/services/rag.py)
+META_COLLECTION = f"{COLLECTION_NAME}_meta"
+VERSION_POINT_ID = "00000000-0000-0000-0000-000000000001"
 
 # Comprehensive Turkish agricultural knowledge
 SAMPLE_DOCUMENTS = [
@@ -311,6 +315,22 @@ async def get_embedding(text: str, client: httpx.AsyncClient) -> list[float]:
         return []
 
 
+def bump_collection_version(qdrant: QdrantClient) -> str:
+    """Store a new knowledge-base version so every API node drops its cached searches."""
+    version = uuid.uuid4().hex
+    existing = [c.name for c in qdrant.get_collections().collections]
+    if META_COLLECTION not in existing:
+        qdrant.create_collection(
+            collection_name=META_COLLECTION,
+            vectors_config=VectorParams(size=1, distance=Distance.DOT)
+        )
+    qdrant.upsert(
+        collection_name=META_COLLECTION,
+        points=[PointStruct(id=VERSION_POINT_ID, vector=[0.0], payload={"version": version, "updated_at": time.time()})]
+    )
+    return version
+
+
 async def seed_knowledge_base():
     """Seed the knowledge base with sample documents."""
     print("🌾 Topraksız Tarım AI - Bilgi Tabanı Oluşturucu")
@@ -392,6 +412,10 @@ async def seed_knowledge_base():
         qdrant.upsert(collection_name=COLLECTION_NAME, points=points)
         print(f"\n✅ {len(points)} döküman başarıyla eklendi!")
     
+    # The collection was replaced: cached searches on running API nodes are stale
+    version = bump_collection_version(qdrant)
+    print(f"  🔄 Bilgi tabanı sürümü güncellendi: {version[:8]} (önbellekteki aramalar geçersiz)")
+    
     # Verify
     collection_info = qdrant.get_collection(COLLECTION_NAME)
     print(f"\n📊 Koleksiyon durumu:")